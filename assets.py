@@ -0,0 +1,104 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: assets.py
+# Descrição: Cache compartilhado de fontes e imagens e medicao das fases da
+#            inicializacao (tempo ate o primeiro quadro).
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+#
+# A logo e guardada ja redimensionada, em pixels crus (RGBA), na pasta
+# .asset_cache ao lado do codigo. Nas proximas inicializacoes ela e lida direto
+# para uma superficie, sem decodificar o PNG nem escalar de novo. Se o PNG for
+# alterado (data de modificacao diferente), o cache e refeito.
+# -----------------------------------------------------------------------------
+import os
+import struct
+import time
+
+import pygame
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, ".asset_cache")
+
+# Cabecalho do arquivo de cache: assinatura, largura, altura e mtime do original
+RAW_IMAGE_HEADER = struct.Struct("<4sIId")
+RAW_IMAGE_MAGIC = b"RGBA"
+
+_fonts = {}
+
+
+def get_font(size, name=None):
+    # Cada fonte e criada uma unica vez por (nome, tamanho) e compartilhada
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.Font(name, size)
+        _fonts[key] = font
+    return font
+
+
+def asset_path(file_name):
+    return os.path.join(BASE_DIR, file_name)
+
+
+def load_scaled_image(file_name, size):
+    """
+    Carrega uma imagem ja no tamanho `size`, usando o cache em disco quando possivel.
+
+    :param file_name: Arquivo da imagem, relativo a pasta do projeto.
+    :param size: (largura, altura) desejados.
+    :return: pygame.Surface pronta para blit (convertida para o formato da tela, se houver tela).
+    """
+    source = asset_path(file_name)
+    source_mtime = os.path.getmtime(source)
+    width, height = size
+    cache_file = os.path.join(CACHE_DIR, f"{os.path.splitext(file_name)[0]}_{width}x{height}.rgba")
+
+    image = None
+    try:
+        with open(cache_file, "rb") as file:
+            magic, cached_width, cached_height, cached_mtime = RAW_IMAGE_HEADER.unpack(file.read(RAW_IMAGE_HEADER.size))
+            if magic == RAW_IMAGE_MAGIC and (cached_width, cached_height) == (width, height) and cached_mtime == source_mtime:
+                image = pygame.image.frombuffer(file.read(), (width, height), "RGBA")
+    except (OSError, struct.error, ValueError):
+        image = None
+
+    if image is None:
+        image = pygame.transform.scale(pygame.image.load(source), (width, height))
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(cache_file, "wb") as file:
+                file.write(RAW_IMAGE_HEADER.pack(RAW_IMAGE_MAGIC, width, height, source_mtime))
+                file.write(pygame.image.tobytes(image, "RGBA"))
+        except OSError:
+            pass  # sem permissao de escrita: so perde o cache
+
+    # Converte para o formato da tela (blit mais rapido) quando a janela ja existe
+    if pygame.display.get_surface() is not None:
+        image = image.convert_alpha()
+    return image
+
+
+# Mede o tempo de cada fase da inicializacao
+class StartupTimer:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def total(self):
+        return self.last - self.start
+
+    def report(self):
+        lines = ["Inicialização:"]
+        for phase, duration in self.phases:
+            lines.append(f"  {phase:<28} {duration * 1000:8.2f} ms")
+        lines.append(f"  {'total':<28} {self.total() * 1000:8.2f} ms")
+        return "\n".join(lines)
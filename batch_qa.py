@@ -0,0 +1,278 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: batch_qa.py
+# Descrição: Modo de teste em lote sem janela (driver de video "dummy" do SDL).
+#            Testa todos os controles conectados (ou uma gravacao) ao mesmo
+#            tempo e gera um relatorio JSON/CSV por controle, indexado pelo GUID.
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+#
+# Uso:
+#   python batch_qa.py --duration 60 --output relatorios
+#   python batch_qa.py --replay sessao.jrec --speed 10
+# Os resultados tambem vao para o historico (python history_store.py resumo ...).
+# -----------------------------------------------------------------------------
+import argparse
+import csv
+import json
+import os
+import time
+
+# O driver de video precisa ser escolhido antes de inicializar o pygame
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from button_chatter import ButtonChatterDetector
+from session_recorder import SessionReplay
+from history_store import HistoryStore
+
+
+# Direcoes que todo direcional digital precisa mostrar para passar no teste
+HAT_DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+
+# Bateria de testes de um controle (passa/falha por item)
+class DeviceQATest:
+    def __init__(self, joystick, axis_threshold=0.9, require_rumble=False, button_timeline=None, clock=time.perf_counter):
+        self.joystick = joystick
+        self.instance_id = joystick.get_instance_id()
+        self.guid = joystick.get_guid()
+        self.name = joystick.get_name()
+        self.axis_threshold = axis_threshold
+        self.require_rumble = require_rumble
+        # Repique/trepidacao/botao preso (button_chatter), alimentado pelos eventos de
+        # botao; `clock` e o relogio dos timestamps desses eventos
+        self.button_timeline = button_timeline
+        self.clock = clock
+        self.started_at = time.time()
+        self.finished_at = None
+        self.disconnected = False
+
+        self.axis_min = [0.0] * joystick.get_numaxes()
+        self.axis_max = [0.0] * joystick.get_numaxes()
+        self.buttons_seen = set()
+        self.hat_directions_seen = [set() for _ in range(joystick.get_numhats())]
+
+        # Teste de vibracao: o pedido e feito uma vez, na conexao
+        start = time.perf_counter()
+        self.rumble_acknowledged = bool(joystick.rumble(0.5, 0.5, 200))
+        self.rumble_command_ms = (time.perf_counter() - start) * 1000.0
+
+    def update(self):
+        # Le o estado atual do controle (chamado a cada volta do loop)
+        joystick = self.joystick
+        for i in range(len(self.axis_min)):
+            value = joystick.get_axis(i)
+            self.axis_min[i] = min(self.axis_min[i], value)
+            self.axis_max[i] = max(self.axis_max[i], value)
+        for i in range(joystick.get_numbuttons()):
+            if joystick.get_button(i):
+                self.buttons_seen.add(i)
+        for i, seen in enumerate(self.hat_directions_seen):
+            direction = tuple(joystick.get_hat(i))
+            if direction != (0, 0):
+                seen.add(direction)
+
+    def checks(self):
+        axes_ok = all(
+            low <= -self.axis_threshold and high >= self.axis_threshold
+            for low, high in zip(self.axis_min, self.axis_max)
+        )
+        buttons_ok = len(self.buttons_seen) == self.joystick.get_numbuttons()
+        hats_ok = all(set(HAT_DIRECTIONS) <= seen for seen in self.hat_directions_seen)
+        rumble_ok = self.rumble_acknowledged or not self.require_rumble
+        chatter = self.chatter_summary()
+        chatter_ok = chatter is None or chatter["passed"]
+        return {"axes": axes_ok, "buttons": buttons_ok, "hats": hats_ok, "rumble": rumble_ok, "chatter": chatter_ok}
+
+    def chatter_summary(self):
+        if self.button_timeline is None:
+            return None
+        return self.button_timeline.summary(self.clock())
+
+    def passed(self):
+        return all(self.checks().values())
+
+    def report(self):
+        checks = self.checks()
+        return {
+            "guid": self.guid,
+            "name": self.name,
+            "instance_id": self.instance_id,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "disconnected": self.disconnected,
+            "passed": all(checks.values()),
+            "checks": checks,
+            "axes": [
+                {"axis": i, "min": round(low, 4), "max": round(high, 4)}
+                for i, (low, high) in enumerate(zip(self.axis_min, self.axis_max))
+            ],
+            "buttons_seen": sorted(self.buttons_seen),
+            "buttons_missing": sorted(set(range(self.joystick.get_numbuttons())) - self.buttons_seen),
+            "hat_directions_seen": [sorted(seen) for seen in self.hat_directions_seen],
+            "rumble_acknowledged": self.rumble_acknowledged,
+            "rumble_command_ms": round(self.rumble_command_ms, 3),
+            "button_chatter": self.chatter_summary(),
+        }
+
+
+def report_file_name(test):
+    # Varios controles do mesmo modelo tem o mesmo GUID, entao o instance_id entra no nome
+    return f"{test.guid}_{test.instance_id}"
+
+
+def write_reports(tests, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    for test in tests:
+        with open(os.path.join(output_dir, report_file_name(test) + ".json"), "w", encoding="utf-8") as file:
+            json.dump(test.report(), file, indent=2)
+
+    # Resumo com uma linha por controle
+    with open(os.path.join(output_dir, "resumo.csv"), "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["guid", "instance_id", "name", "passed", "axes", "buttons", "hats", "rumble", "chatter", "buttons_missing", "buttons_flagged"])
+        for test in tests:
+            checks = test.checks()
+            chatter = test.chatter_summary()
+            writer.writerow([
+                test.guid, test.instance_id, test.name, test.passed(),
+                checks["axes"], checks["buttons"], checks["hats"], checks["rumble"], checks["chatter"],
+                " ".join(str(button) for button in sorted(set(range(test.joystick.get_numbuttons())) - test.buttons_seen)),
+                " ".join(str(button) for button in chatter["flagged_buttons"]) if chatter is not None else "",
+            ])
+
+
+# Medicoes de um controle no historico: itens aprovados (1/0), curso dos eixos e botoes
+def test_measurements(test):
+    measurements = [("passed", None, int(test.passed()))]
+    for check, passed in test.checks().items():
+        measurements.append((f"check_{check}", None, int(passed)))
+    for i, (low, high) in enumerate(zip(test.axis_min, test.axis_max)):
+        measurements.append(("axis_min", i, low))
+        measurements.append(("axis_max", i, high))
+    measurements.append(("buttons_missing", None, test.joystick.get_numbuttons() - len(test.buttons_seen)))
+    measurements.append(("rumble_command_ms", None, test.rumble_command_ms))
+    chatter = test.chatter_summary()
+    if chatter is not None:
+        measurements.append(("bounces", None, sum(button["bounces"] for button in chatter["buttons"])))
+        measurements.append(("chatter_bursts", None, sum(button["chatter_bursts"] for button in chatter["buttons"])))
+        measurements.append(("buttons_flagged", None, len(chatter["flagged_buttons"])))
+    return measurements
+
+
+def write_history(tests, history_path):
+    history = HistoryStore(history_path)
+    session_id = history.begin_session("batch_qa")
+    for test in tests:
+        history.record(session_id, test.guid, test.name, test_measurements(test), test.finished_at or time.time())
+    history.end_session(session_id)
+    history.close()
+
+
+def run_batch(duration=60.0, output_dir="relatorios", replay_path=None, replay_speed=1.0,
+              axis_threshold=0.9, require_rumble=False, poll_rate=500, history_path=None):
+    """
+    Executa os testes em todos os controles ao mesmo tempo, sem abrir janela.
+
+    :param duration: Tempo maximo do teste em segundos.
+    :param output_dir: Pasta onde os relatorios sao gravados.
+    :param replay_path: Se informado, testa os controles de uma gravacao (session_recorder).
+    :param poll_rate: Quantas vezes por segundo os controles sao lidos.
+    :param history_path: Se informado, grava os resultados neste banco (history_store).
+    :return: Lista de DeviceQATest (um por controle visto).
+    """
+    pygame.display.init()
+    pygame.joystick.init()
+
+    replay = SessionReplay(replay_path, replay_speed) if replay_path else None
+    button_chatter = ButtonChatterDetector()
+    replay_clock = (lambda: replay.time_us / 1_000_000) if replay is not None else None
+    tests = {}  # instance_id -> DeviceQATest
+    finished = []
+    clock = pygame.time.Clock()
+    deadline = time.perf_counter() + duration
+
+    while time.perf_counter() < deadline:
+        for event in pygame.event.get():
+            if replay is None:
+                button_chatter.ingest_event(event, {}, time.perf_counter())
+            if event.type == pygame.QUIT:
+                deadline = 0
+            if replay is None and event.type == pygame.JOYDEVICEADDED:
+                joystick = pygame.joystick.Joystick(event.device_index)
+                tests[joystick.get_instance_id()] = DeviceQATest(
+                    joystick, axis_threshold, require_rumble, button_chatter.add_device(joystick)
+                )
+                print(f"Controle {joystick.get_instance_id()} ({joystick.get_name()}) em teste")
+            if replay is None and event.type == pygame.JOYDEVICEREMOVED:
+                test = tests.pop(event.instance_id, None)
+                if test is not None:
+                    test.disconnected = True
+                    test.finished_at = time.time()
+                    finished.append(test)
+
+        if replay is not None:
+            # Na reproducao, o horario dos botoes e o da gravacao (nao depende da velocidade)
+            # Os controles entram e saem pelos JOYDEVICEADDED/REMOVED da propria gravacao
+            for event in replay.advance():
+                if event.type == pygame.JOYDEVICEADDED:
+                    # replay.joystick() ainda acha o controle se ele saiu no mesmo lote
+                    joystick = replay.joystick(event.device_index)
+                    tests[event.instance_id] = DeviceQATest(
+                        joystick, axis_threshold, require_rumble, button_chatter.add_device(joystick), replay_clock
+                    )
+                    print(f"Controle {event.instance_id} ({joystick.get_name()}) em teste")
+                elif event.type == pygame.JOYDEVICEREMOVED:
+                    test = tests.pop(event.instance_id, None)
+                    if test is not None:
+                        test.disconnected = True
+                        test.finished_at = time.time()
+                        finished.append(test)
+                button_chatter.ingest_event(event, {}, event.recorded_us / 1_000_000)
+            if replay.finished:
+                for test in tests.values():
+                    test.update()
+                break
+
+        for test in tests.values():
+            test.update()
+            if test.finished_at is None and test.passed():
+                test.finished_at = time.time()
+                print(f"Controle {test.instance_id} ({test.name}): APROVADO")
+
+        clock.tick(poll_rate)
+
+    all_tests = finished + list(tests.values())
+    write_reports(all_tests, output_dir)
+    if history_path:
+        write_history(all_tests, history_path)
+    if replay is not None:
+        replay.close()
+    return all_tests
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste em lote de controles, sem janela.")
+    parser.add_argument("--duration", type=float, default=60.0, help="tempo maximo do teste (s)")
+    parser.add_argument("--output", default="relatorios", help="pasta dos relatorios")
+    parser.add_argument("--replay", help="testar uma gravacao em vez dos controles conectados")
+    parser.add_argument("--speed", type=float, default=1.0, help="velocidade da reproducao")
+    parser.add_argument("--axis-threshold", type=float, default=0.9, help="curso minimo exigido em cada eixo")
+    parser.add_argument("--require-rumble", action="store_true", help="reprova controles sem vibracao")
+    parser.add_argument("--history", default="historico.db", help="banco do historico de testes (vazio desliga)")
+    args = parser.parse_args()
+
+    tests = run_batch(args.duration, args.output, args.replay, args.speed, args.axis_threshold, args.require_rumble,
+                      history_path=args.history or None)
+    approved = sum(1 for test in tests if test.passed())
+    print(f"{approved}/{len(tests)} controles aprovados. Relatorios em {args.output}")
+    pygame.quit()
+    return 0 if approved == len(tests) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,182 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: benchmark.py
+# Descrição: Benchmark de renderizacao sem janela (SDL_VIDEODRIVER=dummy) de
+#            cada funcao de desenho do main.py e do quadro completo, variando o
+#            numero de joysticks, eixos e botoes.
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+#
+# Uso:
+#   python benchmark.py --output bench_atual.json
+#   python benchmark.py --baseline bench_base.json --threshold 0.20 --frame-budget-ms 33.3
+#
+# Sai com codigo 1 se algum caso ficar mais de `threshold` mais lento que a base
+# ou se algum quadro completo passar do orcamento de tempo.
+# -----------------------------------------------------------------------------
+import argparse
+import json
+import os
+import platform
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import main
+from fake_joystick import SyntheticJoystick
+from panel_layout import TiledPanelLayout
+
+
+def measure(function, iterations, warmup=5):
+    # Executa a funcao e retorna o tempo de cada chamada (em ms)
+    for _ in range(warmup):
+        function()
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000.0)
+    return times
+
+
+def summarize(times, frame=False):
+    ordered = sorted(times)
+    mean = sum(ordered) / len(ordered)
+    result = {
+        "mean_ms": round(mean, 4),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))], 4),
+        "iterations": len(ordered),
+    }
+    if frame:
+        result["fps"] = round(1000.0 / mean, 1) if mean > 0 else None
+    return result
+
+
+def make_joysticks(count, num_axes, num_buttons, num_hats=1):
+    return {i: SyntheticJoystick(i, num_axes, num_buttons, num_hats) for i in range(count)}
+
+
+def run_benchmarks(iterations=200, joystick_counts=(1, 4, 16), axes_counts=(6, 12), button_counts=(12, 32)):
+    screen = main.init_pygame()
+    logo = main.load_resources()["logo"]
+    static_layer = main.build_static_layer(screen, logo)
+    text_print = main.TextPrint()
+    checkbox = main.initialize_checkbox(screen)
+    joystick = SyntheticJoystick(0)
+    results = {}
+
+    def tprint():
+        text_print.reset()
+        text_print.tprint(screen, "Nível de energia do joystick: wired")
+
+    def tprint_value():
+        text_print.reset()
+        joystick.tick()
+        text_print.tprint_value(screen, "  Eixo 0 valor: ", joystick.get_axis(0))
+
+    def trigger():
+        joystick.tick()
+        main.draw_trigger_velocity(joystick.get_axis(4), 550, 300, screen)
+
+    def stick():
+        joystick.tick()
+        main.draw_analog_stick(joystick.get_axis(0), joystick.get_axis(1), 550, 50, 140, 140, screen)
+
+    # Funcoes isoladas
+    results["TextPrint.tprint"] = summarize(measure(tprint, iterations))
+    results["TextPrint.tprint_value"] = summarize(measure(tprint_value, iterations))
+    results["draw_gradient_arc"] = summarize(measure(
+        lambda: main.draw_gradient_arc(screen, 0, 180, 550, 300, 50, main.RGB_COLOR_GREEN, main.RGB_COLOR_RED, 50), iterations))
+    results["draw_trigger_velocity"] = summarize(measure(trigger, iterations))
+    results["draw_analog_stick"] = summarize(measure(stick, iterations))
+    results["draw_ui"] = summarize(measure(lambda: main.draw_ui(screen, logo), iterations))
+    for num_buttons in button_counts:
+        buttons_joystick = SyntheticJoystick(0, num_buttons=num_buttons)
+        results[f"draw_checkboxes[buttons={num_buttons}]"] = summarize(measure(
+            lambda: main.draw_checkboxes(buttons_joystick, 510, 250, 20, 20, screen), iterations))
+
+    # Quadro completo: modo de um controle (display_joystick_info) e grade de paineis
+    for count in joystick_counts:
+        for num_axes in axes_counts:
+            for num_buttons in button_counts:
+                joysticks = make_joysticks(count, num_axes, num_buttons)
+                layout = TiledPanelLayout(main.PANEL_AREA, main.PANEL_SIZE)
+
+                def frame():
+                    for fake in joysticks.values():
+                        fake.tick()
+                    text_print.reset()
+                    screen.blit(static_layer, (0, 0))
+                    main.display_joystick_info(screen, text_print, joysticks, checkbox)
+
+                def tiled_frame():
+                    for fake in joysticks.values():
+                        fake.tick()
+                    main.display_joystick_panels(screen, layout, text_print, joysticks, checkbox)
+
+                case = f"joysticks={count},axes={num_axes},buttons={num_buttons}"
+                results[f"frame/display_joystick_info[{case}]"] = summarize(measure(frame, iterations), frame=True)
+                results[f"frame/panels[{case}]"] = summarize(measure(tiled_frame, iterations), frame=True)
+
+    return results
+
+
+def compare(results, baseline, threshold, frame_budget_ms):
+    # Retorna a lista de problemas encontrados (vazia se estiver tudo certo)
+    problems = []
+    for name, result in results.items():
+        base = baseline.get(name) if baseline else None
+        if base is not None and result["mean_ms"] > base["mean_ms"] * (1 + threshold):
+            problems.append(f"{name}: {result['mean_ms']:.3f} ms (base {base['mean_ms']:.3f} ms, limite +{threshold:.0%})")
+        if frame_budget_ms is not None and name.startswith("frame/") and result["p99_ms"] > frame_budget_ms:
+            problems.append(f"{name}: p99 {result['p99_ms']:.3f} ms acima do orçamento de {frame_budget_ms} ms")
+    return problems
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark de renderização sem janela.")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--joysticks", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--axes", type=int, nargs="+", default=[6, 12])
+    parser.add_argument("--buttons", type=int, nargs="+", default=[12, 32])
+    parser.add_argument("--output", default="bench_output.json", help="arquivo JSON com os resultados")
+    parser.add_argument("--baseline", help="resultado anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=0.20, help="piora maxima aceita em relacao a base")
+    parser.add_argument("--frame-budget-ms", type=float, default=1000.0 / 30, help="orcamento de tempo por quadro")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.iterations, args.joysticks, args.axes, args.buttons)
+    report = {
+        "meta": {
+            "created_at": time.time(),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "machine": platform.machine(),
+            "iterations": args.iterations,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+
+    for name, result in results.items():
+        fps = f"  {result['fps']:>8.1f} FPS" if "fps" in result else ""
+        print(f"{name:<70} média {result['mean_ms']:>8.3f} ms  p99 {result['p99_ms']:>8.3f} ms{fps}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+    problems = compare(results, baseline, args.threshold, args.frame_budget_ms)
+    for problem in problems:
+        print("REGRESSÃO:", problem)
+    pygame.quit()
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main_cli())
@@ -0,0 +1,221 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: button_chatter.py
+# Descrição: Deteccao de repique (bounce), trepidacao (chatter) e botao preso a
+#            partir dos eventos JOYBUTTONDOWN/JOYBUTTONUP, por joystick e botao.
+#            As transicoes de cada botao ficam em arrays NumPy circulares.
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+#
+# Definicoes (janelas configuraveis):
+#   repique    -> uma transicao que chega menos de `bounce_window_ms` depois da
+#                 anterior do mesmo botao (nenhum dedo solta e aperta tao rapido)
+#   trepidacao -> `chatter_transitions` transicoes ou mais dentro de
+#                 `chatter_window_ms` (rajada de repiques)
+#   preso      -> botao apertado ha mais de `stuck_after_s` segundos
+#
+# Os timestamps sao os do momento em que o evento sai da fila do pygame (o
+# pygame nao expoe o timestamp do SDL). Entre quadros a fila e esvaziada na taxa
+# de amostragem, mas os eventos que chegam enquanto a tela e desenhada saem juntos,
+# com o mesmo horario: um toque normal (aperta e solta) pode cair numa unica
+# leitura da fila. Intervalo zero, portanto, nao prova nada; so conta como repique
+# um terceiro ciclo na mesma leitura (aperta/solta/aperta sem a fila ser esvaziada).
+# -----------------------------------------------------------------------------
+import csv
+import json
+
+import numpy as np
+import pygame
+
+
+FLAG_BOUNCE = 0x01
+FLAG_CHATTER = 0x02
+FLAG_STUCK = 0x04
+
+FLAG_NAMES = {FLAG_BOUNCE: "repique", FLAG_CHATTER: "trepidação", FLAG_STUCK: "preso"}
+
+
+def flag_names(flags):
+    return [name for flag, name in FLAG_NAMES.items() if flags & flag]
+
+
+# Historico de transicoes e contadores dos botoes de um joystick
+class ButtonTimeline:
+    def __init__(self, instance_id, guid, name, num_buttons, capacity=64,
+                 bounce_window_ms=5.0, chatter_window_ms=50.0, chatter_transitions=4, stuck_after_s=10.0):
+        self.instance_id = instance_id
+        self.guid = guid
+        self.name = name
+        self.capacity = capacity
+        self.bounce_window = bounce_window_ms / 1000.0
+        self.chatter_window = chatter_window_ms / 1000.0
+        self.chatter_transitions = chatter_transitions
+        self.stuck_after = stuck_after_s
+
+        # Ultimas `capacity` transicoes de cada botao (linha = botao)
+        self.times = np.zeros((num_buttons, capacity), dtype=np.float64)
+        self.states = np.zeros((num_buttons, capacity), dtype=np.uint8)
+        self.transitions = np.zeros(num_buttons, dtype=np.int64)  # total (nao volta a zero)
+
+        self.pressed = np.zeros(num_buttons, dtype=np.uint8)
+        self.pressed_since = np.zeros(num_buttons, dtype=np.float64)
+        self.presses = np.zeros(num_buttons, dtype=np.int64)
+        self.bounces = np.zeros(num_buttons, dtype=np.int64)
+        self.chatter_bursts = np.zeros(num_buttons, dtype=np.int64)
+        self.min_interval = np.full(num_buttons, np.inf)  # menor intervalo medido entre transicoes (s)
+        self.same_drain = np.zeros(num_buttons, dtype=np.int64)  # transicoes seguidas com o mesmo horario
+        self.max_hold = np.zeros(num_buttons, dtype=np.float64)
+        self.flags = np.zeros(num_buttons, dtype=np.uint8)  # FLAG_* ja vistos (ficam marcados)
+        self.in_burst = np.zeros(num_buttons, dtype=bool)
+
+    def _grow(self, button):
+        # Alguns drivers reportam botoes alem de get_numbuttons()
+        extra = button + 1 - len(self.pressed)
+        self.times = np.vstack([self.times, np.zeros((extra, self.capacity))])
+        self.states = np.vstack([self.states, np.zeros((extra, self.capacity), dtype=np.uint8)])
+        for field in ("transitions", "pressed", "pressed_since", "presses", "bounces",
+                      "chatter_bursts", "min_interval", "same_drain", "max_hold", "flags", "in_burst"):
+            array = getattr(self, field)
+            fill = np.inf if field == "min_interval" else 0
+            setattr(self, field, np.concatenate([array, np.full(extra, fill, dtype=array.dtype)]))
+
+    def add(self, button, pressed, timestamp):
+        if button >= len(self.pressed):
+            self._grow(button)
+        if self.transitions[button] and self.pressed[button] == pressed:
+            return  # evento repetido, sem transicao
+
+        count = self.transitions[button]
+        if count:
+            interval = timestamp - self.times[button, (count - 1) % self.capacity]
+            if interval > 0:
+                self.same_drain[button] = 0
+                self.min_interval[button] = min(self.min_interval[button], interval)
+                bounce = interval < self.bounce_window
+            else:
+                # Mesma leitura da fila: o relogio nao mede o intervalo; aperta/solta
+                # e normal, mas aperta/solta/aperta nao cabe num toque humano
+                self.same_drain[button] += 1
+                bounce = self.same_drain[button] >= 2
+            if bounce:
+                self.bounces[button] += 1
+                self.flags[button] |= FLAG_BOUNCE
+
+        index = count % self.capacity
+        self.times[button, index] = timestamp
+        self.states[button, index] = pressed
+        self.transitions[button] = count + 1
+
+        # Rajada: as ultimas `chatter_transitions` transicoes cabem na janela
+        if count + 1 >= self.chatter_transitions:
+            first = self.times[button, (count + 1 - self.chatter_transitions) % self.capacity]
+            burst = timestamp - first <= self.chatter_window
+            if burst and not self.in_burst[button]:
+                self.chatter_bursts[button] += 1
+                self.flags[button] |= FLAG_CHATTER
+            self.in_burst[button] = burst
+
+        if pressed:
+            self.presses[button] += 1
+            self.pressed_since[button] = timestamp
+        else:
+            self.max_hold[button] = max(self.max_hold[button], timestamp - self.pressed_since[button])
+        self.pressed[button] = pressed
+
+    def current_flags(self, now):
+        # Flags acumulados + botoes presos neste momento
+        stuck = (self.pressed == 1) & (now - self.pressed_since > self.stuck_after)
+        return self.flags | np.where(stuck, FLAG_STUCK, 0).astype(np.uint8)
+
+    def timeline(self, button):
+        # (timestamps, estados) das transicoes guardadas do botao, em ordem cronologica
+        count = int(self.transitions[button])
+        indexes = np.arange(max(0, count - self.capacity), count) % self.capacity
+        return self.times[button, indexes], self.states[button, indexes]
+
+    def summary(self, now):
+        flags = self.current_flags(now)
+        holds = np.maximum(self.max_hold, np.where(self.pressed == 1, now - self.pressed_since, 0.0))
+        buttons = []
+        for i in range(len(self.pressed)):
+            buttons.append({
+                "button": i,
+                "presses": int(self.presses[i]),
+                "bounces": int(self.bounces[i]),
+                "chatter_bursts": int(self.chatter_bursts[i]),
+                "min_interval_ms": round(float(self.min_interval[i]) * 1000, 3) if np.isfinite(self.min_interval[i]) else None,
+                "max_hold_s": round(float(holds[i]), 3),
+                "flags": flag_names(int(flags[i])),
+            })
+        return {
+            "instance_id": self.instance_id,
+            "guid": self.guid,
+            "name": self.name,
+            "passed": not flags.any(),
+            "flagged_buttons": [i for i in range(len(flags)) if flags[i]],
+            "buttons": buttons,
+        }
+
+
+class ButtonChatterDetector:
+    def __init__(self, bounce_window_ms=5.0, chatter_window_ms=50.0, chatter_transitions=4, stuck_after_s=10.0, capacity=64):
+        """
+        :param bounce_window_ms: Intervalo minimo entre duas transicoes do mesmo botao.
+        :param chatter_window_ms: Janela da rajada de transicoes.
+        :param chatter_transitions: Transicoes dentro da janela que caracterizam trepidacao.
+        :param stuck_after_s: Tempo apertado a partir do qual o botao e considerado preso.
+        :param capacity: Transicoes guardadas por botao.
+        """
+        self.settings = dict(
+            capacity=capacity, bounce_window_ms=bounce_window_ms, chatter_window_ms=chatter_window_ms,
+            chatter_transitions=chatter_transitions, stuck_after_s=stuck_after_s,
+        )
+        self.timelines = {}  # instance_id -> ButtonTimeline
+
+    def get(self, instance_id):
+        return self.timelines.get(instance_id)
+
+    def add_device(self, joystick):
+        instance_id = joystick.get_instance_id()
+        timeline = ButtonTimeline(instance_id, joystick.get_guid(), joystick.get_name(), joystick.get_numbuttons(), **self.settings)
+        self.timelines[instance_id] = timeline
+        return timeline
+
+    def ingest_event(self, event, joysticks, timestamp):
+        if event.type == pygame.JOYDEVICEREMOVED:
+            self.timelines.pop(event.instance_id, None)
+            return
+        if event.type not in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP):
+            return
+        timeline = self.timelines.get(event.instance_id)
+        if timeline is None:
+            joystick = joysticks.get(event.instance_id)
+            if joystick is None:
+                return  # evento de um joystick que ja foi removido
+            timeline = self.add_device(joystick)
+        timeline.add(event.button, 1 if event.type == pygame.JOYBUTTONDOWN else 0, timestamp)
+
+    def flags(self, instance_id, now):
+        timeline = self.timelines.get(instance_id)
+        return timeline.current_flags(now) if timeline is not None else None
+
+    def summaries(self, now):
+        return [timeline.summary(now) for timeline in self.timelines.values()]
+
+    def export_json(self, path, now):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.summaries(now), file, indent=2)
+
+    def export_csv(self, path, now):
+        # Uma linha por botao que teve algum problema
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(["instance_id", "guid", "name", "button", "presses", "bounces", "chatter_bursts", "min_interval_ms", "flags"])
+            for summary in self.summaries(now):
+                for button in summary["buttons"]:
+                    if button["flags"]:
+                        writer.writerow([
+                            summary["instance_id"], summary["guid"], summary["name"], button["button"], button["presses"],
+                            button["bounces"], button["chatter_bursts"], button["min_interval_ms"], " ".join(button["flags"]),
+                        ])
@@ -0,0 +1,346 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: controller_profiles.py
+# Descrição: Perfis de controle indexados pelo GUID (joystick.get_guid()):
+#            dizem quais eixos sao os analogicos e os gatilhos, qual botao e o
+#            "A", etc. Os mapeamentos vem de arquivos no formato do SDL
+#            (gamecontrollerdb.txt) e sao compilados para um cache binario com
+#            tabela hash, lido via mmap (busca O(1) mesmo com milhares de linhas).
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+#
+# Arquivos lidos (os que existirem, na pasta do projeto; o ultimo tem prioridade):
+#   gamecontrollerdb.txt  -> base da comunidade (github.com/gabomdq/SDL_GameControllerDB)
+#   perfis_locais.txt     -> controles proprios (volante com Arduino, adaptadores PS2...)
+#
+# Formato de cada linha:
+#   GUID,Nome,leftx:a0,lefty:a1,lefttrigger:a4,a:b0,dpup:h0.1,...,platform:Windows,
+#     bN = botao N, aN = eixo N (+aN/-aN = metade do eixo, aN~ = invertido),
+#     hN.M = direcional N com a mascara M (1 cima, 2 direita, 4 baixo, 8 esquerda)
+#
+# Cache (.asset_cache/perfis.bin):
+#   cabecalho: MAGIC (8 bytes) + versao (uint16) + baldes (uint32) + perfis
+#              (uint32) + assinatura dos arquivos de origem (16 bytes)
+#   baldes: GUID (16 bytes) + posicao (uint32, 0xFFFFFFFF = vazio) + tamanho
+#           (uint16) da linha de mapeamento, enderecamento aberto (sondagem linear)
+#   texto: linhas de mapeamento em utf-8
+# Se algum arquivo de origem mudar (tamanho ou data), o cache e refeito. Se a
+# pasta do cache nao puder ser gravada, a mesma tabela e montada so na memoria.
+# -----------------------------------------------------------------------------
+import hashlib
+import mmap
+import os
+import platform
+import struct
+import zlib
+
+from assets import BASE_DIR, CACHE_DIR
+
+
+PROFILE_SOURCES = ["gamecontrollerdb.txt", "perfis_locais.txt"]
+PROFILE_CACHE = os.path.join(CACHE_DIR, "perfis.bin")
+
+MAGIC = b"JOYPROF\0"
+VERSION = 1
+HEADER = struct.Struct("<8sHII16s")
+BUCKET = struct.Struct("<16sIH")
+EMPTY = 0xFFFFFFFF
+
+# Nome da plataforma como aparece no campo "platform:" do SDL
+SDL_PLATFORMS = {"Windows": "Windows", "Linux": "Linux", "Darwin": "Mac OS X"}
+
+
+# Aplica inversao e meio eixo a um valor do eixo (-1.0 a 1.0); funciona tambem
+# com arrays NumPy (max(0, v) * 2 - 1 e escrito como v + |v| - 1)
+def map_axis(value, half=None, inverted=False):
+    if inverted:
+        value = -value
+    if half == "+":
+        value = value + abs(value) - 1
+    elif half == "-":
+        value = abs(value) - value - 1
+    return value
+
+
+# Mapeamento de um controle: controle semantico (leftx, a, dpup...) -> eixo/botao/direcional
+class ControllerProfile:
+    def __init__(self, guid, name, mapping):
+        self.guid = guid
+        self.name = name
+        self.mapping = mapping
+        self.axes = {}  # nome -> (eixo, metade "+"/"-"/None, invertido)
+        self.buttons = {}  # nome -> botao
+        self.hats = {}  # nome -> (direcional, mascara)
+
+        for field in mapping.split(","):
+            control, _, source = field.partition(":")
+            if not source or control == "platform":
+                continue
+            half = source[0] if source[0] in "+-" else None
+            source = source.lstrip("+-")
+            inverted = source.endswith("~")
+            source = source.rstrip("~")
+            try:
+                if source.startswith("a"):
+                    self.axes[control] = (int(source[1:]), half, inverted)
+                elif source.startswith("b"):
+                    self.buttons[control] = int(source[1:])
+                elif source.startswith("h"):
+                    hat, _, mask = source[1:].partition(".")
+                    self.hats[control] = (int(hat), int(mask))
+            except ValueError:
+                continue  # campo mal formado: ignora so ele
+
+    def axis(self, control):
+        entry = self.axes.get(control)
+        return entry[0] if entry is not None else None
+
+    def button(self, control):
+        return self.buttons.get(control)
+
+    def stick(self, side):
+        # (eixo X, eixo Y) do analogico "left"/"right", ou None
+        x, y = self.axis(side + "x"), self.axis(side + "y")
+        return (x, y) if x is not None and y is not None else None
+
+    def stick_axes(self, side):
+        # Entradas (eixo, metade, invertido) de X e Y do analogico, ou None
+        x, y = self.axes.get(side + "x"), self.axes.get(side + "y")
+        return (x, y) if x is not None and y is not None else None
+
+    def sticks(self):
+        return [stick for stick in (self.stick("left"), self.stick("right")) if stick is not None]
+
+    def triggers(self):
+        # Eixos dos gatilhos analogicos (esquerdo, direito); gatilho digital (bN) nao entra
+        left, right = self.axis("lefttrigger"), self.axis("righttrigger")
+        return (left, right) if left is not None and right is not None else None
+
+    def axis_value(self, joystick, control):
+        """
+        Le o eixo de um controle semantico ja com inversao e meio eixo aplicados.
+
+        :return: Valor de -1.0 a 1.0 (meio eixo e esticado para a faixa inteira), ou
+            None se o controle nao estiver mapeado em um eixo.
+        """
+        entry = self.axes.get(control)
+        if entry is None or entry[0] >= joystick.get_numaxes():
+            return None
+        axis, half, inverted = entry
+        return map_axis(joystick.get_axis(axis), half, inverted)
+
+    def rumble_button(self):
+        # Botao que dispara o teste rapido de vibracao (o "A"/"X" do controle)
+        return self.button("a")
+
+
+def default_mapping(num_axes):
+    # Layout fixo usado antes dos perfis: 0/1 e 2/3 analogicos, 4/5 gatilhos, botao 0 = "A"
+    fields = ["a:b0"]
+    if num_axes > 1:
+        fields += ["leftx:a0", "lefty:a1"]
+    if num_axes > 3:
+        fields += ["rightx:a2", "righty:a3"]
+    if num_axes >= 6:
+        fields += ["lefttrigger:a4", "righttrigger:a5"]
+    return ",".join(fields)
+
+
+def default_profile(joystick):
+    return ControllerProfile(joystick.get_guid(), "Padrão", default_mapping(joystick.get_numaxes()))
+
+
+def guid_bytes(guid):
+    try:
+        data = bytes.fromhex(guid)
+    except ValueError:
+        return None
+    return data if len(data) == 16 else None
+
+
+def guid_hash(key, buckets):
+    return zlib.crc32(key) % buckets
+
+
+def parse_mapping_files(paths, platform_name=None):
+    """
+    Le as linhas de mapeamento dos arquivos, na ordem (o ultimo arquivo tem prioridade).
+
+    :return: Dicionario GUID (bytes) -> linha completa, so da plataforma atual
+        (ou sem plataforma).
+    """
+    platform_name = platform_name or SDL_PLATFORMS.get(platform.system())
+    mappings = {}
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as file:
+            for line in file:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                guid, _, rest = line.partition(",")
+                key = guid_bytes(guid)
+                if key is None or "," not in rest:
+                    continue
+                line_platform = None
+                for field in rest.split(","):
+                    if field.startswith("platform:"):
+                        line_platform = field[len("platform:"):]
+                if line_platform is not None and line_platform != platform_name:
+                    continue
+                mappings[key] = line
+    return mappings
+
+
+def sources_signature(paths):
+    digest = hashlib.md5()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.digest()
+
+
+def build_profile_table(paths, signature=None):
+    """
+    Monta a tabela hash (ocupacao maxima de 50%) no formato do cache.
+
+    :return: (bytes do cache, numero de perfis).
+    """
+    mappings = parse_mapping_files(paths)
+    buckets = max(8, 2 * len(mappings))
+    table = [None] * buckets
+    text = bytearray()
+    for key, line in mappings.items():
+        data = line.encode("utf-8")[:0xFFFF]
+        index = guid_hash(key, buckets)
+        while table[index] is not None:
+            index = (index + 1) % buckets
+        table[index] = (key, len(text), len(data))
+        text += data
+
+    signature = signature if signature is not None else sources_signature(paths)
+    parts = [HEADER.pack(MAGIC, VERSION, buckets, len(mappings), signature)]
+    parts.extend(BUCKET.pack(*entry) if entry is not None else BUCKET.pack(b"\0" * 16, EMPTY, 0) for entry in table)
+    parts.append(bytes(text))
+    return b"".join(parts), len(mappings)
+
+
+def compile_profiles(paths, cache_path, signature=None):
+    # Monta a tabela e grava o cache
+    data, count = build_profile_table(paths, signature)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    temporary = cache_path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(data)
+    os.replace(temporary, cache_path)  # quem estiver lendo o cache antigo nao ve arquivo pela metade
+    return count
+
+
+class ProfileDatabase:
+    def __init__(self, sources=None, cache_path=PROFILE_CACHE):
+        """
+        :param sources: Arquivos de mapeamento; padrao: os de PROFILE_SOURCES que existirem.
+        :param cache_path: Arquivo do cache compilado.
+        """
+        if sources is None:
+            sources = [os.path.join(BASE_DIR, name) for name in PROFILE_SOURCES]
+        self.sources = [path for path in sources if os.path.exists(path)]
+        self.cache_path = cache_path
+        self.file = None
+        self.data = None
+        self.buckets = 0
+        self.count = 0
+        self.profiles = {}  # GUID (texto) -> ControllerProfile ja montado (ou None)
+        self.defaults = {}  # (GUID, eixos) -> perfil padrao
+        if self.sources:
+            self._open()
+
+    def _open(self):
+        signature = sources_signature(self.sources)
+        if self._map(signature):
+            return
+        try:
+            compile_profiles(self.sources, self.cache_path, signature)
+        except OSError:
+            pass  # pasta do cache sem permissao de escrita: so perde o cache
+        if not self._map(signature):
+            # Sem cache em disco: a mesma tabela fica so na memoria
+            data, _ = build_profile_table(self.sources, signature)
+            _, _, self.buckets, self.count, _ = HEADER.unpack_from(data, 0)
+            self.data = data
+
+    def _map(self, signature):
+        try:
+            file = open(self.cache_path, "rb")
+        except OSError:
+            return False
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            file.close()  # arquivo vazio
+            return False
+        if len(data) < HEADER.size:
+            data.close()
+            file.close()  # arquivo truncado: o cache e compilado de novo
+            return False
+        magic, version, buckets, count, cached_signature = HEADER.unpack_from(data, 0)
+        if (magic != MAGIC or version != VERSION or cached_signature != signature
+                or len(data) < HEADER.size + buckets * BUCKET.size):
+            data.close()
+            file.close()
+            return False
+        self.file, self.data, self.buckets, self.count = file, data, buckets, count
+        return True
+
+    def _find(self, key):
+        index = guid_hash(key, self.buckets)
+        text_start = HEADER.size + self.buckets * BUCKET.size
+        for _ in range(self.buckets):
+            bucket_key, offset, length = BUCKET.unpack_from(self.data, HEADER.size + index * BUCKET.size)
+            if offset == EMPTY:
+                return None
+            if bucket_key == key:
+                return bytes(self.data[text_start + offset:text_start + offset + length]).decode("utf-8")
+            index = (index + 1) % self.buckets
+        return None
+
+    def lookup(self, guid):
+        """
+        Procura o perfil do GUID.
+
+        :return: ControllerProfile, ou None se o GUID nao estiver nos arquivos.
+        """
+        if guid in self.profiles:
+            return self.profiles[guid]
+        profile = None
+        key = guid_bytes(guid)
+        if self.data is not None and key is not None:
+            line = self._find(key)
+            if line is None:
+                # Desde o SDL 2.26 os bytes 2-3 do GUID tem o CRC do nome; as linhas
+                # do gamecontrollerdb costumam ter esses bytes zerados
+                line = self._find(key[:2] + b"\0\0" + key[4:])
+            if line is not None:
+                _, name, mapping = line.split(",", 2)
+                profile = ControllerProfile(guid, name, mapping)
+        self.profiles[guid] = profile
+        return profile
+
+    def profile_for(self, joystick):
+        # Perfil do controle, ou o layout padrao se ele nao estiver cadastrado
+        guid = joystick.get_guid()
+        profile = self.lookup(guid)
+        if profile is None:
+            # O layout padrao depende do numero de eixos do controle
+            key = (guid, joystick.get_numaxes())
+            profile = self.defaults.get(key)
+            if profile is None:
+                profile = self.defaults[key] = default_profile(joystick)
+        return profile
+
+    def close(self):
+        if self.file is not None:
+            self.data.close()
+            self.file.close()
+        self.data = None
+        self.file = None
@@ -0,0 +1,159 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: event_log.py
+# Descrição: Log estruturado de eventos (JSONL com rotacao de arquivos) gravado
+#            por uma thread em segundo plano. O loop principal so coloca o
+#            registro em uma fila limitada e nunca espera pelo disco/terminal.
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+#
+# Consulta depois do turno:
+#   python event_log.py logs --kind button_down --guid 030000005e040000...
+# -----------------------------------------------------------------------------
+import argparse
+import collections
+import glob
+import json
+import os
+import time
+
+from queued_writer import QueuedWriter
+
+
+# Um registro do log. timestamp e monotonico (time.perf_counter), wall_time e a hora do relogio.
+EventRecord = collections.namedtuple("EventRecord", "timestamp wall_time kind instance_id guid payload")
+
+# O que fazer quando a fila enche
+OVERFLOW_DROP_NEWEST = "drop_newest"  # descarta o registro novo
+OVERFLOW_DROP_OLDEST = "drop_oldest"  # descarta o registro mais antigo da fila
+OVERFLOW_BLOCK = "block"  # espera espaco (so para testes: pode travar o loop)
+
+
+class EventLog(QueuedWriter):
+    def __init__(self, directory="logs", max_file_bytes=10 * 1024 * 1024, max_files=20,
+                 queue_size=65536, overflow=OVERFLOW_DROP_NEWEST, batch_size=1024, flush_interval=0.25):
+        """
+        :param directory: Pasta dos arquivos eventos-*.jsonl.
+        :param max_file_bytes: Tamanho a partir do qual um novo arquivo e aberto.
+        :param max_files: Quantos arquivos manter (os mais antigos sao apagados).
+        :param queue_size: Maximo de registros esperando gravacao.
+        :param overflow: OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST ou OVERFLOW_BLOCK.
+        """
+        if overflow not in (OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST, OVERFLOW_BLOCK):
+            raise ValueError(f"Política de estouro desconhecida: {overflow}")
+        super().__init__("event-log-writer", batch_size, flush_interval,
+                         maxlen=queue_size if overflow == OVERFLOW_DROP_OLDEST else None)
+        self.directory = directory
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.queue_size = queue_size
+        self.overflow = overflow
+
+        self.file = None
+        self.file_bytes = 0
+        self.file_index = 0
+        self.start()
+
+    def log(self, kind, instance_id=None, guid=None, **payload):
+        # Chamado pelo loop principal: so enfileira
+        record = EventRecord(time.perf_counter(), time.time(), kind, instance_id, guid, payload)
+        if len(self.queue) >= self.queue_size:
+            if self.overflow == OVERFLOW_DROP_NEWEST:
+                self.dropped += 1
+                return False
+            if self.overflow == OVERFLOW_DROP_OLDEST:
+                self.dropped += 1  # o deque com maxlen descarta o mais antigo sozinho
+            else:
+                while len(self.queue) >= self.queue_size and not self.stopped.is_set():
+                    self.wakeup.set()
+                    time.sleep(0.001)
+        self.enqueue(record)
+        return True
+
+    def _open_next_file(self):
+        if self.file is not None:
+            self.file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        self.file_index += 1
+        name = time.strftime("eventos-%Y%m%d-%H%M%S") + f"-{self.file_index:04d}.jsonl"
+        self.file = open(os.path.join(self.directory, name), "a", encoding="utf-8")
+        self.file_bytes = 0
+
+        # Rotacao: apaga os arquivos mais antigos
+        files = sorted(glob.glob(os.path.join(self.directory, "eventos-*.jsonl")), key=os.path.getmtime)
+        for old_file in files[:-self.max_files]:
+            try:
+                os.remove(old_file)
+            except OSError:
+                pass
+
+    def _write(self, records):
+        lines = [json.dumps(record._asdict(), ensure_ascii=False, default=str) for record in records]
+        data = "\n".join(lines) + "\n"
+        if self.file is None or self.file_bytes >= self.max_file_bytes:
+            self._open_next_file()
+        self.file.write(data)
+        self.file.flush()
+        self.file_bytes += len(data.encode("utf-8"))
+        self.written += len(lines)
+
+    def _finish(self):
+        if self.file is not None:
+            self.file.close()
+
+    def close(self):
+        super().close(timeout=5.0)
+
+
+def read_events(directory, kind=None, instance_id=None, guid=None, since=None, until=None):
+    """
+    Le os registros gravados, filtrando por tipo, joystick e intervalo de tempo.
+
+    :param since: Hora minima (time.time) do registro.
+    :param until: Hora maxima (time.time) do registro.
+    :return: Gerador de EventRecord, na ordem em que foram gravados.
+    """
+    files = sorted(glob.glob(os.path.join(directory, "eventos-*.jsonl")), key=os.path.getmtime)
+    for path in files:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = EventRecord(**json.loads(line))
+                if kind is not None and record.kind != kind:
+                    continue
+                if instance_id is not None and record.instance_id != instance_id:
+                    continue
+                if guid is not None and record.guid != guid:
+                    continue
+                if since is not None and record.wall_time < since:
+                    continue
+                if until is not None and record.wall_time > until:
+                    continue
+                yield record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta o log de eventos dos joysticks.")
+    parser.add_argument("directory", nargs="?", default="logs")
+    parser.add_argument("--kind", help="tipo do evento (ex: button_down, device_added)")
+    parser.add_argument("--instance-id", type=int)
+    parser.add_argument("--guid")
+    parser.add_argument("--hours", type=float, help="somente as ultimas N horas")
+    parser.add_argument("--count", action="store_true", help="mostra so a contagem por tipo")
+    args = parser.parse_args()
+
+    since = time.time() - args.hours * 3600 if args.hours else None
+    records = read_events(args.directory, args.kind, args.instance_id, args.guid, since)
+    if args.count:
+        counts = collections.Counter(record.kind for record in records)
+        for kind, count in counts.most_common():
+            print(f"{kind:<20} {count}")
+    else:
+        for record in records:
+            print(json.dumps(record._asdict(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: fake_joystick.py
+# Descrição: Joystick sintetico com a mesma interface do
+#            pygame.joystick.Joystick, para benchmarks e testes de carga sem
+#            nenhum controle conectado.
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+import math
+
+
+class SyntheticJoystick:
+    def __init__(self, instance_id, num_axes=6, num_buttons=12, num_hats=1, name="Joystick sintético"):
+        self.instance_id = instance_id
+        self.name = name
+        self.axes = [0.0] * num_axes
+        self.buttons = [0] * num_buttons
+        self.hats = [(0, 0)] * num_hats
+        self.phase = 0
+        self.rumble_calls = 0
+
+    def tick(self, step=1):
+        # Avanca o "movimento" do controle: eixos em senoide, botoes e direcionais alternando
+        self.phase += step
+        for i in range(len(self.axes)):
+            self.axes[i] = math.sin(self.phase * 0.05 + i)
+        for i in range(len(self.buttons)):
+            self.buttons[i] = (self.phase // 7 + i) % 2
+        directions = [(0, 0), (0, 1), (1, 0), (0, -1), (-1, 0)]
+        for i in range(len(self.hats)):
+            self.hats[i] = directions[(self.phase // 11 + i) % len(directions)]
+
+    def init(self):
+        pass
+
+    def quit(self):
+        pass
+
+    def get_init(self):
+        return True
+
+    def get_instance_id(self):
+        return self.instance_id
+
+    def get_id(self):
+        return self.instance_id
+
+    def get_name(self):
+        return self.name
+
+    def get_guid(self):
+        return f"{0xFA4E:04x}{self.instance_id:028x}"
+
+    def get_power_level(self):
+        return "wired"
+
+    def get_numaxes(self):
+        return len(self.axes)
+
+    def get_numbuttons(self):
+        return len(self.buttons)
+
+    def get_numhats(self):
+        return len(self.hats)
+
+    def get_numballs(self):
+        return 0
+
+    def get_axis(self, axis_number):
+        return self.axes[axis_number]
+
+    def get_button(self, button):
+        return self.buttons[button]
+
+    def get_hat(self, hat_number):
+        return self.hats[hat_number]
+
+    def rumble(self, low_frequency, high_frequency, duration):
+        self.rumble_calls += 1
+        return True
+
+    def stop_rumble(self):
+        pass
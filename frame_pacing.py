@@ -0,0 +1,138 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: frame_pacing.py
+# Descrição: Modos de ritmo do loop principal (substituem o clock.tick(30) fixo):
+#            fixo (30 FPS), ocioso (dorme em pygame.event.wait e so redesenha
+#            quando algo mudou), livre (sem limite, menor latencia para testes
+#            de tempo) e vsync (sincronizado com a atualizacao do monitor).
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+#
+# O SDL so atualiza o estado dos joysticks quando a fila de eventos e bombeada, e
+# isso so pode ser feito pela thread principal. Por isso, entre um quadro e outro,
+# collect_events() bombeia a fila na taxa de amostragem (ex: 1 kHz) ate o prazo do
+# proximo quadro: o amostrador le estado novo a cada leitura e cada evento recebe
+# o horario em que saiu da fila, e nao o horario do quadro.
+#
+# No modo ocioso, sem nada para mostrar, o loop dorme em pygame.event.wait (com
+# controles abertos o SDL continua bombeando os joysticks durante a espera). Mesmo
+# sem eventos, a tela e redesenhada a cada `refresh_interval` segundos (nivel de
+# energia, botao preso e notas de ruido mudam sem gerar evento).
+#
+# No modo vsync o prazo do quadro continua sendo 1/fps (use --fps com a taxa do
+# monitor) e o flip espera o retraco vertical.
+# -----------------------------------------------------------------------------
+import time
+
+import pygame
+
+
+PACING_FIXED = "fixo"
+PACING_IDLE = "ocioso"
+PACING_UNCAPPED = "livre"
+PACING_VSYNC = "vsync"
+PACING_MODES = [PACING_FIXED, PACING_IDLE, PACING_UNCAPPED, PACING_VSYNC]
+
+# Eventos que nao mudam nada na tela: no modo ocioso nao provocam redesenho
+PASSIVE_EVENTS = {
+    pygame.MOUSEMOTION, pygame.ACTIVEEVENT, pygame.WINDOWENTER, pygame.WINDOWLEAVE,
+    pygame.WINDOWFOCUSGAINED, pygame.WINDOWFOCUSLOST, pygame.WINDOWMOVED,
+}
+
+
+class FramePacer:
+    def __init__(self, mode=PACING_FIXED, fps=30, refresh_interval=1.0, pump_rate=1000):
+        """
+        :param mode: Um dos PACING_MODES.
+        :param fps: Limite de quadros por segundo nos modos fixo, ocioso e vsync.
+        :param refresh_interval: No modo ocioso, intervalo maximo (s) sem redesenho.
+        :param pump_rate: Vezes por segundo que a fila de eventos e bombeada entre
+            dois quadros (use a mesma taxa do amostrador).
+        """
+        if mode not in PACING_MODES:
+            raise ValueError(f"Modo de ritmo desconhecido: {mode} (use {', '.join(PACING_MODES)})")
+        self.mode = mode
+        self.fps = fps
+        self.refresh_interval = refresh_interval
+        self.pump_period = 1.0 / pump_rate
+        self.clock = pygame.time.Clock()  # so mede o FPS (get_fps)
+        self.deadline = time.perf_counter()  # horario do proximo quadro
+        self.last_redraw = None
+        self.timed_out = False  # a espera do modo ocioso terminou sem eventos
+        self.frames_drawn = 0
+        self.frames_skipped = 0
+
+    def _refresh_due(self, now):
+        return self.last_redraw is None or now - self.last_redraw >= self.refresh_interval
+
+    def collect_events(self, on_event=None, busy=False):
+        """
+        Bombeia a fila de eventos ate o prazo do proximo quadro.
+
+        :param on_event: Chamado com (evento, horario) assim que o evento sai da fila
+            (ex: o amostrador, que precisa do estado na hora).
+        :param busy: True enquanto algo muda a tela sem gerar eventos (teste de
+            vibracao, reproducao em tempo real...): o modo ocioso nao dorme.
+        :return: Lista de (evento, horario em que saiu da fila), em ordem.
+        """
+        events = []
+
+        def drain():
+            now = time.perf_counter()
+            for event in pygame.event.get():
+                events.append((event, now))
+                if on_event is not None:
+                    on_event(event, now)
+            return now
+
+        now = drain()
+        if self.mode == PACING_IDLE and not events and not busy and not self._refresh_due(now):
+            # Nada para mostrar: dorme ate chegar um evento ou vencer a atualizacao periodica
+            timeout_ms = max(1, int((self.refresh_interval - (now - self.last_redraw)) * 1000))
+            event = pygame.event.wait(timeout_ms)
+            now = time.perf_counter()
+            if event.type == pygame.NOEVENT:
+                self.timed_out = True
+                return events
+            events.append((event, now))
+            if on_event is not None:
+                on_event(event, now)
+
+        # Ate o prazo do quadro, bombeia na taxa de amostragem (no livre, o prazo ja passou)
+        while now < self.deadline:
+            time.sleep(min(self.pump_period, self.deadline - now))
+            now = drain()
+        return events
+
+    def should_redraw(self, events, busy=False, now=None):
+        """
+        Decide se este quadro precisa ser desenhado (so o modo ocioso pula quadros).
+
+        :param events: Lista de (evento, horario) de collect_events().
+        :param busy: Mesmo significado de collect_events().
+        """
+        now = time.perf_counter() if now is None else now
+        redraw = (
+            self.mode != PACING_IDLE
+            or busy
+            or self.timed_out
+            or self._refresh_due(now)
+            or any(event.type not in PASSIVE_EVENTS for event, _ in events)
+        )
+        self.timed_out = False
+        if redraw:
+            self.last_redraw = now
+            self.frames_drawn += 1
+        else:
+            self.frames_skipped += 1
+        return redraw
+
+    def end_frame(self):
+        # Agenda o prazo do proximo quadro pelo horario absoluto (sem acumular atraso)
+        self.clock.tick()
+        now = time.perf_counter()
+        if self.mode == PACING_UNCAPPED:
+            self.deadline = now
+        else:
+            self.deadline = max(self.deadline + 1.0 / self.fps, now)
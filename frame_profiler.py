@@ -0,0 +1,219 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: frame_profiler.py
+# Descrição: Medicao do tempo de cada etapa do quadro (eventos, amostragem,
+#            desenho de cada widget, envio para a tela e espera do proximo quadro),
+#            com grafico na propria tela (tecla F3) e exportacao para CSV ou
+#            para o formato de trace do Chrome (chrome://tracing / Perfetto).
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+import json
+import time
+
+import numpy as np
+import pygame
+
+from assets import get_font
+
+
+# Cores das etapas no grafico (repetem se houver mais etapas que cores)
+STAGE_COLORS = [
+    (255, 165, 0), (0, 255, 255), (255, 0, 255), (0, 255, 0), (255, 255, 0),
+    (255, 105, 180), (0, 128, 255), (200, 200, 200), (255, 0, 0), (139, 69, 19),
+]
+
+# Quadros entre duas atualizacoes das medias da legenda
+LEGEND_INTERVAL = 15
+
+
+# Grava as etapas de cada quadro em CSV (uma linha por quadro)
+class CsvTraceWriter:
+    def __init__(self, path, stages):
+        self.file = open(path, "w", encoding="utf-8")
+        self.stages = list(stages)
+        self.file.write("frame,start_s," + ",".join(f"{stage}_ms" for stage in self.stages) + ",total_ms\n")
+
+    def write_frame(self, frame, start, spans):
+        durations = dict.fromkeys(self.stages, 0.0)
+        for stage, _, duration in spans:
+            durations[stage] = durations.get(stage, 0.0) + duration
+        values = ",".join(f"{durations[stage] * 1000:.4f}" for stage in self.stages)
+        total = sum(duration for _, _, duration in spans) * 1000
+        self.file.write(f"{frame},{start:.6f},{values},{total:.4f}\n")
+
+    def close(self):
+        self.file.close()
+
+
+# Grava cada etapa como um evento "X" (duracao completa) do formato de trace do Chrome
+class ChromeTraceWriter:
+    def __init__(self, path, stages):
+        self.file = open(path, "w", encoding="utf-8")
+        self.file.write("[\n")
+        self.first = True
+
+    def write_frame(self, frame, start, spans):
+        for stage, span_start, duration in spans:
+            event = {
+                "name": stage, "cat": "frame", "ph": "X", "pid": 1, "tid": 1,
+                "ts": round(span_start * 1_000_000, 1), "dur": round(duration * 1_000_000, 1),
+                "args": {"frame": frame},
+            }
+            self.file.write(("" if self.first else ",\n") + json.dumps(event))
+            self.first = False
+
+    def close(self):
+        self.file.write("\n]\n")
+        self.file.close()
+
+
+class FrameProfiler:
+    def __init__(self, stages, capacity=240, enabled=False, trace_path=None):
+        """
+        :param stages: Nomes das etapas, na ordem em que aparecem no grafico.
+        :param capacity: Quantos quadros ficam guardados no buffer circular.
+        :param enabled: Se False, lap() e end_frame() nao fazem nada.
+        :param trace_path: Arquivo de saida (.csv ou .json para o trace do Chrome).
+        """
+        self.stages = list(stages)
+        self.stage_index = {stage: i for i, stage in enumerate(self.stages)}
+        self.capacity = capacity
+        self.timings = np.zeros((capacity, len(self.stages)), dtype=np.float32)  # ms
+        self.frames = 0
+        self.enabled = enabled or trace_path is not None
+        self.overlay_visible = False
+
+        # Grafico persistente: a cada quadro rola para a esquerda e so as colunas
+        # novas sao desenhadas; a legenda e renderizada de LEGEND_INTERVAL em LEGEND_INTERVAL quadros
+        self.graph = None
+        self.graph_key = None  # (largura, altura, orcamento, etapas) com que o grafico foi desenhado
+        self.graph_frames = 0  # quadros ja desenhados no grafico
+        self.legend = []  # superficies da legenda ja renderizadas
+        self.legend_frames = None
+
+        self.current = np.zeros(len(self.stages), dtype=np.float32)
+        self.spans = []  # (etapa, inicio, duracao) do quadro atual, para o trace
+        self.frame_start = None
+        self.last_time = None
+
+        self.writer = None
+        if trace_path is not None:
+            writer_class = ChromeTraceWriter if trace_path.endswith(".json") else CsvTraceWriter
+            self.writer = writer_class(trace_path, self.stages)
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        if self.overlay_visible:
+            self.enabled = True
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = self.last_time = time.perf_counter()
+        self.current.fill(0)
+        self.spans.clear()
+
+    def lap(self, stage):
+        # Atribui a `stage` o tempo desde a ultima marcacao (acumula se repetir no quadro)
+        if not self.enabled or self.last_time is None:
+            return
+        now = time.perf_counter()
+        duration = now - self.last_time
+        index = self.stage_index.get(stage)
+        if index is None:
+            index = self._add_stage(stage)
+        self.current[index] += duration * 1000.0
+        self.spans.append((stage, self.last_time, duration))
+        self.last_time = now
+
+    def _add_stage(self, stage):
+        self.stages.append(stage)
+        self.stage_index[stage] = len(self.stages) - 1
+        self.timings = np.hstack([self.timings, np.zeros((self.capacity, 1), dtype=np.float32)])
+        self.current = np.append(self.current, np.float32(0))
+        return len(self.stages) - 1
+
+    def end_frame(self):
+        if not self.enabled or self.frame_start is None:
+            return
+        self.timings[self.frames % self.capacity] = self.current
+        if self.writer is not None:
+            self.writer.write_frame(self.frames, self.frame_start, self.spans)
+        self.frames += 1
+
+    def recent(self):
+        # Tempos (ms) dos quadros guardados, do mais antigo para o mais novo
+        count = min(self.frames, self.capacity)
+        indexes = np.arange(self.frames - count, self.frames) % self.capacity
+        return self.timings[indexes]
+
+    def _draw_columns(self, timings, first_column, scale):
+        # Barras empilhadas (uma coluna por quadro) a partir de `first_column` do grafico
+        height = self.graph.get_height()
+        tops = height - np.cumsum((timings * scale).astype(np.int32), axis=1)
+        for column, frame_tops in enumerate(tops, first_column):
+            bottom = height
+            for stage_index, top in enumerate(frame_tops):
+                top = max(0, top)
+                if top < bottom:
+                    self.graph.fill(STAGE_COLORS[stage_index % len(STAGE_COLORS)], (column, top, 1, bottom - top))
+                    bottom = top
+
+    def _update_graph(self, width, height, budget_ms):
+        scale = height / (2 * budget_ms)  # a escala mostra ate 2x o orcamento
+        budget_y = height - int(budget_ms * scale)
+        key = (width, height, budget_ms, len(self.stages))
+        new_frames = self.frames - self.graph_frames
+        if self.graph is None or key != self.graph_key or new_frames >= width:
+            # Primeiro desenho (ou o grafico mudou): desenha tudo o que esta no buffer
+            self.graph = pygame.Surface((width, height))
+            self.graph_key = key
+            new_frames = min(self.frames, self.capacity, width)
+            self.graph.fill((255, 0, 0), (0, budget_y, width, 1))  # linha do orcamento do quadro
+        elif new_frames <= 0:
+            return
+        else:
+            # Rola o grafico e limpa as colunas novas, refazendo nelas a linha do orcamento
+            self.graph.scroll(-new_frames, 0)
+            self.graph.fill((0, 0, 0), (width - new_frames, 0, new_frames, height))
+            self.graph.fill((255, 0, 0), (width - new_frames, budget_y, new_frames, 1))
+
+        if new_frames:
+            self._draw_columns(self.recent()[-new_frames:], width - new_frames, scale)
+        self.graph_frames = self.frames
+
+    def _update_legend(self, font):
+        # As medias so mudam a cada LEGEND_INTERVAL quadros: nos outros reaproveita o texto renderizado
+        if self.legend_frames is not None and self.frames - self.legend_frames < LEGEND_INTERVAL:
+            return
+        means = self.recent().mean(axis=0)
+        self.legend = [
+            font.render(f"{stage} {means[stage_index]:.2f}", True, STAGE_COLORS[stage_index % len(STAGE_COLORS)])
+            for stage_index, stage in enumerate(self.stages)
+        ]
+        self.legend_frames = self.frames
+
+    def draw_overlay(self, screen, x=10, y=560, width=480, height=130, budget_ms=1000.0 / 30, font=None):
+        # Grafico de barras empilhadas: uma coluna por quadro, uma cor por etapa
+        if not self.overlay_visible:
+            return None
+        rect = pygame.Rect(x, y, width, height)
+        pygame.draw.rect(screen, (128, 128, 128), rect, 1)
+        self._update_graph(width - 2, height - 2, budget_ms)
+        screen.blit(self.graph, (x + 1, y + 1))
+
+        # Legenda com a media de cada etapa
+        if self.frames:
+            self._update_legend(font or get_font(16))
+            legend_x = x + 4
+            for stage_index, label in enumerate(self.legend):
+                screen.blit(label, (legend_x, y + 2 + 12 * (stage_index % 5)))
+                if stage_index % 5 == 4:
+                    legend_x += 160
+        return rect
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
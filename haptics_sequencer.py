@@ -0,0 +1,145 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: haptics_sequencer.py
+# Descrição: Sequenciador de testes de vibracao: executa padroes roteirizados dos
+#            motores (baixa/alta frequencia) em todos os controles ao mesmo tempo.
+#            Os comandos ficam em uma fila de prioridade por horario e o loop
+#            principal chama tick() a cada quadro, sem nunca esperar.
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+import collections
+import heapq
+import json
+import time
+
+
+# Um passo do padrao: em `offset_ms` apos o inicio, liga os motores por `duration_ms`
+RumbleStep = collections.namedtuple("RumbleStep", "offset_ms low_frequency high_frequency duration_ms")
+
+# Padroes disponiveis (tecla R no main.py executa o primeiro)
+PATTERNS = {
+    "completo": [
+        RumbleStep(0, 1.0, 0.0, 300),  # so o motor de baixa frequencia
+        RumbleStep(450, 0.0, 1.0, 300),  # so o motor de alta frequencia
+        RumbleStep(900, 1.0, 1.0, 300),  # os dois juntos
+        RumbleStep(1350, 0.25, 0.25, 150),  # intensidades baixas
+        RumbleStep(1600, 0.5, 0.5, 150),
+        RumbleStep(1850, 0.75, 0.75, 150),
+    ],
+    "pulso": [RumbleStep(i * 200, 0.7, 0.7, 100) for i in range(5)],
+    "rampa": [RumbleStep(i * 100, i / 9.0, i / 9.0, 100) for i in range(10)],
+    "alternado": [RumbleStep(i * 150, float(i % 2 == 0), float(i % 2 == 1), 150) for i in range(8)],
+}
+
+
+# Resultado dos comandos de vibracao de um controle
+class DeviceHapticsResult:
+    def __init__(self, instance_id, guid, name):
+        self.instance_id = instance_id
+        self.guid = guid
+        self.name = name
+        self.accepted = 0
+        self.rejected = 0
+        self.command_ms = []  # tempo de cada chamada rumble()
+        self.late_ms = []  # atraso entre o horario agendado e a chamada
+        self.missing = False  # controle saiu antes do fim do padrao
+
+    def add(self, accepted, command_ms, late_ms):
+        if accepted:
+            self.accepted += 1
+        else:
+            self.rejected += 1
+        self.command_ms.append(command_ms)
+        self.late_ms.append(late_ms)
+
+    def summary(self):
+        commands = sorted(self.command_ms)
+        return {
+            "instance_id": self.instance_id,
+            "guid": self.guid,
+            "name": self.name,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "passed": self.accepted > 0 and self.rejected == 0 and not self.missing,
+            "missing": self.missing,
+            "command_mean_ms": round(sum(commands) / len(commands), 4) if commands else None,
+            "command_max_ms": round(commands[-1], 4) if commands else None,
+            "late_max_ms": round(max(self.late_ms), 3) if self.late_ms else None,
+        }
+
+
+class HapticsSequencer:
+    def __init__(self, budget_ms=2.0, event_log=None):
+        """
+        :param budget_ms: Tempo maximo gasto em chamadas rumble() por tick; o que
+            passar fica para o proximo quadro (o rumble() pode demorar em alguns drivers).
+        :param event_log: EventLog opcional que recebe um registro por comando.
+        """
+        self.budget_ms = budget_ms
+        self.event_log = event_log
+        self.queue = []  # heap de (horario, sequencia, instance_id, passo)
+        self.sequence = 0
+        self.results = {}  # instance_id -> DeviceHapticsResult
+        self.pattern = None
+        self.started_at = None
+
+    @property
+    def running(self):
+        return bool(self.queue)
+
+    def start(self, joysticks, pattern="completo", stagger_ms=0.0, now=None):
+        """
+        Agenda o padrao em todos os controles. Um novo start() descarta o teste anterior.
+
+        :param stagger_ms: Defasagem entre um controle e o proximo (0 = todos juntos).
+        """
+        now = time.perf_counter() if now is None else now
+        self.queue = []
+        self.results = {}
+        self.pattern = pattern
+        self.started_at = now
+        for position, (instance_id, joystick) in enumerate(joysticks.items()):
+            self.results[instance_id] = DeviceHapticsResult(instance_id, joystick.get_guid(), joystick.get_name())
+            for step in PATTERNS[pattern]:
+                due = now + (step.offset_ms + position * stagger_ms) / 1000.0
+                heapq.heappush(self.queue, (due, self.sequence, instance_id, step))
+                self.sequence += 1
+
+    def tick(self, joysticks, now=None):
+        # Executa os comandos vencidos, respeitando o orcamento de tempo do quadro
+        now = time.perf_counter() if now is None else now
+        deadline = time.perf_counter() + self.budget_ms / 1000.0
+        executed = 0
+        while self.queue and self.queue[0][0] <= now:
+            if executed and time.perf_counter() >= deadline:
+                break
+            due, _, instance_id, step = heapq.heappop(self.queue)
+            result = self.results[instance_id]
+            joystick = joysticks.get(instance_id)
+            if joystick is None:
+                result.missing = True
+                continue
+
+            begin = time.perf_counter()
+            accepted = bool(joystick.rumble(step.low_frequency, step.high_frequency, step.duration_ms))
+            command_ms = (time.perf_counter() - begin) * 1000.0
+            result.add(accepted, command_ms, (begin - due) * 1000.0)
+            executed += 1
+            if self.event_log is not None:
+                self.event_log.log("rumble_test", instance_id, result.guid, pattern=self.pattern,
+                                   low_frequency=step.low_frequency, high_frequency=step.high_frequency,
+                                   duration_ms=step.duration_ms, accepted=accepted, command_ms=round(command_ms, 4))
+        return executed
+
+    def stop(self, joysticks):
+        self.queue = []
+        for joystick in joysticks.values():
+            joystick.stop_rumble()
+
+    def summaries(self):
+        return [result.summary() for result in self.results.values()]
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"pattern": self.pattern, "devices": self.summaries()}, file, indent=2)
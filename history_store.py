@@ -0,0 +1,342 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: history_store.py
+# Descrição: Historico dos testes em SQLite (modo WAL): sessoes de teste e as
+#            medicoes de cada controle (drift, taxa de relatorios, ruido...),
+#            indexadas por GUID, nome e horario. O loop principal so enfileira;
+#            a gravacao e feita em lotes por uma thread em segundo plano.
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+#
+# Consultas:
+#   python history_store.py consulta --metric drift --above 0.05 --name PS4 --days 7
+#   python history_store.py resumo --metric drift --by semana --days 90 --above 0.05
+#   python history_store.py metricas
+#
+# Tabelas:
+#   sessions     -> uma linha por execucao do main.py/batch_qa.py
+#   devices      -> um controle = (GUID, nome); guardado uma vez so
+#   measurements -> (sessao, controle, horario, metrica, canal, valor); canal e o
+#                   analogico/eixo da metrica, ou NULL se ela for do controle todo
+#   daily_stats  -> soma/minimo/maximo de cada metrica por dia e modelo (nome),
+#                   atualizada junto com cada lote gravado
+# Os indices (metrica, horario) e (controle, metrica, horario) ja contem o valor:
+# filtros por periodo leem so o trecho do indice, sem varrer a tabela. As
+# tendencias por dia/semana/mes/modelo leem a daily_stats, entao o custo depende
+# do numero de dias e modelos, nao do numero de medicoes.
+# -----------------------------------------------------------------------------
+import argparse
+import collections
+import math
+import platform
+import sqlite3
+import threading
+import time
+
+from queued_writer import QueuedWriter
+
+
+DEFAULT_PATH = "historico.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    station TEXT,
+    started_at REAL NOT NULL,
+    ended_at REAL
+);
+CREATE TABLE IF NOT EXISTS devices (
+    id INTEGER PRIMARY KEY,
+    guid TEXT NOT NULL,
+    name TEXT NOT NULL,
+    UNIQUE (guid, name)
+);
+CREATE INDEX IF NOT EXISTS idx_devices_name ON devices (name);
+CREATE TABLE IF NOT EXISTS measurements (
+    session_id INTEGER NOT NULL REFERENCES sessions (id),
+    device_id INTEGER NOT NULL REFERENCES devices (id),
+    recorded_at REAL NOT NULL,
+    metric TEXT NOT NULL,
+    channel INTEGER,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_measurements_metric_time
+    ON measurements (metric, recorded_at, device_id, channel, value);
+CREATE INDEX IF NOT EXISTS idx_measurements_device
+    ON measurements (device_id, metric, recorded_at, value);
+CREATE INDEX IF NOT EXISTS idx_sessions_started ON sessions (started_at);
+CREATE TABLE IF NOT EXISTS daily_stats (
+    metric TEXT NOT NULL,
+    day TEXT NOT NULL,
+    name TEXT NOT NULL,
+    measurements INTEGER NOT NULL,
+    total REAL NOT NULL,
+    minimum REAL NOT NULL,
+    maximum REAL NOT NULL,
+    PRIMARY KEY (metric, day, name)
+) WITHOUT ROWID;
+"""
+
+# Agrupamentos do comando "resumo": expressao SQL da chave do grupo nas medicoes
+# (m = measurements, d = devices) e na tabela diaria (None = so nas medicoes)
+GROUPS = {
+    "dia": ("strftime('%Y-%m-%d', m.recorded_at, 'unixepoch', 'localtime')", "day"),
+    "semana": ("strftime('%Y-S%W', m.recorded_at, 'unixepoch', 'localtime')", "strftime('%Y-S%W', day)"),
+    "mes": ("strftime('%Y-%m', m.recorded_at, 'unixepoch', 'localtime')", "substr(day, 1, 7)"),
+    "modelo": ("d.name", "name"),
+    "guid": ("d.guid", None),
+}
+
+UPSERT_DAILY = (
+    "INSERT INTO daily_stats (metric, day, name, measurements, total, minimum, maximum) VALUES (?, ?, ?, ?, ?, ?, ?)"
+    " ON CONFLICT (metric, day, name) DO UPDATE SET"
+    " measurements = measurements + excluded.measurements, total = total + excluded.total,"
+    " minimum = MIN(minimum, excluded.minimum), maximum = MAX(maximum, excluded.maximum)"
+)
+
+# Uma leva de medicoes de um controle esperando gravacao
+PendingRecord = collections.namedtuple("PendingRecord", "session_id guid name recorded_at measurements")
+
+
+def open_database(path=DEFAULT_PATH):
+    connection = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+    # WAL: as consultas (CLI) leem enquanto a bancada grava; NORMAL so sincroniza
+    # o disco no checkpoint, o que basta para um historico
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class HistoryStore(QueuedWriter):
+    def __init__(self, path=DEFAULT_PATH, batch_size=1000, flush_interval=1.0, queue_size=100000):
+        """
+        :param path: Arquivo do banco SQLite.
+        :param batch_size: Maximo de levas de medicoes gravadas em uma transacao.
+        :param flush_interval: Segundos entre duas gravacoes.
+        :param queue_size: Maximo de levas esperando gravacao; as que passarem sao descartadas.
+        """
+        super().__init__("history-store-writer", batch_size, flush_interval)
+        self.path = path
+        self.queue_size = queue_size
+        self.connection = open_database(path)
+        self.lock = threading.Lock()  # a conexao e usada pela thread e por begin_session
+        self.device_ids = {}  # (guid, nome) -> devices.id
+        self.start()
+
+    def begin_session(self, source, station=None):
+        # Gravado na hora (chamar fora do loop de quadros): as medicoes precisam do id.
+        # station identifica a bancada (padrao: nome do computador)
+        station = station or platform.node()
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO sessions (source, station, started_at) VALUES (?, ?, ?)", (source, station, time.time())
+            )
+        return cursor.lastrowid
+
+    def end_session(self, session_id):
+        self.queue.append(("end", session_id, time.time()))
+        self.wakeup.set()
+
+    def record(self, session_id, guid, name, measurements, recorded_at=None):
+        """
+        Enfileira as medicoes de um controle (nao espera o disco).
+
+        :param measurements: Lista de (metrica, canal, valor); canal pode ser None.
+            Valores None/NaN/infinitos (metrica ainda sem dados) sao ignorados.
+        :return: False se a fila estava cheia e a leva foi descartada.
+        """
+        measurements = [(metric, channel, float(value)) for metric, channel, value in measurements
+                        if value is not None and math.isfinite(value)]
+        if not measurements:
+            return True
+        if len(self.queue) >= self.queue_size:
+            self.dropped += 1
+            return False
+        recorded_at = time.time() if recorded_at is None else recorded_at
+        self.enqueue(PendingRecord(session_id, guid, name, recorded_at, measurements))
+        return True
+
+    def _device_id(self, guid, name):
+        key = (guid, name)
+        device_id = self.device_ids.get(key)
+        if device_id is None:
+            self.connection.execute("INSERT OR IGNORE INTO devices (guid, name) VALUES (?, ?)", key)
+            device_id = self.connection.execute("SELECT id FROM devices WHERE guid = ? AND name = ?", key).fetchone()[0]
+            self.device_ids[key] = device_id
+        return device_id
+
+    def _write(self, items):
+        with self.lock, self.connection:
+            rows = []
+            daily = {}  # (metrica, dia, nome) -> [medicoes, soma, minimo, maximo]
+            for item in items:
+                if not isinstance(item, PendingRecord):
+                    _, session_id, ended_at = item
+                    self.connection.execute("UPDATE sessions SET ended_at = ? WHERE id = ?", (ended_at, session_id))
+                    continue
+                device_id = self._device_id(item.guid, item.name)
+                day = time.strftime("%Y-%m-%d", time.localtime(item.recorded_at))
+                for metric, channel, value in item.measurements:
+                    rows.append((item.session_id, device_id, item.recorded_at, metric, channel, value))
+                    stats = daily.get((metric, day, item.name))
+                    if stats is None:
+                        daily[(metric, day, item.name)] = [1, value, value, value]
+                    else:
+                        stats[0] += 1
+                        stats[1] += value
+                        stats[2] = min(stats[2], value)
+                        stats[3] = max(stats[3], value)
+            self.connection.executemany(
+                "INSERT INTO measurements (session_id, device_id, recorded_at, metric, channel, value) VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self.connection.executemany(UPSERT_DAILY, [key + tuple(stats) for key, stats in daily.items()])
+        self.written += len(rows)
+
+    def close(self):
+        # Sem limite de tempo: o que esta na fila e justamente o resultado dos testes
+        super().close()
+        self.connection.close()
+
+
+def _filters(metric, name=None, guid=None, since=None, until=None, above=None, below=None):
+    # Monta o WHERE comum das consultas (m = measurements, d = devices)
+    clauses, params = ["m.metric = ?"], [metric]
+    if name is not None:
+        clauses.append("d.name LIKE ?")
+        params.append(f"%{name}%")
+    if guid is not None:
+        clauses.append("d.guid = ?")
+        params.append(guid)
+    if since is not None:
+        clauses.append("m.recorded_at >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("m.recorded_at <= ?")
+        params.append(until)
+    if above is not None:
+        clauses.append("m.value > ?")
+        params.append(above)
+    if below is not None:
+        clauses.append("m.value < ?")
+        params.append(below)
+    return " AND ".join(clauses), params
+
+
+def query_measurements(connection, metric, name=None, guid=None, since=None, until=None, above=None, below=None, limit=1000):
+    """
+    Medicoes de uma metrica, das mais recentes para as mais antigas.
+
+    :param name: Parte do nome do controle (ex: "PS4").
+    :param since: Hora minima (time.time) da medicao.
+    :return: Lista de (horario, GUID, nome, canal, valor, sessao).
+    """
+    where, params = _filters(metric, name, guid, since, until, above, below)
+    return connection.execute(
+        f"SELECT m.recorded_at, d.guid, d.name, m.channel, m.value, m.session_id"
+        f" FROM measurements m JOIN devices d ON d.id = m.device_id"
+        f" WHERE {where} ORDER BY m.recorded_at DESC LIMIT ?",
+        params + [limit],
+    ).fetchall()
+
+
+def aggregate(connection, metric, group_by="dia", name=None, guid=None, since=None, until=None, threshold=None):
+    """
+    Estatisticas de uma metrica por periodo, modelo ou GUID.
+
+    Sem GUID nem `threshold`, le a tabela diaria (daily_stats); nesse caso `since`
+    e `until` valem pelo dia inteiro. Senao, percorre o trecho do indice de medicoes.
+
+    :param group_by: Uma das chaves de GROUPS.
+    :param threshold: Se informado, conta tambem as medicoes acima deste valor.
+    :return: Lista de (grupo, medicoes, media, minimo, maximo, acima); acima e None sem `threshold`.
+    """
+    measurement_key, daily_key = GROUPS[group_by]
+    if guid is None and threshold is None and daily_key is not None:
+        clauses, params = ["metric = ?"], [metric]
+        if name is not None:
+            clauses.append("name LIKE ?")
+            params.append(f"%{name}%")
+        if since is not None:
+            clauses.append("day >= ?")
+            params.append(time.strftime("%Y-%m-%d", time.localtime(since)))
+        if until is not None:
+            clauses.append("day <= ?")
+            params.append(time.strftime("%Y-%m-%d", time.localtime(until)))
+        return connection.execute(
+            f"SELECT {daily_key} AS grupo, SUM(measurements), SUM(total) / SUM(measurements), MIN(minimum), MAX(maximum), NULL"
+            f" FROM daily_stats WHERE {' AND '.join(clauses)} GROUP BY grupo ORDER BY grupo",
+            params,
+        ).fetchall()
+
+    where, params = _filters(metric, name, guid, since, until)
+    return connection.execute(
+        f"SELECT {measurement_key} AS grupo, COUNT(*), AVG(m.value), MIN(m.value), MAX(m.value),"
+        f" {'SUM(m.value > ?)' if threshold is not None else 'NULL'}"
+        f" FROM measurements m JOIN devices d ON d.id = m.device_id"
+        f" WHERE {where} GROUP BY grupo ORDER BY grupo",
+        ([threshold] if threshold is not None else []) + params,
+    ).fetchall()
+
+
+def metric_names(connection):
+    # Metricas gravadas (percorre so o indice por metrica, pulando de uma para a proxima)
+    names = []
+    row = connection.execute("SELECT MIN(metric) FROM measurements").fetchone()
+    while row[0] is not None:
+        names.append(row[0])
+        row = connection.execute("SELECT MIN(metric) FROM measurements WHERE metric > ?", (row[0],)).fetchone()
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta o histórico de testes dos controles.")
+    parser.add_argument("--db", default=DEFAULT_PATH, help="arquivo do banco")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_filters(command):
+        command.add_argument("--metric", required=True, help="ex: drift, report_rate_hz, noise_rms")
+        command.add_argument("--name", help="parte do nome do controle (ex: PS4)")
+        command.add_argument("--guid")
+        command.add_argument("--days", type=float, help="somente os ultimos N dias")
+
+    query = commands.add_parser("consulta", help="lista as medicoes de uma metrica")
+    add_filters(query)
+    query.add_argument("--above", type=float, help="somente valores acima deste")
+    query.add_argument("--below", type=float, help="somente valores abaixo deste")
+    query.add_argument("--limit", type=int, default=100)
+
+    summary = commands.add_parser("resumo", help="estatisticas de uma metrica por grupo")
+    add_filters(summary)
+    summary.add_argument("--by", choices=sorted(GROUPS), default="dia")
+    summary.add_argument("--above", type=float, help="conta as medicoes acima deste valor")
+
+    commands.add_parser("metricas", help="lista as metricas gravadas")
+    args = parser.parse_args()
+
+    connection = open_database(args.db)
+    if args.command == "metricas":
+        for name in metric_names(connection):
+            print(name)
+        return
+
+    since = time.time() - args.days * 86400 if args.days else None
+    if args.command == "consulta":
+        rows = query_measurements(connection, args.metric, args.name, args.guid, since, None, args.above, args.below, args.limit)
+        for recorded_at, guid, name, channel, value, session_id in rows:
+            when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(recorded_at))
+            channel = "-" if channel is None else channel
+            print(f"{when}  {guid}  {name:<30.30} canal {channel:<3} {value:>12.5f}  sessao {session_id}")
+    else:
+        print(f"{'grupo':<32} {'medições':>9} {'média':>10} {'mínimo':>10} {'máximo':>10} {'acima':>7}")
+        for group, count, mean, low, high, above in aggregate(
+            connection, args.metric, args.by, args.name, args.guid, since, None, args.above
+        ):
+            above = "-" if above is None else above
+            print(f"{str(group):<32.32} {count:>9} {mean:>10.5f} {low:>10.5f} {high:>10.5f} {above:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: joystick_sampler.py
+# Descrição: Amostragem dos joysticks em alta taxa (ex: 1 kHz), desacoplada do
+#            loop de desenho de 30 FPS. As amostras ficam em buffers circulares
+#            pre-alocados (NumPy), um por joystick.
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+#
+# Observacao: o SDL so atualiza o estado dos joysticks quando a fila de eventos
+# e bombeada, o que so pode ser feito pela thread principal. O loop principal
+# bombeia a fila na mesma taxa do amostrador entre um quadro e outro
+# (frame_pacing.FramePacer.collect_events), entao cada leitura desta thread ve
+# estado novo. Alem disso, cada evento JOYAXISMOTION/JOYBUTTON*/JOYHATMOTION e
+# aplicado com ingest_event() assim que sai da fila, com o horario da retirada:
+# nenhuma transicao intermediaria se perde, mesmo entre duas leituras.
+# -----------------------------------------------------------------------------
+import threading
+import time
+
+import numpy as np
+import pygame
+
+
+# Buffer circular com as amostras de um joystick.
+# Cada amostra tem: timestamp (time.perf_counter), eixos, botoes e direcionais.
+class SampleRingBuffer:
+    def __init__(self, capacity, num_axes, num_buttons, num_hats):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.axes = np.zeros((capacity, num_axes), dtype=np.float32)
+        self.buttons = np.zeros((capacity, num_buttons), dtype=np.uint8)
+        self.hats = np.zeros((capacity, num_hats, 2), dtype=np.int8)
+        self.count = 0  # total de amostras ja escritas (nao volta a zero)
+        self.lock = threading.Lock()
+
+    def append(self, timestamp, axes, buttons, hats):
+        with self.lock:
+            index = self.count % self.capacity
+            self.timestamps[index] = timestamp
+            self.axes[index] = axes
+            self.buttons[index] = buttons
+            self.hats[index] = hats
+            self.count += 1
+
+    def latest(self):
+        # Copia da amostra mais recente: (timestamp, eixos, botoes, direcionais)
+        with self.lock:
+            if self.count == 0:
+                return None
+            index = (self.count - 1) % self.capacity
+            return (
+                self.timestamps[index],
+                self.axes[index].copy(),
+                self.buttons[index].copy(),
+                self.hats[index].copy(),
+            )
+
+    def read_since(self, position):
+        """
+        Retorna as amostras escritas depois de `position`, em ordem cronologica.
+
+        :param position: Valor de `count` da leitura anterior (0 na primeira leitura).
+        :return: (timestamps, eixos, botoes, direcionais, nova_posicao, perdidas), onde
+            `perdidas` e o numero de amostras sobrescritas antes de serem lidas.
+        """
+        with self.lock:
+            count = self.count
+            lost = max(0, count - self.capacity - position)
+            start = max(position, count - self.capacity)
+            indexes = np.arange(start, count) % self.capacity
+            return (
+                self.timestamps[indexes],
+                self.axes[indexes],
+                self.buttons[indexes],
+                self.hats[indexes],
+                count,
+                lost,
+            )
+
+
+# Visao de um joystick que responde get_axis/get_button/get_hat a partir de uma
+# amostra ja lida, com a mesma interface do pygame.joystick.Joystick.
+# Os demais metodos (get_name, get_guid, rumble...) vao para o joystick real.
+class SampledJoystick:
+    def __init__(self, joystick, sample):
+        self.joystick = joystick
+        self.timestamp, self.axes, self.buttons, self.hats = sample
+
+    def get_axis(self, axis_number):
+        return float(self.axes[axis_number])
+
+    def get_button(self, button):
+        return int(self.buttons[button])
+
+    def get_hat(self, hat_number):
+        x, y = self.hats[hat_number]
+        return (int(x), int(y))
+
+    def __getattr__(self, name):
+        return getattr(self.joystick, name)
+
+
+# Estado de um joystick acompanhado pelo amostrador
+class SampledDevice:
+    def __init__(self, joystick, capacity):
+        self.joystick = joystick
+        num_axes = joystick.get_numaxes()
+        num_buttons = joystick.get_numbuttons()
+        num_hats = joystick.get_numhats()
+        self.buffer = SampleRingBuffer(capacity, num_axes, num_buttons, num_hats)
+        # Ultimo estado conhecido (atualizado pelos eventos e pela leitura periodica)
+        self.axes = np.zeros(num_axes, dtype=np.float32)
+        self.buttons = np.zeros(num_buttons, dtype=np.uint8)
+        self.hats = np.zeros((num_hats, 2), dtype=np.int8)
+
+    def poll(self):
+        joystick = self.joystick
+        for i in range(len(self.axes)):
+            self.axes[i] = joystick.get_axis(i)
+        for i in range(len(self.buttons)):
+            self.buttons[i] = joystick.get_button(i)
+        for i in range(len(self.hats)):
+            self.hats[i] = joystick.get_hat(i)
+
+    def store(self, timestamp):
+        self.buffer.append(timestamp, self.axes, self.buttons, self.hats)
+
+
+# Thread que le todos os joysticks conectados na taxa configurada (rate_hz)
+class JoystickSampler(threading.Thread):
+    def __init__(self, rate_hz=1000, capacity=8192):
+        super().__init__(name="joystick-sampler", daemon=True)
+        self.rate_hz = rate_hz
+        self.capacity = capacity
+        self.devices = {}  # instance_id -> SampledDevice
+        self.devices_lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.overruns = 0  # quantas vezes a leitura atrasou mais de um periodo
+
+    def attach(self, joystick):
+        device = SampledDevice(joystick, self.capacity)
+        device.poll()
+        device.store(time.perf_counter())
+        with self.devices_lock:
+            self.devices[joystick.get_instance_id()] = device
+        return device
+
+    def detach(self, instance_id):
+        with self.devices_lock:
+            return self.devices.pop(instance_id, None)
+
+    def sync(self, joysticks):
+        # Acompanha o dicionario de joysticks do loop principal (hot-plug)
+        for instance_id, joystick in joysticks.items():
+            device = self.devices.get(instance_id)
+            if device is None or device.joystick is not joystick:
+                self.attach(joystick)
+        for instance_id in list(self.devices):
+            if instance_id not in joysticks:
+                self.detach(instance_id)
+
+    def buffer(self, instance_id):
+        device = self.devices.get(instance_id)
+        return device.buffer if device is not None else None
+
+    def ingest_event(self, event, timestamp=None):
+        # Aplica um evento de joystick ao estado conhecido e grava uma amostra
+        if event.type not in (pygame.JOYAXISMOTION, pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP, pygame.JOYHATMOTION):
+            return
+        device = self.devices.get(event.instance_id)
+        if device is None:
+            return
+        if timestamp is None:
+            timestamp = time.perf_counter()
+
+        with device.buffer.lock:
+            # O lock do buffer tambem protege o estado contra a thread de leitura
+            if event.type == pygame.JOYAXISMOTION and event.axis < len(device.axes):
+                device.axes[event.axis] = event.value
+            elif event.type == pygame.JOYBUTTONDOWN and event.button < len(device.buttons):
+                device.buttons[event.button] = 1
+            elif event.type == pygame.JOYBUTTONUP and event.button < len(device.buttons):
+                device.buttons[event.button] = 0
+            elif event.type == pygame.JOYHATMOTION and event.hat < len(device.hats):
+                device.hats[event.hat] = event.value
+        device.store(timestamp)
+
+    def views(self, joysticks):
+        # Retorna um dicionario com a ultima amostra de cada joystick, congelada
+        # para que todos os widgets do quadro vejam o mesmo estado.
+        views = {}
+        for instance_id, joystick in joysticks.items():
+            buffer = self.buffer(instance_id)
+            sample = buffer.latest() if buffer is not None else None
+            views[instance_id] = SampledJoystick(joystick, sample) if sample is not None else joystick
+        return views
+
+    def run(self):
+        period = 1.0 / self.rate_hz
+        next_time = time.perf_counter()
+        while not self.stopped.is_set():
+            with self.devices_lock:
+                devices = list(self.devices.values())
+
+            now = time.perf_counter()
+            for device in devices:
+                with device.buffer.lock:
+                    device.poll()
+                device.store(now)
+
+            # Agenda pelo prazo absoluto para nao acumular erro do sleep
+            next_time += period
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -period:
+                self.overruns += 1
+                next_time = time.perf_counter()
+
+    def stop(self):
+        self.stopped.set()
+        if self.is_alive():
+            self.join(timeout=1.0)
@@ -0,0 +1,204 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: load_generator.py
+# Descrição: Gerador de carga: injeta na fila de eventos do pygame os eventos de
+#            dezenas de joysticks sinteticos (eixos em alta taxa, rajadas de
+#            botoes e conecta/desconecta em sequencia) e mede se o handle_event
+#            do main.py acompanha.
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+#
+# Uso:
+#   python load_generator.py --devices 64 --axis-rate 1000 --button-rate 50 --hotplug-rate 2
+# -----------------------------------------------------------------------------
+import argparse
+import json
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import main
+from event_log import EventLog
+from fake_joystick import SyntheticJoystick
+
+# instance_ids dos joysticks sinteticos comecam aqui para nao colidir com os reais
+SYNTHETIC_INSTANCE_BASE = 10000
+
+
+# Cria joysticks sinteticos para cada device_index, com instance_id novo a cada
+# conexao (o SDL tambem nunca repete o instance_id)
+class SyntheticDeviceBackend:
+    def __init__(self, num_axes=6, num_buttons=12, num_hats=1):
+        self.num_axes = num_axes
+        self.num_buttons = num_buttons
+        self.num_hats = num_hats
+        self.next_instance_id = SYNTHETIC_INSTANCE_BASE
+        self.connected = {}  # device_index -> instance_id
+
+    def __call__(self, device_index):
+        joystick = SyntheticJoystick(self.next_instance_id, self.num_axes, self.num_buttons, self.num_hats)
+        self.connected[device_index] = self.next_instance_id
+        self.next_instance_id += 1
+        return joystick
+
+
+class LoadStats:
+    def __init__(self):
+        self.posted = 0
+        self.dropped = 0  # eventos recusados pela fila cheia
+        self.handled = 0
+        self.stale = 0  # eventos de joysticks que ja tinham saido do dicionario
+        self.handler_times = []  # ms dentro do handle_event
+        self.queue_latencies = []  # ms entre o post e o inicio do tratamento
+        self.by_type = {}
+
+    def percentile(self, values, fraction):
+        if not values:
+            return None
+        ordered = sorted(values)
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 4)
+
+    def report(self, elapsed):
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "posted": self.posted,
+            "dropped": self.dropped,
+            "handled": self.handled,
+            "stale": self.stale,
+            "throughput_events_s": round(self.handled / elapsed, 1) if elapsed > 0 else None,
+            "handler_p50_ms": self.percentile(self.handler_times, 0.5),
+            "handler_p99_ms": self.percentile(self.handler_times, 0.99),
+            "handler_max_ms": round(max(self.handler_times), 4) if self.handler_times else None,
+            "queue_latency_p50_ms": self.percentile(self.queue_latencies, 0.5),
+            "queue_latency_p99_ms": self.percentile(self.queue_latencies, 0.99),
+            "handled_by_type": {pygame.event.event_name(event_type): count for event_type, count in self.by_type.items()},
+        }
+
+
+def post(stats, event_type, **attributes):
+    attributes["posted_at"] = time.perf_counter()
+    try:
+        accepted = pygame.event.post(pygame.event.Event(event_type, **attributes))
+    except pygame.error:
+        accepted = False  # fila cheia
+    if accepted:
+        stats.posted += 1
+    else:
+        stats.dropped += 1
+
+
+def run_load(devices=64, duration=10.0, axis_rate=1000.0, button_rate=50.0, hotplug_rate=1.0,
+             tick_rate=1000, num_axes=6, num_buttons=12, log_dir=None, seed=1):
+    """
+    Gera a carga e trata os eventos com o handle_event do main.py.
+
+    :param devices: Numero de joysticks sinteticos.
+    :param axis_rate: Eventos de eixo por segundo, por joystick.
+    :param button_rate: Eventos de botao (aperta + solta) por segundo, por joystick.
+    :param hotplug_rate: Desconexoes/reconexoes por segundo, somando todos os joysticks.
+    :param tick_rate: Quantas vezes por segundo a fila e abastecida e esvaziada.
+    :param log_dir: Se informado, os eventos tambem vao para o log estruturado nesta pasta.
+    :return: Dicionario com o relatorio.
+    """
+    pygame.display.init()
+    random.seed(seed)
+    backend = SyntheticDeviceBackend(num_axes, num_buttons)
+    joysticks = {}
+    stats = LoadStats()
+    event_log = EventLog(log_dir) if log_dir else None
+
+    # Conecta todos os joysticks de uma vez (hub cheio plugado)
+    for device_index in range(devices):
+        post(stats, pygame.JOYDEVICEADDED, device_index=device_index)
+
+    # Acumuladores fracionarios para respeitar taxas menores que tick_rate
+    pending = {"axis": 0.0, "button": 0.0, "hotplug": 0.0}
+    period = 1.0 / tick_rate
+    start = time.perf_counter()
+    next_tick = start
+
+    while time.perf_counter() - start < duration:
+        online = list(backend.connected.items())
+        pending["axis"] += axis_rate * devices * period
+        pending["button"] += button_rate * devices * period
+        pending["hotplug"] += hotplug_rate * period
+
+        while pending["axis"] >= 1 and online:
+            pending["axis"] -= 1
+            _, instance_id = random.choice(online)
+            post(stats, pygame.JOYAXISMOTION, instance_id=instance_id, joy=instance_id,
+                 axis=random.randrange(num_axes), value=random.uniform(-1, 1))
+        while pending["button"] >= 1 and online:
+            pending["button"] -= 1
+            _, instance_id = random.choice(online)
+            button = random.randrange(num_buttons)
+            post(stats, pygame.JOYBUTTONDOWN, instance_id=instance_id, joy=instance_id, button=button)
+            post(stats, pygame.JOYBUTTONUP, instance_id=instance_id, joy=instance_id, button=button)
+        while pending["hotplug"] >= 1 and online:
+            pending["hotplug"] -= 1
+            device_index, instance_id = random.choice(online)
+            del backend.connected[device_index]
+            online.remove((device_index, instance_id))
+            post(stats, pygame.JOYDEVICEREMOVED, instance_id=instance_id, joy=instance_id)
+            # Eventos atrasados de um joystick que acabou de sair
+            post(stats, pygame.JOYBUTTONDOWN, instance_id=instance_id, joy=instance_id, button=0)
+            post(stats, pygame.JOYDEVICEADDED, device_index=device_index)
+
+        # Esvazia a fila exatamente como o loop principal
+        for event in pygame.event.get():
+            begin = time.perf_counter()
+            posted_at = getattr(event, "posted_at", None)
+            if posted_at is not None:
+                stats.queue_latencies.append((begin - posted_at) * 1000.0)
+            if event.type in (pygame.JOYAXISMOTION, pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP) and event.instance_id not in joysticks:
+                stats.stale += 1
+
+            main.handle_event(event, joysticks, backend, event_log)
+            stats.handler_times.append((time.perf_counter() - begin) * 1000.0)
+            stats.handled += 1
+            stats.by_type[event.type] = stats.by_type.get(event.type, 0) + 1
+
+        next_tick += period
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    report = stats.report(time.perf_counter() - start)
+    report["devices_connected_at_end"] = len(joysticks)
+    if event_log is not None:
+        event_log.close()
+        report["event_log_written"] = event_log.written
+        report["event_log_dropped"] = event_log.dropped
+    return report
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Gerador de carga de eventos de joystick.")
+    parser.add_argument("--devices", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--axis-rate", type=float, default=1000.0, help="eventos de eixo/s por joystick")
+    parser.add_argument("--button-rate", type=float, default=50.0, help="apertos de botao/s por joystick")
+    parser.add_argument("--hotplug-rate", type=float, default=1.0, help="reconexoes/s no total")
+    parser.add_argument("--tick-rate", type=int, default=1000)
+    parser.add_argument("--log-dir", help="grava tambem o log estruturado de eventos nesta pasta")
+    parser.add_argument("--output", help="grava o relatorio em JSON")
+    args = parser.parse_args()
+
+    report = run_load(args.devices, args.duration, args.axis_rate, args.button_rate, args.hotplug_rate,
+                      args.tick_rate, log_dir=args.log_dir)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    pygame.quit()
+    return 1 if report["dropped"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main_cli())
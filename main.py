@@ -12,9 +12,32 @@
 # Base de codigos utilizada:
 # https://www.pygame.org/docs/ref/joystick.html
 # -----------------------------------------------------------------------------
+import argparse
 import math
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
 import pygame
 
+from assets import StartupTimer, get_font, load_scaled_image
+from button_chatter import FLAG_BOUNCE, FLAG_CHATTER, FLAG_STUCK, ButtonChatterDetector
+from controller_profiles import ProfileDatabase, default_profile
+from event_log import EventLog
+from frame_pacing import PACING_FIXED, PACING_MODES, PACING_VSYNC, FramePacer
+from frame_profiler import FrameProfiler
+from haptics_sequencer import HapticsSequencer
+from joystick_sampler import JoystickSampler
+from noise_analysis import NoiseAnalyzer
+from panel_layout import TiledPanelLayout
+from report_stats import ReportStatsCollector
+from session_recorder import SessionRecorder, SessionReplay
+from stick_analytics import StickAnalyticsEngine
+from stick_heatmap import VIEW_MODES, VIEW_OFF
+from telemetry import TelemetryPublisher
+from history_store import HistoryStore
+
 # Definicao de cores - Basic colors in RGB tuples. 
 RGB_COLOR_BLACK = (0, 0, 0)  # Preto
 RGB_COLOR_WHITE = (255, 255, 255)  # Branco
@@ -31,25 +54,119 @@ RGB_COLOR_ORANGE = (255, 165, 0)  # Laranja
 RGB_COLOR_PINK = (255, 105, 180)  # Rosa
 RGB_COLOR_BROWN = (139, 69, 19)  # Marrom
 
+# Eventos gerados pelos joysticks
+JOYSTICK_EVENT_TYPES = (
+    pygame.JOYAXISMOTION, pygame.JOYBALLMOTION, pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP,
+    pygame.JOYHATMOTION, pygame.JOYDEVICEADDED, pygame.JOYDEVICEREMOVED,
+)
+
+
+# Cache LRU das superficies de texto ja renderizadas.
+# A chave e (texto, cor, fonte); quando passa de max_entries, descarta a mais antiga.
+class TextSurfaceCache:
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        key = (text, color, font)
+        surface = self.entries.get(key)
+        if surface is not None:
+            # Marca como usado recentemente
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.entries[key] = surface
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)  # remove o menos usado
+        return surface
+
+    def clear(self):
+        self.entries.clear()
+
+
+# Atlas de digitos: cada caractere numerico e renderizado uma unica vez e os
+# valores que mudam a todo quadro (ex: {axis:>6.3f}) sao montados com blits.
+class DigitAtlas:
+    CHARACTERS = "0123456789.-+ "
+
+    def __init__(self, font, color):
+        self.font = font
+        self.color = color
+        self.glyphs = {}
+        for character in self.CHARACTERS:
+            self.glyph(character)
+
+    def glyph(self, character):
+        surface = self.glyphs.get(character)
+        if surface is None:
+            # Caractere fora do atlas (ex: "nan", "e"): renderiza e guarda
+            surface = self.font.render(character, True, self.color)
+            self.glyphs[character] = surface
+        return surface
+
+    def blit_text(self, screen, text, x, y):
+        blit_list = []
+        for character in text:
+            surface = self.glyph(character)
+            blit_list.append((surface, (x, y)))
+            x += surface.get_width()
+        screen.blits(blit_list, doreturn=0)
+        return x
+
 
 # Classe TextPrint que será usada para exibir informações na tela
 class TextPrint:
-    def __init__(self):
+    def __init__(self, cache=None, numeric_atlas=True):
         self.reset()
-        self.font = pygame.font.Font(None, 24) # Configura a fonte a ser usada para exibir o texto
+        self.font = get_font(24) # Configura a fonte a ser usada para exibir o texto
         self.text_color = RGB_COLOR_WHITE # Define a cor do texto como branco
+        # Cache compartilhado das linhas de texto (evita rasterizar a mesma linha a cada quadro)
+        self.cache = cache if cache is not None else TextSurfaceCache()
+        # Se True, os campos numericos sao montados a partir do atlas de digitos
+        self.numeric_atlas = numeric_atlas
+        self.atlas = None
 
     def tprint(self, screen, text):
-        # Renderiza o texto na tela
-        text_bitmap = self.font.render(text, True, self.text_color)
-        screen.blit(text_bitmap, (self.x, self.y))
+        # Renderiza o texto na tela (usando o cache)
+        text_bitmap = self.cache.render(self.font, text, self.text_color)
+        self.mark_dirty(screen.blit(text_bitmap, (self.x, self.y)))
         self.y += self.line_height
 
+    def tprint_value(self, screen, label, value, value_format=">6.3f"):
+        # Escreve um rotulo fixo seguido de um valor numerico que muda a todo quadro.
+        # O rotulo vem do cache e apenas os digitos sao desenhados a partir do atlas.
+        if not self.numeric_atlas:
+            self.tprint(screen, f"{label}{value:{value_format}}")
+            return
+
+        if self.atlas is None or self.atlas.font is not self.font or self.atlas.color != self.text_color:
+            self.atlas = DigitAtlas(self.font, self.text_color)
+
+        label_bitmap = self.cache.render(self.font, label, self.text_color)
+        self.mark_dirty(screen.blit(label_bitmap, (self.x, self.y)))
+        end_x = self.atlas.blit_text(screen, format(value, value_format), self.x + label_bitmap.get_width(), self.y)
+        self.mark_dirty(pygame.Rect(self.x, self.y, end_x - self.x, label_bitmap.get_height()))
+        self.y += self.line_height
+
+    def mark_dirty(self, rect):
+        # Acumula a area ocupada pelo bloco de texto neste quadro
+        if self.dirty_rect is None:
+            self.dirty_rect = pygame.Rect(rect)
+        else:
+            self.dirty_rect.union_ip(rect)
+
     def reset(self):
         # Reinicia as posições x e y e a altura da linha de texto
         self.x = 10
         self.y = 10
         self.line_height = 15
+        self.dirty_rect = None  # area da tela escrita desde o ultimo reset
 
     def indent(self):
         # Aumenta o valor de x para criar uma indentação
@@ -75,12 +192,12 @@ class Checkbox:
         self.checked = False
 
     def render(self):
-        pygame.draw.rect(self.screen, self.box_color, (self.x, self.y, self.width, self.height), 2)
+        dirty_rect = pygame.draw.rect(self.screen, self.box_color, (self.x, self.y, self.width, self.height), 2)
         if self.checked:
             pygame.draw.rect(self.screen, self.check_color, (self.x + 4, self.y + 4, self.width - 8, self.height - 8))
         
         text_surface = self.font.render(self.text, True, self.font_color)
-        self.screen.blit(text_surface, (self.x + self.width + 5, self.y))
+        return dirty_rect.union(self.screen.blit(text_surface, (self.x + self.width + 5, self.y)))
 
     def toggle(self):
         self.checked = not self.checked
@@ -90,7 +207,7 @@ class Checkbox:
 
 #inicializa a checkbox 
 def initialize_checkbox(screen):
-    font = pygame.font.Font(None, 25)
+    font = get_font(25)
     checkbox = Checkbox(520, 450, 20, 20, "Inverter eixo Y", font, RGB_COLOR_BLACK, RGB_COLOR_RED, RGB_COLOR_BLACK, screen)
     return checkbox
 
@@ -100,7 +217,8 @@ def handle_checkbox_click(checkbox, event, last_click_time, click_interval):
     if event.type == pygame.MOUSEBUTTONDOWN:
         if event.button == 1:  # Botão esquerdo do mouse
             current_time = pygame.time.get_ticks()
-            if checkbox.is_mouse_over(pygame.mouse.get_pos()) and current_time - last_click_time > click_interval:
+            # Usa a posicao do clique (a do mouse agora pode ja ser outra)
+            if checkbox.is_mouse_over(event.pos) and current_time - last_click_time > click_interval:
                 checkbox.toggle()
                 last_click_time = current_time
     return last_click_time
@@ -117,23 +235,27 @@ def handle_analog_axes(joystick, text_print, screen):
     # Exibe o valor atual de cada eixo
     for i in range(axes):
         axis = joystick.get_axis(i)
-        text_print.tprint(screen, f"  Eixo {i} valor: {axis:>6.3f}")
+        text_print.tprint_value(screen, f"  Eixo {i} valor: ", axis)
     
     text_print.unindent()
 
 
 # Desenha os analogicos direcionais
-def draw_analog_stick(joystick, axis_x, axis_y, x, y, width, height, screen, invert_y=False):
-    
+def draw_analog_stick(value_x, value_y, x, y, width, height, screen, invert_y=False, overlay=None):
+    # value_x, value_y: posicao do analogico (-1.0 a 1.0), ja com o perfil aplicado (axis_value)
+    # overlay: imagem opcional (mapa de calor/rastro) desenhada dentro do plano, por baixo da bolinha
+    if overlay is not None:
+        screen.blit(overlay, (x, y))
+
     # Converte os valores analógicos para coordenadas no plano cartesiano
-    xpos = int((joystick.get_axis(axis_x) + 1) * width / 2 + x)
+    xpos = int((value_x + 1) * width / 2 + x)
     if invert_y:
-        ypos = int((-joystick.get_axis(axis_y) + 1) * height / 2 + y) # faz o eixo trabalhar invertido do controle
+        ypos = int((-value_y + 1) * height / 2 + y) # faz o eixo trabalhar invertido do controle
     else:
-        ypos = int((joystick.get_axis(axis_y) + 1) * height / 2 + y)
+        ypos = int((value_y + 1) * height / 2 + y)
 
     # Desenha o plano cartesiano como um retângulo
-    pygame.draw.rect(screen, RGB_COLOR_BLACK, (x, y, width, height), 2)
+    dirty_rect = pygame.draw.rect(screen, RGB_COLOR_BLACK, (x, y, width, height), 2)
 
     # Desenha uma linha do centro do plano até a posição da bolinha
     center_x = x + width // 2
@@ -142,7 +264,48 @@ def draw_analog_stick(joystick, axis_x, axis_y, x, y, width, height, screen, inv
     pygame.draw.line(screen, RGB_COLOR_YELLOW, (center_x, center_y), (xpos, ypos), border_line)
 
     # Desenha a bolinha na posição atual
-    pygame.draw.circle(screen, RGB_COLOR_RED, (xpos, ypos), 10)
+    # Retorna a area alterada (a bolinha pode passar um pouco da borda do plano)
+    return dirty_rect.union(pygame.draw.circle(screen, RGB_COLOR_RED, (xpos, ypos), 10))
+
+
+# Escreve as metricas de qualidade de um analogico logo abaixo do plano dele.
+# Usa o text_print sem mexer na posicao do bloco de texto principal.
+def draw_stick_analytics(stick, x, y, text_print, screen):
+    saved = (text_print.x, text_print.y, text_print.dirty_rect)
+    text_print.x, text_print.y, text_print.dirty_rect = x, y, None
+
+    text_print.tprint_value(screen, "Drift: ", stick.drift(), ">5.3f")
+    text_print.tprint_value(screen, "Circ. (%): ", stick.circularity_error() * 100, ">5.1f")
+    text_print.tprint_value(screen, "Zona ext. (%): ", stick.outer_deadzone() * 100, ">5.1f")
+
+    dirty_rect = text_print.dirty_rect
+    text_print.x, text_print.y, text_print.dirty_rect = saved
+    return dirty_rect
+
+
+# Nota do ruido de alta frequencia de cada eixo (noise_analysis), tres eixos por linha
+def draw_noise_grades(results, x, y, text_print, screen):
+    saved = (text_print.x, text_print.y, text_print.dirty_rect)
+    text_print.x, text_print.y, text_print.dirty_rect = x, y, None
+
+    if not results:
+        text_print.tprint(screen, "Ruído dos eixos: analisando...")
+    else:
+        text_print.tprint(screen, "Ruído dos eixos (nota, freq. dominante):")
+        if results[0]["grade"] is None:
+            # Estado atualizado devagar demais para enxergar a faixa de ruido
+            text_print.tprint(screen, f"   {results[0]['kind']} ({results[0]['update_rate']:.0f} atualizações/s)")
+            results = []
+        for start in range(0, len(results), 3):
+            # So mostra a frequencia quando ha ruido acima do corte
+            text_print.tprint(screen, "   ".join(
+                f"E{result['axis']}: {result['grade']}" + (f" {result['dominant_hz']:>3.0f} Hz" if result["rms"] > 0 else "")
+                for result in results[start:start + 3]
+            ))
+
+    dirty_rect = text_print.dirty_rect
+    text_print.x, text_print.y, text_print.dirty_rect = saved
+    return dirty_rect
 
 
 def draw_gradient_arc(screen, start_angle, end_angle, x, y, radius, color1, color2, steps):
@@ -174,18 +337,59 @@ def draw_gradient_arc(screen, start_angle, end_angle, x, y, radius, color1, colo
         pygame.draw.arc(screen, color, (x, y, 2 * radius, 2 * radius), math.radians(angle1), math.radians(angle2), border_thickness)
 
 
-def draw_trigger_velocity(trigger_value, x, y, screen, invert_y=False):
-    radius = 50  # Raio do velocímetro
+# Cache dos sprites dos velocímetros, indexado por (raio, invertido, cor1, cor2).
+# O arco em gradiente nunca muda, entao ele e gerado uma unica vez.
+GAUGE_SPRITE_CACHE = {}
+GAUGE_BORDER_THICKNESS = 14
+
+
+def build_gauge_sprite(radius, invert_y, color1, color2, border_thickness=GAUGE_BORDER_THICKNESS):
+    # Gera o arco em gradiente do velocímetro de uma vez so com NumPy, pixel a pixel,
+    # em vez de 50 chamadas de pygame.draw.arc.
+    size = 2 * radius
+    sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+
+    # Coordenadas do centro de cada pixel em relacao ao centro do arco.
+    # O surfarray indexa [x, y], por isso o indexing="ij".
+    offsets = np.arange(size) + 0.5 - radius
+    dx, dy = np.meshgrid(offsets, offsets, indexing="ij")
+    distance = np.hypot(dx, dy)
+
+    # Mesmo sentido de angulo do pygame.draw.arc: 0 a direita, anti-horario, y para cima
+    angle = np.degrees(np.arctan2(-dy, dx)) % 360
+    start_angle, end_angle = (180, 360) if invert_y else (0, 180)
+
+    ring = (distance <= radius) & (distance >= radius - border_thickness)
+    ring &= (angle >= start_angle) & (angle <= end_angle)
+
+    # Interpolação linear das cores ao longo do arco
+    t = ((angle - start_angle) / (end_angle - start_angle)).clip(0, 1)[..., np.newaxis]
+    rgb = np.asarray(color1, dtype=np.float32) + t * (np.asarray(color2, dtype=np.float32) - np.asarray(color1, dtype=np.float32))
+
+    pixels = pygame.surfarray.pixels3d(sprite)
+    pixels[...] = rgb.astype(np.uint8)
+    del pixels  # libera o lock da superficie
+    alpha = pygame.surfarray.pixels_alpha(sprite)
+    alpha[...] = ring.astype(np.uint8) * 255
+    del alpha
+
+    return sprite
+
+
+def get_gauge_sprite(radius, invert_y, color1=RGB_COLOR_GREEN, color2=RGB_COLOR_RED):
+    key = (radius, invert_y, color1, color2)
+    sprite = GAUGE_SPRITE_CACHE.get(key)
+    if sprite is None:
+        sprite = build_gauge_sprite(radius, invert_y, color1, color2)
+        GAUGE_SPRITE_CACHE[key] = sprite
+    return sprite
+
+
+def trigger_needle_end(trigger_value, x, y, radius, invert_y=False):
     # Ângulo da seta, baseado no valor do gatilho (-1 a 1, mapeado para 180 a 360 graus)
     if invert_y:
-
         angle = 180 * (1 - (trigger_value + 1) / 2)
-        
-        # Desenha o gradiente de cores ao redor do arco base do velocímetro
-        angle_start = 180
-        angle_end = 360
-        draw_gradient_arc(screen, 180, 360, x, y, radius, RGB_COLOR_GREEN, RGB_COLOR_RED, 50)
-        
+
         # Calcula as coordenadas da ponta da seta usando trigonometria
         end_x = x + radius + radius * math.cos(math.radians(angle))
         end_y = y + radius + radius * math.sin(math.radians(angle))
@@ -203,42 +407,81 @@ def draw_trigger_velocity(trigger_value, x, y, screen, invert_y=False):
         # 4)    180 - 180 * (trigger_value + 1) / 2: Por fim, subtraímos o ângulo obtido no passo anterior de 180. 
         #       Isso inverte a direção do arco, fazendo com que ele vá de 180 graus quando o gatilho está em -1 (não pressionado) a 0 graus quando o gatilho está em 1 (totalmente pressionado).
         angle = 180 - 180 * (trigger_value + 1) / 2
-        
-        # Desenha o gradiente de cores ao redor do arco base do velocímetro
-        angle_start = 180
-        angle_end = 360
-        draw_gradient_arc(screen, 0, 180, x, y, radius, RGB_COLOR_GREEN, RGB_COLOR_RED, 50)
         end_x = x + radius + radius * math.cos(math.radians(angle))
         end_y = y + radius - radius * math.sin(math.radians(angle))
+    return end_x, end_y
+
 
-    # Desenha a seta do velocímetro
-    pygame.draw.line(screen, (0, 0, 255), (x + radius, y + radius), (end_x, end_y), 2)
+def draw_trigger_velocity(trigger_value, x, y, screen, invert_y=False):
+    radius = 50  # Raio do velocímetro
 
+    # Desenha o arco em gradiente ja pronto (sprite em cache)
+    screen.blit(get_gauge_sprite(radius, invert_y), (x, y))
+
+    # Desenha a seta do velocímetro e retorna a area alterada
+    end_x, end_y = trigger_needle_end(trigger_value, x, y, radius, invert_y)
+    needle_rect = pygame.draw.line(screen, (0, 0, 255), (x + radius, y + radius), (end_x, end_y), 2)
+    return needle_rect.union((x, y, 2 * radius, 2 * radius))
+
+
+def draw_trigger_gauges(screen, gauges, invert_y=False, radius=50):
+    # Desenha N velocímetros de uma vez: todos os arcos em um unico screen.blits
+    # e depois as setas por cima.
+    # - gauges: lista de (valor_do_gatilho, x, y)
+    sprite = get_gauge_sprite(radius, invert_y)
+    screen.blits([(sprite, (x, y)) for _, x, y in gauges], doreturn=0)
+
+    dirty_rects = []
+    for trigger_value, x, y in gauges:
+        end_x, end_y = trigger_needle_end(trigger_value, x, y, radius, invert_y)
+        needle_rect = pygame.draw.line(screen, (0, 0, 255), (x + radius, y + radius), (end_x, end_y), 2)
+        dirty_rects.append(needle_rect.union((x, y, 2 * radius, 2 * radius)))
+    return dirty_rects
+
+
+# Lados ("left"/"right") dos analogicos que o perfil mapeia e que o joystick realmente tem
+def profile_sticks(joystick, profile):
+    num_axes = joystick.get_numaxes()
+    return [side for side in ("left", "right")
+            if profile.stick(side) is not None and max(profile.stick(side)) < num_axes]
 
-def handle_triggers(joystick, text_print, screen, invert_y=False):
-    # Verifique se o joystick tem pelo menos 6 eixos analógicos
-    if joystick.get_numaxes() < 6:
-        # Se o joystick não tiver pelo menos 6 eixos, ele provavelmente não tem gatilhos analógicos
-        text_print.tprint(screen, f"Este joystick não possui gatilhos analógicos.")
-        return
 
-    trigger_left = joystick.get_axis(4)
-    trigger_right = joystick.get_axis(5)
+# Entradas (eixo, metade, invertido) de X e Y dos mesmos analogicos, para o StickAnalyticsEngine
+def profile_stick_axes(joystick, profile):
+    return [profile.stick_axes(side) for side in profile_sticks(joystick, profile)]
+
+
+# Posicao (X, Y) de um analogico lida pelo perfil (inversao "~" e meio eixo aplicados)
+def stick_position(joystick, profile, side):
+    return profile.axis_value(joystick, side + "x"), profile.axis_value(joystick, side + "y")
+
+
+def handle_triggers(joystick, text_print, screen, invert_y=False, profile=None):
+    # Os eixos dos gatilhos vem do perfil do controle; sem perfil, o layout
+    # padrao (eixos 4 e 5, so em joysticks com pelo menos 6 eixos)
+    profile = profile or default_profile(joystick)
+    trigger_left = profile.axis_value(joystick, "lefttrigger")
+    trigger_right = profile.axis_value(joystick, "righttrigger")
+    if trigger_left is None or trigger_right is None:
+        text_print.tprint(screen, f"Este joystick não possui gatilhos analógicos.")
+        return []
 
     text_print.tprint(screen, f"")
     text_print.tprint(screen, f"Gatilhos:")
     # Exibe os valores dos gatilhos na tela
-    text_print.tprint(screen, f"  Esquerdo: {trigger_left:>6.3f}")
-    text_print.tprint(screen, f"  Direito......: {trigger_right:>6.3f}")
+    text_print.tprint_value(screen, "  Esquerdo: ", trigger_left)
+    text_print.tprint_value(screen, "  Direito......: ", trigger_right)
 
     trigger_x = 550  # Coordenada X dos velocímetros na tela
     trigger_y = 300  # Coordenada Y dos velocímetros na tela
 
-    # Desenha o velocímetro para o gatilho esquerdo
-    draw_trigger_velocity(trigger_left, trigger_x, trigger_y, screen, invert_y)
-
-    # Desenha o velocímetro para o gatilho direito, deslocado horizontalmente em 250 unidades
-    draw_trigger_velocity(trigger_right, trigger_x + 250, trigger_y, screen, invert_y)
+    # Desenha os velocímetros dos gatilhos esquerdo e direito (o direito deslocado
+    # horizontalmente em 250 unidades)
+    gauges = [
+        (trigger_left, trigger_x, trigger_y),
+        (trigger_right, trigger_x + 250, trigger_y),
+    ]
+    return draw_trigger_gauges(screen, gauges, invert_y)
 
 
 # trata os botoes
@@ -255,22 +498,47 @@ def handle_buttons(joystick, text_print, screen):
         text_print.tprint(screen, f"    Botão {i:>2} valor: {button}")
     text_print.unindent()
 
-def draw_checkboxes(joystick, x, y, width, height, screen):
+# Cor da borda e letra mostrada embaixo da checkbox de um botao com problema
+# (button_chatter), do mais grave para o menos grave
+BUTTON_FLAG_STYLES = [
+    (FLAG_STUCK, RGB_COLOR_ORANGE, "P"),  # preso
+    (FLAG_CHATTER, RGB_COLOR_RED, "T"),  # trepidacao
+    (FLAG_BOUNCE, RGB_COLOR_YELLOW, "R"),  # repique
+]
+
+def draw_checkboxes(joystick, x, y, width, height, screen, flags=None):
     # Obtém o número de botões do joystick
     buttons = joystick.get_numbuttons()
 
     # Desenha as checkboxes e atualiza o estado de acordo com o valor do botão
+    # Retorna a area ocupada pela fileira inteira de checkboxes
+    # flags: FLAG_* do button_chatter para cada botao (ou None)
+    dirty_rect = pygame.Rect(x, y, 0, 0)
     for i in range(buttons):
         button_value = joystick.get_button(i)
-        draw_checkbox(button_value, x + i * 30, y, width, height, screen)
+        flag = int(flags[i]) if flags is not None and i < len(flags) else 0
+        dirty_rect.union_ip(draw_checkbox(button_value, x + i * 30, y, width, height, screen, flag))
+    return dirty_rect
+
+def draw_checkbox(button_value, x, y, width, height, screen, flag=0):
+    # Botao com problema: borda colorida e a letra do problema embaixo
+    color = (0, 0, 0)
+    label = None
+    for style_flag, style_color, style_label in BUTTON_FLAG_STYLES:
+        if flag & style_flag:
+            color, label = style_color, style_label
+            break
 
-def draw_checkbox(button_value, x, y, width, height, screen):
     # Desenha o retângulo da checkbox
-    pygame.draw.rect(screen, (0, 0, 0), (x, y, width, height), 2)
+    dirty_rect = pygame.draw.rect(screen, color, (x, y, width, height), 2)
 
     # Se o botão estiver pressionado, desenha um retângulo preenchido dentro da checkbox
     if button_value:
         pygame.draw.rect(screen, (0, 0, 0), (x + 4, y + 4, width - 8, height - 8))
+    if label is not None:
+        text = get_font(16).render(label, True, color)
+        dirty_rect.union_ip(screen.blit(text, text.get_rect(midtop=(x + width // 2, y + height + 1))))
+    return dirty_rect
 
 
 
@@ -288,21 +556,47 @@ def handle_digitalDirectionals(joystick, text_print, screen):
         text_print.tprint(screen, f"Direcional {i} valor: {str(directional)}")
     text_print.unindent()
 
+# Exibe a taxa de relatorios e o jitter medidos para o joystick
+def handle_report_stats(stats, text_print, screen):
+    text_print.tprint(screen, f"")
+    if stats is None or stats.reports < 2:
+        text_print.tprint(screen, f"Taxa de relatórios: aguardando eventos...")
+        return
+
+    text_print.tprint_value(screen, "Taxa de relatórios (Hz): ", stats.report_rate(), ">7.1f")
+    text_print.indent()
+    if stats.timing_resolved():
+        text_print.tprint_value(screen, "Intervalo p50 (ms): ", stats.interval_p50.value(), ">6.2f")
+        text_print.tprint_value(screen, "Intervalo p99 (ms): ", stats.interval_p99.value(), ">6.2f")
+        text_print.tprint_value(screen, "Jitter p50 (ms): ", stats.jitter_p50.value(), ">6.2f")
+        text_print.tprint_value(screen, "Jitter p99 (ms): ", stats.jitter_p99.value(), ">6.2f")
+    else:
+        # O relogio dos eventos nao separa relatorios seguidos: intervalo e jitter seriam falsos
+        text_print.tprint(screen, f"Intervalo/jitter: resolução do relógio insuficiente")
+    text_print.tprint(screen, f"Duplicados: {stats.duplicated}  Perdidos: {stats.total_dropped()}")
+    text_print.unindent()
+
 # trata a inicializacao da pygame e retorna a tela
-def init_pygame():
-    pygame.init() # Inicializa a biblioteca Pygame
+def init_pygame(vsync=False):
+    # Inicializa so o que o programa usa (video, joystick e fontes); o pygame.init()
+    # tambem ligaria o audio, que so atrasa a abertura da janela
+    pygame.display.init()
+    pygame.joystick.init()
+    pygame.font.init()
+    pygame.time.wait(0)  # inicializa o timer do SDL usado por pygame.time.get_ticks
     size = (1100, 700)  # Aumente a largura da tela para acomodar a caixa de texto
     # Configura o tamanho da tela (largura, altura) e o nome da janela
-    screen = pygame.display.set_mode(size)
+    # (o vsync do pygame so funciona com o renderizador do SDL, ligado pelo SCALED;
+    # se o driver nao suportar, o set_mode gera pygame.error)
+    screen = pygame.display.set_mode(size, pygame.SCALED, vsync=1) if vsync else pygame.display.set_mode(size)
     pygame.display.set_caption("Teste de Joystick - AthenasArch")
     return screen
 
-# carrega e dimensiona a logo
+# carrega e dimensiona a logo (vem do cache em disco, ja no tamanho final)
 def load_resources():
-    logo = pygame.image.load("logo.png")
     logo_width = 400
     logo_height = 100
-    logo = pygame.transform.scale(logo, (logo_width, logo_height))
+    logo = load_scaled_image("logo.png", (logo_width, logo_height))
 
     return {"logo": logo}
 
@@ -340,48 +634,116 @@ def draw_ui(screen, logo):
      # (x, y, largura, altura). Neste caso, x=300, y=10, largura=480 e altura=480.
     pygame.draw.rect(screen, cor_de_fundo, ((rect_x + border_thickness), (rect_y + border_thickness), (rect_width - (border_thickness*2)), (rect_height - (border_thickness*2))), 0)
 
+# Camada estatica do modo com varios controles: fundo cinza e a logo
+def build_tiled_static_layer(screen, logo):
+    static_layer = pygame.Surface(screen.get_size()).convert()
+    static_layer.fill(RGB_COLOR_DARK_GRAY)
+    static_layer.blit(logo, (350, 600))
+    return static_layer
+
+
+# Monta a camada estatica (fundo, logo e moldura do painel) uma unica vez.
+# Ela e reaproveitada a cada quadro em vez de preencher e redesenhar a tela toda.
+def build_static_layer(screen, logo):
+    static_layer = pygame.Surface(screen.get_size()).convert()
+    draw_ui(static_layer, logo)
+    return static_layer
+
+
+# Modo de renderizacao retido: a cada quadro restaura o fundo apenas onde algo foi
+# desenhado no quadro anterior e envia para a tela so os retangulos alterados.
+class RetainedRenderer:
+    def __init__(self, screen, static_layer):
+        self.screen = screen
+        self.static_layer = static_layer
+        self.previous_rects = []
+        self.full_redraw = True  # o primeiro quadro precisa ir inteiro para a tela
+
+    def invalidate(self):
+        # Forca um quadro completo (ex: quando a camada estatica muda)
+        self.full_redraw = True
+
+    def begin_frame(self):
+        if self.full_redraw:
+            self.screen.blit(self.static_layer, (0, 0))
+        else:
+            # Apaga o que foi desenhado no quadro anterior
+            for rect in self.previous_rects:
+                self.screen.blit(self.static_layer, rect, rect)
+
+    def present(self, dirty_rects, opaque_rects=()):
+        # opaque_rects: areas totalmente cobertas (ex: paineis em cache) que nao
+        # precisam ser apagadas no proximo quadro
+        dirty_rects = [pygame.Rect(rect) for rect in dirty_rects if rect]
+        if self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            # Atualiza a area nova e tambem a antiga (que acabou de ser apagada)
+            pygame.display.update(self.previous_rects + dirty_rects + list(opaque_rects))
+        self.previous_rects = dirty_rects
+
+
 # Processamento de eventos
 # Eventos possíveis do joystick: JOYAXISMOTION, JOYBALLMOTION, JOYBUTTONDOWN,
 # JOYBUTTONUP, JOYHATMOTION, JOYDEVICEADDED, JOYDEVICEREMOVED
-def handle_event(event, joysticks):
+def handle_event(event, joysticks, joystick_factory=pygame.joystick.Joystick, event_log=None, profiles=None):
     """
     Processa os eventos do pygame e atualiza a lista de joysticks conectados.
 
     :param event: Evento do Pygame a ser processado.
     :param joysticks: Dicionário contendo os joysticks conectados.
+    :param joystick_factory: Cria o joystick a partir do device_index do evento
+        JOYDEVICEADDED (o gerador de carga usa joysticks sinteticos).
+    :param event_log: EventLog que recebe os registros (botoes, vibracao, conexoes).
+        Apenas enfileira: a gravacao em disco e feita por outra thread.
+    :param profiles: ProfileDatabase usado para saber qual botao e o "A" de cada
+        controle (sem ele, o botao 0).
     :return: Retorna True se o evento QUIT foi detectado, caso contrário, retorna False.
     """
     quit_detected = False
+    log = event_log.log if event_log is not None else (lambda kind, instance_id=None, guid=None, **payload: None)
 
     if event.type == pygame.QUIT:
         quit_detected = True  # Marca o fim do programa
 
     if event.type == pygame.JOYBUTTONDOWN:
-        print("Botão do joystick pressionado.")
-        # Verifica se o botão 0 foi pressionado
-        if event.button == 0:
+        # (na reproducao o joystick pode ja ter sido removido no mesmo lote de eventos)
+        joystick = joysticks.get(event.instance_id)
+        guid = joystick.get_guid() if joystick is not None else None
+        log("button_down", event.instance_id, guid, button=event.button)
+        # Verifica se o botão "A" do perfil (padrão: botão 0) foi pressionado
+        rumble_button = 0
+        if profiles is not None and joystick is not None:
+            rumble_button = profiles.profile_for(joystick).rumble_button()
+        if event.button == rumble_button:
             # Verifica se o efeito de vibração pode ser reproduzido
-            joystick = joysticks[event.instance_id]
-            if joystick.rumble(0, 0.7, 500):
-                print(f"Efeito de vibração reproduzido no joystick {event.instance_id}")
+            if joystick is not None and joystick.rumble(0, 0.7, 500):
+                log("rumble", event.instance_id, guid, low_frequency=0, high_frequency=0.7, duration_ms=500)
 
     if event.type == pygame.JOYBUTTONUP:
-        print("Botão do joystick solto.")
+        joystick = joysticks.get(event.instance_id)
+        log("button_up", event.instance_id, joystick.get_guid() if joystick is not None else None, button=event.button)
     # Adiciona o novo joystick à lista de joysticks conectados
     if event.type == pygame.JOYDEVICEADDED:
-        joy = pygame.joystick.Joystick(event.device_index)
+        joy = joystick_factory(event.device_index)
         joysticks[joy.get_instance_id()] = joy
-        print(f"Joystick {joy.get_instance_id()} conectado")
+        log("device_added", joy.get_instance_id(), joy.get_guid(), name=joy.get_name(), device_index=event.device_index)
 
     # Remove o joystick desconectado da lista de joysticks conectados
+    # (ignora instance_id que ja nao esta na lista, ex: remocao repetida)
     if event.type == pygame.JOYDEVICEREMOVED:
-        del joysticks[event.instance_id]
-        print(f"Joystick {event.instance_id} desconectado")
+        joy = joysticks.pop(event.instance_id, None)
+        if joy is not None:
+            log("device_removed", event.instance_id, joy.get_guid())
 
     return quit_detected
 
-def display_joystick_info(screen, text_print, joysticks, checkbox):
-    
+def display_joystick_info(screen, text_print, joysticks, checkbox, report_stats=None, stick_analytics=None, stick_view_mode=VIEW_OFF, profiler=None, noise_analyzer=None, button_chatter=None, profiles=None):
+    # Retorna a lista de retangulos alterados neste quadro (usada pelo modo retido)
+    dirty_rects = []
+    # Marca o tempo de cada widget no perfil do quadro (se houver)
+    lap = profiler.lap if profiler is not None else (lambda stage: None)
     # Conta o número de joysticks conectados
     joystick_count = pygame.joystick.get_count()
 
@@ -392,6 +754,8 @@ def display_joystick_info(screen, text_print, joysticks, checkbox):
     # Para cada joystick:
     for joystick in joysticks.values():
         jid = joystick.get_instance_id()
+        # Perfil do controle (quais eixos sao analogicos e gatilhos)
+        profile = profiles.profile_for(joystick) if profiles is not None else default_profile(joystick)
 
         # text_print.tprint(screen, f"")
         # Exibe o identificador do joystick
@@ -399,7 +763,7 @@ def display_joystick_info(screen, text_print, joysticks, checkbox):
         text_print.indent()
     
         # Obtém o nome do joystick
-        text_print.tprint(screen, f"")
+        text_print.tprint(screen, f"Perfil: {profile.name}")
         name = joystick.get_name()
         text_print.tprint(screen, f"Nome do joystick: ")
         text_print.tprint(screen, f"- {name}")
@@ -412,34 +776,54 @@ def display_joystick_info(screen, text_print, joysticks, checkbox):
         # Obtém o nível de energia do joystick
         power_level = joystick.get_power_level()
         text_print.tprint(screen, f"Nível de energia do joystick: {power_level}")
+        lap("widget:texto")
 
         # Desenha as checkboxes na posição (50, 300) com tamanho 20x20
         checkboxes_x = 510
         checkboxes_y = 250
-        draw_checkboxes(joystick, checkboxes_x, checkboxes_y, 20, 20, screen)
+        button_flags = button_chatter.flags(jid, time.perf_counter()) if button_chatter is not None else None
+        dirty_rects.append(draw_checkboxes(joystick, checkboxes_x, checkboxes_y, 20, 20, screen, button_flags))
+        lap("widget:checkboxes")
 
         # trata os gatilhos do controle
-        handle_triggers(joystick, text_print, screen, invert_y=checkbox.checked)
+        dirty_rects.extend(handle_triggers(joystick, text_print, screen, invert_y=checkbox.checked, profile=profile))
+        lap("widget:gatilhos")
 
         # vamos desenhar aqui, em algum ponto da tela a parte do plano cartesiano que recebe as informacoes 
         # dos eixos dos controles.
-        # draw_analog_stick(joystick, eixo_x, eixo_y, x, y, largura, altura, tela)
+        # draw_analog_stick(valor_x, valor_y, x, y, largura, altura, tela)
 
         # Renderize a checkbox e desenhe o joystick com o valor invertido
-        checkbox.render()
+        dirty_rects.append(checkbox.render())
         
         analog_stick_x = 550 
         analog_stick_y = 50
-        num_axes = joystick.get_numaxes()
 
-        # Verifica primeiro se o Joystick utiliza gatilhos e eixos analogicos antes de tentar desenhar
-        if num_axes > 1:
-            draw_analog_stick(joystick, 0, 1, analog_stick_x + 000 , analog_stick_y, 140, 140, screen, invert_y=checkbox.checked)  # Analógico esquerdo
-        if num_axes > 3:
-            draw_analog_stick(joystick, 2, 3, analog_stick_x + 250 , analog_stick_y, 140, 140, screen, invert_y=checkbox.checked)  # Analógico direito
+        # Mapa de calor/rastro de cada analogico (tecla H alterna o modo)
+        overlays = [None, None]
+        if stick_analytics is not None and stick_view_mode != VIEW_OFF:
+            for i, stick in enumerate(stick_analytics.sticks(jid)):
+                if stick.heatmap is not None:
+                    overlays[i] = stick.heatmap.render(stick_view_mode, checkbox.checked)
+
+        # Desenha so os analogicos que o perfil mapeia (esquerdo em x, direito em x + 250)
+        for i, side in enumerate(profile_sticks(joystick, profile)):
+            value_x, value_y = stick_position(joystick, profile, side)
+            dirty_rects.append(draw_analog_stick(value_x, value_y, analog_stick_x + i * 250, analog_stick_y, 140, 140, screen, invert_y=checkbox.checked, overlay=overlays[i]))
+
+        # Metricas de drift/circularidade abaixo de cada analogico
+        if stick_analytics is not None:
+            for i, stick in enumerate(stick_analytics.sticks(jid)):
+                dirty_rects.append(draw_stick_analytics(stick, analog_stick_x - 40 + i * 250, analog_stick_y + 146, text_print, screen))
+        lap("widget:analogicos")
 
-        # draw_analog_stick(joystick, 0, 1, analog_stick_x + 000 , analog_stick_y, 140, 140, screen, invert_y=checkbox.checked)  # Analógico esquerdo
-        # draw_analog_stick(joystick, 2, 3, analog_stick_x + 250 , analog_stick_y, 140, 140, screen, invert_y=checkbox.checked)  # Analógico direito
+        # Nota do ruido de cada eixo, abaixo dos gatilhos
+        if noise_analyzer is not None:
+            dirty_rects.append(draw_noise_grades(noise_analyzer.axis_results(jid), analog_stick_x, 365, text_print, screen))
+            lap("widget:ruido")
+
+        # draw_analog_stick(*stick_position(joystick, profile, "left"), analog_stick_x + 000 , analog_stick_y, 140, 140, screen, invert_y=checkbox.checked)  # Analógico esquerdo
+        # draw_analog_stick(*stick_position(joystick, profile, "right"), analog_stick_x + 250 , analog_stick_y, 140, 140, screen, invert_y=checkbox.checked)  # Analógico direito
 
         # *******************************************
         # *******************************************
@@ -447,19 +831,191 @@ def display_joystick_info(screen, text_print, joysticks, checkbox):
         handle_analog_axes(joystick, text_print, screen)
         handle_buttons(joystick, text_print, screen)
         handle_digitalDirectionals(joystick, text_print, screen)
+        if report_stats is not None:
+            handle_report_stats(report_stats.get(jid), text_print, screen)
+        lap("widget:texto")
 
         text_print.unindent()
 
-def main():
+    # O bloco de texto inteiro entra como um unico retangulo
+    if text_print.dirty_rect is not None:
+        dirty_rects.append(text_print.dirty_rect)
+    return dirty_rects
+
+# Tamanho original do painel de um controle no modo com varios controles
+PANEL_SIZE = (520, 300)
+# Regiao da tela reservada para a grade de paineis (acima da logo)
+PANEL_AREA = (10, 10, 1080, 580)
+
+
+# Desenha o painel compacto de um controle (usado na grade com varios controles)
+def render_joystick_panel(surface, joystick, text_print, invert_y=False, stats=None, button_flags=None, profile=None):
+    width, height = surface.get_size()
+    surface.fill(RGB_COLOR_DARK_GRAY)
+    pygame.draw.rect(surface, RGB_COLOR_BLUE, (0, 0, width, height), 4)
+
+    text_print.reset()
+    text_print.x = 12
+    text_print.y = 10
+    text_print.tprint(surface, f"Joystick {joystick.get_instance_id()}: {joystick.get_name()}")
+    text_print.tprint(surface, f"GUID: {joystick.get_guid()}")
+
+    # Analogicos, gatilhos e botoes nas mesmas funcoes do painel principal
+    profile = profile or default_profile(joystick)
+    num_axes = joystick.get_numaxes()
+    for i, side in enumerate(profile_sticks(joystick, profile)):
+        value_x, value_y = stick_position(joystick, profile, side)
+        draw_analog_stick(value_x, value_y, 12 + i * 122, 50, 110, 110, surface, invert_y=invert_y)
+    trigger_left = profile.axis_value(joystick, "lefttrigger")
+    trigger_right = profile.axis_value(joystick, "righttrigger")
+    if trigger_left is not None and trigger_right is not None:
+        draw_trigger_gauges(surface, [(trigger_left, 275, 55), (trigger_right, 400, 55)], invert_y)
+    draw_checkboxes(joystick, 12, 176, 20, 20, surface, button_flags)
+
+    # Valores dos eixos em tres colunas
+    for i in range(num_axes):
+        text_print.x = 12 + (i % 3) * 170
+        text_print.y = 206 + (i // 3) * 15
+        text_print.tprint_value(surface, f"Eixo {i}: ", joystick.get_axis(i))
+
+    text_print.x = 12
+    text_print.y = 206 + math.ceil(num_axes / 3) * 15
+    hats = "  ".join(str(joystick.get_hat(i)) for i in range(joystick.get_numhats()))
+    text_print.tprint(surface, f"Direcionais: {hats}")
+    text_print.tprint(surface, f"Energia: {joystick.get_power_level()}")
+    if stats is not None and stats.reports > 1:
+        text_print.tprint_value(surface, "Taxa de relatórios (Hz): ", stats.report_rate(), ">7.1f")
+
+
+# Resumo do estado do controle: o painel so e redesenhado quando isto muda
+def joystick_state_key(joystick, invert_y=False, stats=None, button_flags=None):
+    return (
+        tuple(round(joystick.get_axis(i), 3) for i in range(joystick.get_numaxes())),
+        tuple(joystick.get_button(i) for i in range(joystick.get_numbuttons())),
+        tuple(tuple(joystick.get_hat(i)) for i in range(joystick.get_numhats())),
+        invert_y,
+        round(stats.report_rate()) if stats is not None else None,
+        button_flags.tobytes() if button_flags is not None else None,
+    )
+
+
+# Modo com varios controles: um painel por controle em uma grade
+def display_joystick_panels(screen, layout, text_print, joysticks, checkbox, report_stats=None, force=False, button_chatter=None, profiles=None):
+    invert_y = checkbox.checked
+    now = time.perf_counter()
+
+    def stats_for(joystick):
+        return report_stats.get(joystick.get_instance_id()) if report_stats is not None else None
+
+    def flags_for(joystick):
+        return button_chatter.flags(joystick.get_instance_id(), now) if button_chatter is not None else None
+
+    def profile_for(joystick):
+        return profiles.profile_for(joystick) if profiles is not None else None
+
+    panel_rects = layout.render(
+        screen,
+        joysticks,
+        lambda surface, joystick: render_joystick_panel(surface, joystick, text_print, invert_y, stats_for(joystick), flags_for(joystick), profile_for(joystick)),
+        lambda joystick: joystick_state_key(joystick, invert_y, stats_for(joystick), flags_for(joystick)),
+        force,
+    )
+    return panel_rects, [checkbox.render()]
+
+
+# Caminho de um relatorio exportado (tecla E, teste de vibracao), na pasta dos logs
+def report_path(log_dir, file_name):
+    os.makedirs(log_dir, exist_ok=True)
+    return os.path.join(log_dir, file_name)
+
+
+# Medicoes de um controle gravadas no historico (history_store) quando ele sai ou o programa fecha
+def device_measurements(instance_id, report_stats, stick_analytics, noise_analyzer, button_chatter, haptics):
+    """
+    :return: Lista de (metrica, canal, valor); canal e o analogico/eixo, ou None.
+    """
+    measurements = []
+    for i, stick in enumerate(stick_analytics.sticks(instance_id)):
+        if stick.x.count:
+            summary = stick.summary()
+            for metric in ("drift", "rest_noise", "coverage", "circularity_error", "outer_deadzone"):
+                measurements.append((metric, i, summary[metric]))
+    stats = report_stats.get(instance_id)
+    if stats is not None and stats.reports > 1:
+        summary = stats.summary()
+        for metric in ("report_rate_hz", "interval_p99_ms", "jitter_p99_ms", "dropped"):
+            if summary[metric] is not None:
+                measurements.append((metric, None, summary[metric]))
+    for result in noise_analyzer.axis_results(instance_id):
+        if result["rms"] is not None:
+            measurements.append(("noise_rms", result["axis"], result["rms"]))
+    timeline = button_chatter.get(instance_id)
+    if timeline is not None and timeline.transitions.any():
+        measurements.append(("bounces", None, int(timeline.bounces.sum())))
+        measurements.append(("chatter_bursts", None, int(timeline.chatter_bursts.sum())))
+        measurements.append(("buttons_flagged", None, len(timeline.summary(time.perf_counter())["flagged_buttons"])))
+    result = haptics.results.get(instance_id)
+    if result is not None and (result.accepted or result.rejected):
+        summary = result.summary()
+        measurements.append(("rumble_passed", None, int(summary["passed"])))
+        measurements.append(("rumble_command_max_ms", None, summary["command_max_ms"]))
+    return measurements
+
+
+# Etapas do quadro medidas pelo FrameProfiler (tecla F3 mostra o grafico)
+# ("espera" = bombeio da fila de eventos ate o prazo do quadro, ver frame_pacing)
+PROFILER_STAGES = [
+    "espera", "handle_event", "sampling", "haptics", "draw_ui", "widget:texto", "widget:checkboxes",
+    "widget:gatilhos", "widget:analogicos", "widget:ruido", "paineis", "display.flip",
+]
+
+
+def main(retained=True, sample_rate=1000, record_path=None, replay_path=None, replay_speed=1.0, profile_path=None, log_dir="logs", telemetry_port=None, pacing=PACING_FIXED, fps=30, history_path="historico.db", station_id=0):
     # estou gerando a documentacao do projeto, esta e minhe ´primeira documentcacao, 
     # entao vou testar ela neste codigo.
     """
     Função principal do programa para controlar e exibir informações sobre
     joysticks conectados.
+
+    :param retained: Se True, usa a camada estatica em cache e atualiza apenas os
+        retangulos alterados; se False, envia a tela inteira a cada quadro.
+    :param sample_rate: Taxa (Hz) de leitura dos joysticks, independente dos 30 FPS da tela.
+    :param record_path: Se informado, grava a sessao neste arquivo (session_recorder).
+    :param replay_path: Se informado, reproduz esta gravacao no lugar dos joysticks reais.
+    :param replay_speed: Velocidade da reproducao (1.0 = tempo real); None = passo a
+        passo, avancando um registro a cada tecla N.
+    :param profile_path: Se informado, grava o tempo de cada etapa de cada quadro
+        (.csv, ou .json no formato de trace do Chrome).
+    :param log_dir: Pasta do log de eventos em JSONL (consulta: python event_log.py) e
+        dos relatorios exportados (relatorio_*.json/csv).
+    :param telemetry_port: Se informado, publica o estado dos joysticks por UDP nesta
+        porta para o supervisor (python telemetry.py host:porta).
+    :param pacing: Ritmo do loop (frame_pacing): "fixo" (limite de `fps`), "ocioso"
+        (dorme ate chegar um evento e so redesenha quando algo mudou), "livre" (sem
+        limite, para medir latencia) ou "vsync" (sincronizado com o monitor).
+    :param fps: Limite de quadros por segundo dos modos fixo e ocioso.
+    :param history_path: Banco SQLite do historico de testes (consulta: python
+        history_store.py); None desliga.
+    :param station_id: Numero desta bancada na telemetria (0 a 65535).
     """
-    screen = init_pygame()
+    # Mede cada fase ate o primeiro quadro
+    startup = StartupTimer()
+    try:
+        screen = init_pygame(vsync=pacing == PACING_VSYNC)
+    except pygame.error as error:
+        print(f"vsync indisponível ({error}); usando o modo {PACING_FIXED}.")
+        pacing = PACING_FIXED
+        screen = init_pygame()
+    startup.mark("vídeo + joystick")
     resources = load_resources()
     logo = resources["logo"]
+    startup.mark("recursos (logo)")
+
+    # Fundo, logo e moldura do painel sao compostos uma unica vez
+    static_layer = build_static_layer(screen, logo)
+    tiled_static_layer = None  # so e montada quando houver mais de um controle
+    renderer = RetainedRenderer(screen, static_layer)
+    startup.mark("camadas estáticas")
 
     # Prepara a classe TextPrint
     text_print = TextPrint()
@@ -469,46 +1025,264 @@ def main():
     # Inicialize a fonte e crie a checkbox
     checkbox = initialize_checkbox(screen)
 
+    # Grade de paineis, usada quando ha mais de um controle conectado
+    layout = TiledPanelLayout(PANEL_AREA, PANEL_SIZE)
+    panel_text_print = TextPrint(cache=text_print.cache)
+    tiled = False
+
+    startup.mark("fontes e widgets")
+
     # Variáveis para controlar o intervalo entre cliques da checkbox
     click_interval = 100  # Intervalo mínimo entre cliques em milissegundos
     last_click_time = 0
 
     # Usado para controlar a velocidade de atualização da tela
-    clock = pygame.time.Clock()
+    pacer = FramePacer(pacing, fps, pump_rate=sample_rate)
 
     # Dicionário para armazenar os joysticks conectados
+    # (na reproducao, os joysticks virtuais entram pelos JOYDEVICEADDED da gravacao)
+    replay = SessionReplay(replay_path, replay_speed) if replay_path else None
+    joystick_factory = replay.joystick if replay is not None else pygame.joystick.Joystick
     joysticks = {}
+    recorder = SessionRecorder(record_path) if record_path else None
 
-    # Variável de controle do loop principal
-    done = False
-    while not done:        
-        for event in pygame.event.get():
-            quit_detected = handle_event(event, joysticks)
-            if quit_detected:
-                done = True
+    # Amostrador em alta taxa: a tela apenas le a ultima amostra de cada joystick
+    sampler = JoystickSampler(rate_hz=sample_rate)
+    sampler.start()
+    startup.mark("amostrador")
 
-        # Adicione um evento para lidar com cliques do mouse
-        last_click_time = handle_checkbox_click(checkbox, event, last_click_time, click_interval)
+    # Telemetria por UDP: le os buffers do amostrador em outra thread
+    telemetry = None
+    last_power_update = 0
+    if telemetry_port is not None:
+        telemetry = TelemetryPublisher(sampler, port=telemetry_port, station_id=station_id)
+        telemetry.start()
 
+    # Estatisticas de taxa de relatorios e jitter (tecla E exporta para JSON/CSV)
+    report_stats = ReportStatsCollector()
 
-        # Desenho na tela
-        # Primeiro, limpa a tela com branco. Não coloque outros comandos de desenho
-        # acima desta linha, pois serão apagados com este comando.
-        # screen.fill((255, 255, 255)) # co de fundo branco.
-        screen.fill((0, 0, 0))
-        text_print.reset()
+    # Repique/trepidacao/botao preso, a partir dos eventos de botao (tecla E exporta)
+    button_chatter = ButtonChatterDetector()
 
-        draw_ui(screen, logo)
-        display_joystick_info(screen, text_print, joysticks, checkbox)
+    # Perfis por GUID (gamecontrollerdb.txt/perfis_locais.txt, compilados em cache)
+    profiles = ProfileDatabase()
+    startup.mark("perfis")
 
-        # Atualiza a tela com o que foi desenhado
-        pygame.display.flip()
+    # Metricas de qualidade dos analogicos, calculadas sobre as amostras do sampler
+    stick_analytics = StickAnalyticsEngine(
+        heatmap_size=(140, 140), stick_axes=lambda joystick: profile_stick_axes(joystick, profiles.profile_for(joystick))
+    )
+    stick_view_mode = VIEW_OFF
+
+    # Espectro do ruido de cada eixo, calculado em outros processos
+    noise_analyzer = NoiseAnalyzer()
+
+    # Tempo de cada etapa do quadro
+    profiler = FrameProfiler(PROFILER_STAGES, trace_path=profile_path)
+    profiler_font = get_font(16)
+
+    # Log estruturado de eventos, gravado em segundo plano
+    event_log = EventLog(log_dir)
+
+    # Teste de vibracao em todos os controles ao mesmo tempo (tecla R)
+    haptics = HapticsSequencer(event_log=event_log)
+
+    # Historico dos testes: as medicoes de cada controle sao gravadas quando ele
+    # e desconectado (e no fim, para os que ficaram), em segundo plano
+    history = HistoryStore(history_path) if history_path else None
+    history_session = history.begin_session("main") if history is not None else None
+
+    def record_history(instance_id):
+        joystick = joysticks.get(instance_id)
+        if history is not None and joystick is not None:
+            history.record(history_session, joystick.get_guid(), joystick.get_name(), device_measurements(
+                instance_id, report_stats, stick_analytics, noise_analyzer, button_chatter, haptics
+            ))
+
+    # Variável de controle do loop principal
+    done = False
+    while not done:        
+        profiler.begin_frame()
+        # Ate o prazo do quadro, a fila e bombeada na taxa de amostragem: cada evento
+        # entra no amostrador na hora, com o horario em que saiu da fila (os da
+        # reproducao entram no loop abaixo)
+        busy = haptics.running or (replay is not None and replay.speed is not None and not replay.finished)
+        events = pacer.collect_events(sampler.ingest_event if replay is None else None, busy)
+        profiler.lap("espera")
+        if replay is not None:
+            # Joysticks reais sao ignorados durante a reproducao
+            events = [(event, event_time) for event, event_time in events if event.type not in JOYSTICK_EVENT_TYPES]
+            replay_time = time.perf_counter()
+            events += [(event, replay_time) for event in replay.advance()]
+
+        # Cada evento passa por todos os consumidores (os do passo a passo da
+        # reproducao, tecla N, entram no fim da mesma lista)
+        for event, event_time in events:
+            if event.type == pygame.JOYDEVICEREMOVED:
+                record_history(event.instance_id)  # antes que os consumidores esquecam o controle
+                report_stats.remove(event.instance_id)  # um controle reconectado recebe outro instance_id
+            quit_detected = handle_event(event, joysticks, joystick_factory, event_log=event_log, profiles=profiles)
+            if replay is not None:
+                sampler.ingest_event(event, event_time)
+            report_stats.ingest_event(event, joysticks, event_time)
+            button_chatter.ingest_event(event, joysticks, event_time)
+            if recorder is not None:
+                recorder.record_event(event, joysticks, event_time)
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_e:
+                report_stats.export_json(report_path(log_dir, "relatorio_taxas.json"))
+                report_stats.export_csv(report_path(log_dir, "relatorio_taxas.csv"))
+                button_chatter.export_json(report_path(log_dir, "relatorio_botoes.json"), event_time)
+                button_chatter.export_csv(report_path(log_dir, "relatorio_botoes.csv"), event_time)
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle_overlay()
+                renderer.invalidate()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+                haptics.start(joysticks)
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_h:
+                stick_view_mode = VIEW_MODES[(VIEW_MODES.index(stick_view_mode) + 1) % len(VIEW_MODES)]
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_n and replay is not None and replay.speed is None:
+                step_time = time.perf_counter()
+                events.extend((replay_event, step_time) for replay_event in replay.step() or [])
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                renderer.invalidate()  # janela descoberta: envia a tela inteira
+            # Cliques do mouse na checkbox
+            last_click_time = handle_checkbox_click(checkbox, event, last_click_time, click_interval)
+            if quit_detected:
+                done = True
+        profiler.lap("handle_event")
+
+        sampler.sync(joysticks)
+        stick_analytics.update(sampler)
+        noise_analyzer.update(sampler)
+        joystick_views = sampler.views(joysticks)
+        # O nivel de energia muda devagar: atualiza a telemetria uma vez por segundo
+        if telemetry is not None and pygame.time.get_ticks() - last_power_update >= 1000:
+            last_power_update = pygame.time.get_ticks()
+            for instance_id, joystick in joysticks.items():
+                telemetry.set_power_level(instance_id, joystick.get_power_level())
+        profiler.lap("sampling")
+
+        # Comandos de vibracao agendados (nao espera: executa so os que ja venceram)
+        if haptics.running:
+            haptics.tick(joysticks)
+            if not haptics.running:
+                haptics.export_json(report_path(log_dir, "relatorio_vibracao.json"))
+        profiler.lap("haptics")
+
+        # Grava o que as leituras deste quadro viram
+        if recorder is not None:
+            for joystick in joystick_views.values():
+                recorder.record_state(joystick)
+
+        # Algo muda a tela sem gerar eventos: o modo ocioso nao pode dormir
+        busy = haptics.running or (replay is not None and replay.speed is not None and not replay.finished)
+
+        # No modo ocioso, quadros sem nenhuma mudanca nao sao desenhados
+        if pacer.should_redraw(events, busy):
+            # Desenho na tela
+            # Primeiro, restaura o fundo (camada estatica). Não coloque outros comandos de desenho
+            # acima desta linha, pois serão apagados com este comando.
+
+            # Com mais de um controle, troca para a grade de paineis (e volta com um so)
+            if (len(joystick_views) > 1) != tiled or (tiled and list(joystick_views) != layout.order):
+                tiled = len(joystick_views) > 1
+                if tiled and tiled_static_layer is None:
+                    tiled_static_layer = build_tiled_static_layer(screen, logo)
+                renderer.static_layer = tiled_static_layer if tiled else static_layer
+                renderer.invalidate()
+                checkbox.x, checkbox.y = (10, 660) if tiled else (520, 450)
+
+            text_print.reset()
+            force_panels = not retained or renderer.full_redraw
+            if retained:
+                renderer.begin_frame()
+            else:
+                screen.blit(renderer.static_layer, (0, 0))
+            profiler.lap("draw_ui")
+
+            if tiled:
+                opaque_rects, dirty_rects = display_joystick_panels(
+                    screen, layout, panel_text_print, joystick_views, checkbox, report_stats, force_panels, button_chatter, profiles
+                )
+                profiler.lap("paineis")
+            else:
+                opaque_rects = []
+                dirty_rects = display_joystick_info(screen, text_print, joystick_views, checkbox, report_stats, stick_analytics, stick_view_mode, profiler, noise_analyzer, button_chatter, profiles)
+
+            # Grafico de tempo por quadro (tecla F3)
+            overlay_rect = profiler.draw_overlay(screen, font=profiler_font)
+            if overlay_rect is not None:
+                dirty_rects.append(overlay_rect)
+
+            # Atualiza a tela com o que foi desenhado
+            if retained:
+                renderer.present(dirty_rects, opaque_rects)
+            else:
+                pygame.display.flip()
+            profiler.lap("display.flip")
+            if startup is not None:
+                startup.mark("primeiro quadro")
+                print(startup.report())
+                startup = None
+
+        # Agenda o proximo quadro (fixo: `fps` quadros por segundo)
+        pacer.end_frame()
+        profiler.end_frame()
+
+    for instance_id in list(joysticks):
+        record_history(instance_id)
+    if history is not None:
+        history.end_session(history_session)
+        history.close()
+    sampler.stop()
+    noise_analyzer.close()
+    if telemetry is not None:
+        telemetry.stop()
+    if haptics.running:
+        haptics.stop(joysticks)
+    event_log.close()
+    profiles.close()
+    profiler.close()
+    if recorder is not None:
+        recorder.close()
+    if replay is not None:
+        replay.close()
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Teste de Joystick - AthenasArch")
+    parser.add_argument("--pacing", choices=PACING_MODES, default=PACING_FIXED,
+                        help="ritmo do loop: fixo, ocioso (menos CPU em bancada parada), livre (menor latência) ou vsync")
+    parser.add_argument("--fps", type=int, default=30, help="limite de quadros por segundo (modos fixo e ocioso)")
+    parser.add_argument("--immediate", action="store_true", help="envia a tela inteira a cada quadro")
+    parser.add_argument("--sample-rate", type=int, default=1000, help="taxa de leitura dos joysticks (Hz)")
+    parser.add_argument("--record", help="grava a sessão neste arquivo")
+    parser.add_argument("--replay", help="reproduz esta gravação")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="velocidade da reprodução; 0 = passo a passo (tecla N)")
+    parser.add_argument("--profile", help="grava o tempo de cada etapa do quadro (.csv ou .json)")
+    parser.add_argument("--log-dir", default="logs", help="pasta do log de eventos")
+    parser.add_argument("--telemetry-port", type=int, help="publica o estado dos joysticks por UDP nesta porta")
+    parser.add_argument("--station-id", type=int, default=0, help="número desta bancada na telemetria (0 a 65535)")
+    parser.add_argument("--history", default="historico.db", help="banco do histórico de testes (vazio desliga)")
+    args = parser.parse_args()
+
+    main(
+        retained=not args.immediate,
+        sample_rate=args.sample_rate,
+        record_path=args.record,
+        replay_path=args.replay,
+        replay_speed=args.replay_speed or None,
+        profile_path=args.profile,
+        log_dir=args.log_dir,
+        telemetry_port=args.telemetry_port,
+        pacing=args.pacing,
+        fps=args.fps,
+        history_path=args.history or None,
+        station_id=args.station_id,
+    )
 
-        # Limita a 30 quadros por segundo
-        clock.tick(30)
 
 if __name__ == "__main__":
-    main()
+    main_cli()
     # Se esquecer desta linha, o programa ficará preso ao sair
     # se estiver sendo executado a partir do IDLE.
     pygame.quit()
\ No newline at end of file
@@ -0,0 +1,262 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: noise_analysis.py
+# Descrição: Analise espectral do ruido dos eixos (potenciometros gastos geram
+#            tremulacao de alta frequencia). Janelas das amostras em alta taxa
+#            do joystick_sampler sao copiadas para memoria compartilhada e
+#            analisadas (Welch com NumPy) em um ProcessPoolExecutor, fora do
+#            processo da interface. O resultado e uma nota de ruido por eixo.
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+#
+# O movimento feito pela mao fica abaixo de ~15 Hz, entao so a parte do espectro
+# acima de `cutoff_hz` conta como ruido. O RMS do ruido e a integral da densidade
+# espectral nessa faixa; a frequencia dominante e o pico da faixa.
+#
+# Isso so vale se o estado dos eixos for atualizado bem acima de `cutoff_hz`: com
+# amostras repetidas (estado so atualizado uma vez por quadro, por exemplo) a faixa
+# de ruido nem aparece no sinal e a nota sairia "A" sem medir nada. Por isso cada
+# janela mede a taxa efetiva de atualizacao (amostras que mudaram por segundo) e,
+# abaixo de 2 x `cutoff_hz` (Nyquist), o resultado e "dados insuficientes", sem nota.
+# -----------------------------------------------------------------------------
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+# Notas por RMS do ruido (em unidades do eixo, -1.0 a 1.0)
+NOISE_GRADES = [(0.002, "A"), (0.005, "B"), (0.01, "C"), (0.02, "D")]
+WORST_GRADE = "F"
+INSUFFICIENT_DATA = "dados insuficientes"
+
+# Harmonicas da rede eletrica (50/60 Hz) usadas na classificacao
+MAINS_FREQUENCIES = (50.0, 60.0, 100.0, 120.0, 150.0, 180.0)
+MAINS_TOLERANCE_HZ = 2.0
+
+# Segmentos do Welch
+WELCH_SEGMENT = 256
+
+# Memoria compartilhada ja aberta em cada processo de analise (nome -> SharedMemory)
+_attached = {}
+
+
+def noise_grade(rms):
+    for limit, grade in NOISE_GRADES:
+        if rms < limit:
+            return grade
+    return WORST_GRADE
+
+
+def welch_psd(signal, sample_rate, segment=WELCH_SEGMENT):
+    """
+    Densidade espectral de potencia pelo metodo de Welch (janela de Hann, 50% de sobreposicao).
+
+    :return: (frequencias, densidade) para cada coluna de `signal` (amostras x eixos).
+    """
+    segment = min(segment, len(signal))
+    step = segment // 2
+    window = np.hanning(segment)
+    scale = 1.0 / (sample_rate * (window ** 2).sum())
+    starts = range(0, len(signal) - segment + 1, step)
+
+    psd = np.zeros((segment // 2 + 1, signal.shape[1]))
+    for start in starts:
+        chunk = signal[start:start + segment]
+        chunk = (chunk - chunk.mean(axis=0)) * window[:, None]
+        psd += np.abs(np.fft.rfft(chunk, axis=0)) ** 2
+    psd *= scale / len(starts)
+    psd[1:-1] *= 2  # espectro de um lado so
+    return np.fft.rfftfreq(segment, 1.0 / sample_rate), psd
+
+
+def classify(frequency, psd_band):
+    # Descreve o tipo de ruido pelo formato do espectro acima do corte
+    if psd_band.size == 0 or psd_band.max() <= 0:
+        return "sem ruído"
+    if any(abs(frequency - mains) <= MAINS_TOLERANCE_HZ for mains in MAINS_FREQUENCIES):
+        return "rede elétrica"
+    # Planicidade espectral: perto de 1 = ruido largo (desgaste), perto de 0 = tom
+    flatness = np.exp(np.mean(np.log(psd_band + 1e-20))) / np.mean(psd_band)
+    return "banda larga" if flatness > 0.3 else "tonal"
+
+
+def analyze_axes(timestamps, axes, cutoff_hz=20.0):
+    """
+    Analisa uma janela de amostras de varios eixos.
+
+    :param timestamps: Instantes das amostras (s), em ordem crescente.
+    :param axes: Matriz amostras x eixos.
+    :return: Lista com um dicionario por eixo (rms, frequencia dominante, nota e tipo).
+        Se o estado foi atualizado devagar demais para ver a faixa de ruido, rms,
+        frequencia e nota sao None e o tipo e INSUFFICIENT_DATA.
+    """
+    # O amostrador tambem grava amostras nos eventos, entao o intervalo nao e
+    # constante: reamostra em uma grade uniforme na taxa mediana
+    intervals = np.diff(timestamps)
+    intervals = intervals[intervals > 0]
+    if len(intervals) < 16:
+        return []
+    sample_rate = 1.0 / float(np.median(intervals))
+
+    # Taxa efetiva: so conta a amostra em que algum eixo mudou de valor
+    changed = np.any(np.diff(axes, axis=0) != 0, axis=1)
+    update_rate = float(changed.mean()) * sample_rate
+    if update_rate < 2 * cutoff_hz:
+        return [{
+            "axis": i,
+            "rms": None,
+            "dominant_hz": None,
+            "grade": None,
+            "kind": INSUFFICIENT_DATA,
+            "sample_rate": sample_rate,
+            "update_rate": update_rate,
+        } for i in range(axes.shape[1])]
+
+    uniform = np.arange(timestamps[0], timestamps[-1], 1.0 / sample_rate)
+    signal = np.column_stack([np.interp(uniform, timestamps, axes[:, i]) for i in range(axes.shape[1])])
+
+    frequencies, psd = welch_psd(signal, sample_rate)
+    band = frequencies >= cutoff_hz
+    resolution = frequencies[1] - frequencies[0]
+
+    results = []
+    for i in range(signal.shape[1]):
+        band_psd = psd[band, i]
+        rms = float(np.sqrt(band_psd.sum() * resolution)) if band_psd.size else 0.0
+        dominant = float(frequencies[band][np.argmax(band_psd)]) if band_psd.size else 0.0
+        results.append({
+            "axis": i,
+            "rms": rms,
+            "dominant_hz": dominant,
+            "grade": noise_grade(rms),
+            "kind": classify(dominant, band_psd),
+            "sample_rate": sample_rate,
+            "update_rate": update_rate,
+        })
+    return results
+
+
+def analyze_shared_window(shm_name, shape, slot, length, num_axes, cutoff_hz):
+    # Executado no processo de analise: le a janela direto da memoria compartilhada
+    shm = _attached.get(shm_name)
+    if shm is None:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _attached[shm_name] = shm
+    windows = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    window = windows[slot, :length, :num_axes + 1]
+    return analyze_axes(window[:, 0], window[:, 1:], cutoff_hz)
+
+
+class NoiseAnalyzer:
+    def __init__(self, window=2048, interval=1.0, cutoff_hz=20.0, max_axes=16, max_pending=None, max_workers=None):
+        """
+        :param window: Amostras por analise (2048 a 1 kHz = ~2 s).
+        :param interval: Segundos entre duas analises do mesmo joystick.
+        :param cutoff_hz: Frequencia a partir da qual o sinal e considerado ruido.
+        :param max_workers: Processos de analise (padrao: um nucleo fica livre para a interface).
+        :param max_pending: Janelas em analise ao mesmo tempo (padrao: 2 por processo).
+            Quando todas estao ocupadas, a janela e adiada para o proximo quadro.
+        """
+        self.window = window
+        self.interval = interval
+        self.cutoff_hz = cutoff_hz
+        self.max_axes = max_axes
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.slots = max_pending or 2 * self.max_workers
+
+        self.executor = None  # criado no primeiro uso para nao atrasar a abertura
+        self.starter = None
+        self.ready = threading.Event()
+        self.shm = None
+        self.windows = None
+        self.free_slots = list(range(self.slots))
+        self.pending = {}  # instance_id -> (future, slot)
+        self.last_submit = {}  # instance_id -> horario
+        self.results = {}  # instance_id -> lista de resultados por eixo
+        self.failures = 0
+
+    def _start(self):
+        # Criar a memoria compartilhada (sobe o resource_tracker) e os processos leva
+        # dezenas de ms: e feito em outra thread, e o loop principal so comeca a
+        # enviar janelas quando tudo estiver pronto
+        shape = (self.slots, self.window, self.max_axes + 1)  # coluna 0 = timestamp
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+        self.windows = np.ndarray(shape, dtype=np.float64, buffer=self.shm.buf)
+        # "spawn": os processos nao herdam as threads do amostrador e do log
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            self.max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        # Um envio por processo: o executor so cria processos quando nao ha nenhum livre
+        warm_up = [self.executor.submit(int) for _ in range(self.max_workers)]
+        concurrent.futures.wait(warm_up)
+        self.ready.set()
+
+    def update(self, sampler, now=None):
+        # Chamado a cada quadro: recolhe os resultados prontos e envia novas janelas
+        now = time.perf_counter() if now is None else now
+        for instance_id, (future, slot) in list(self.pending.items()):
+            if not future.done():
+                continue
+            del self.pending[instance_id]
+            self.free_slots.append(slot)
+            try:
+                result = future.result()
+            except Exception:
+                self.failures += 1
+                continue
+            if instance_id in sampler.devices:
+                self.results[instance_id] = result
+
+        for instance_id in list(self.results):
+            if instance_id not in sampler.devices:
+                del self.results[instance_id]
+                self.last_submit.pop(instance_id, None)
+
+        for instance_id, device in list(sampler.devices.items()):
+            if instance_id in self.pending or now - self.last_submit.get(instance_id, 0.0) < self.interval:
+                continue
+            buffer = device.buffer
+            if buffer.count < self.window:
+                continue
+            if not self.free_slots:
+                break
+            if self.starter is None:
+                self.starter = threading.Thread(target=self._start, name="noise-analysis-start", daemon=True)
+                self.starter.start()
+            if not self.ready.is_set():
+                break
+
+            timestamps, axes, _, _, _, _ = buffer.read_since(buffer.count - self.window)
+            # (o amostrador pode ter gravado mais amostras entre as duas leituras)
+            timestamps, axes = timestamps[-self.window:], axes[-self.window:]
+            num_axes = min(axes.shape[1], self.max_axes)
+            length = len(timestamps)
+            slot = self.free_slots.pop()
+            self.windows[slot, :length, 0] = timestamps
+            self.windows[slot, :length, 1:num_axes + 1] = axes[:, :num_axes]
+            future = self.executor.submit(
+                analyze_shared_window, self.shm.name, self.windows.shape, slot, length, num_axes, self.cutoff_hz
+            )
+            self.pending[instance_id] = (future, slot)
+            self.last_submit[instance_id] = now
+
+    def axis_results(self, instance_id):
+        return self.results.get(instance_id, [])
+
+    def close(self):
+        if self.starter is not None:
+            self.starter.join()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+        if self.shm is not None:
+            self.windows = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
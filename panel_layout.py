@@ -0,0 +1,131 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: panel_layout.py
+# Descrição: Layout em grade para varios controles ao mesmo tempo. Cada
+#            controle ganha um painel proprio, desenhado em uma superficie fora
+#            da tela e redesenhado apenas quando o estado daquele controle muda.
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+import math
+
+import pygame
+
+
+def grid_cells(count, area, panel_size, spacing=6):
+    """
+    Divide a area em uma grade com `count` celulas, mantendo a proporcao do painel.
+
+    :param count: Numero de paineis.
+    :param area: pygame.Rect da regiao da tela reservada para os paineis.
+    :param panel_size: (largura, altura) do painel no tamanho original.
+    :return: Lista de pygame.Rect, uma por painel, em ordem.
+    """
+    if count == 0:
+        return []
+
+    # Escolhe o numero de colunas que deixa os paineis maiores
+    panel_width, panel_height = panel_size
+    best = None
+    for columns in range(1, count + 1):
+        rows = math.ceil(count / columns)
+        cell_width = (area.width - spacing * (columns - 1)) / columns
+        cell_height = (area.height - spacing * (rows - 1)) / rows
+        scale = min(cell_width / panel_width, cell_height / panel_height)
+        if best is None or scale > best[0]:
+            best = (scale, columns, cell_width, cell_height)
+
+    scale, columns, cell_width, cell_height = best
+    scale = min(scale, 1.0)  # nunca amplia o painel
+    width, height = int(panel_width * scale), int(panel_height * scale)
+
+    cells = []
+    for index in range(count):
+        row, column = divmod(index, columns)
+        x = area.x + int(column * (cell_width + spacing))
+        y = area.y + int(row * (cell_height + spacing))
+        cells.append(pygame.Rect(x, y, width, height))
+    return cells
+
+
+# Painel de um controle: superficie no tamanho original + copia ja escalada para a celula
+class JoystickPanel:
+    def __init__(self, instance_id, panel_size):
+        self.instance_id = instance_id
+        self.surface = pygame.Surface(panel_size)
+        self.scaled = None
+        self.state_key = None  # estado usado no ultimo desenho
+        self.cell = None
+
+    def update(self, joystick, state_key, render_panel):
+        # Redesenha somente se o estado do controle mudou
+        if state_key == self.state_key:
+            return False
+        render_panel(self.surface, joystick)
+        self.state_key = state_key
+        self.scaled = None
+        return True
+
+    def place(self, cell):
+        if self.cell is None or self.cell.size != cell.size:
+            self.scaled = None
+        self.cell = cell
+
+    def image(self):
+        if self.scaled is None:
+            if self.cell.size == self.surface.get_size():
+                self.scaled = self.surface
+            else:
+                self.scaled = pygame.transform.smoothscale(self.surface, self.cell.size)
+        return self.scaled
+
+
+# Mantem um painel por instance_id e compoe todos na tela em uma unica passada
+class TiledPanelLayout:
+    def __init__(self, area, panel_size):
+        self.area = pygame.Rect(area)
+        self.panel_size = panel_size
+        self.panels = {}  # instance_id -> JoystickPanel
+        self.order = []  # instance_ids na ordem da grade
+
+    def reflow(self, instance_ids):
+        # Recalcula a grade quando controles entram ou saem (os paineis sao reaproveitados)
+        for instance_id in list(self.panels):
+            if instance_id not in instance_ids:
+                del self.panels[instance_id]
+        for instance_id in instance_ids:
+            if instance_id not in self.panels:
+                self.panels[instance_id] = JoystickPanel(instance_id, self.panel_size)
+
+        self.order = list(instance_ids)
+        for instance_id, cell in zip(self.order, grid_cells(len(self.order), self.area, self.panel_size)):
+            self.panels[instance_id].place(cell)
+
+    def render(self, screen, joysticks, render_panel, state_key, force=False):
+        """
+        Atualiza os paineis e desenha na tela os que mudaram.
+
+        :param joysticks: Dicionario instance_id -> joystick.
+        :param render_panel: Funcao (superficie, joystick) que desenha um painel.
+        :param state_key: Funcao (joystick) que retorna um valor comparavel com o estado atual.
+        :param force: Se True, desenha todos os paineis (ex: depois de limpar a tela).
+        :return: Lista de retangulos alterados na tela.
+        """
+        reflowed = list(joysticks) != self.order
+        if reflowed:
+            self.reflow(list(joysticks))
+            force = True
+
+        blit_list = []
+        for instance_id in self.order:
+            panel = self.panels[instance_id]
+            changed = panel.update(joysticks[instance_id], state_key(joysticks[instance_id]), render_panel)
+            if changed or force:
+                blit_list.append((panel.image(), panel.cell))
+
+        screen.blits(blit_list, doreturn=0)
+        dirty_rects = [pygame.Rect(cell) for _, cell in blit_list]
+        if reflowed:
+            # Paineis que sairam ou mudaram de lugar deixam restos: atualiza a area toda
+            dirty_rects = [pygame.Rect(self.area)]
+        return dirty_rects
@@ -0,0 +1,81 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: queued_writer.py
+# Descrição: Base dos gravadores em segundo plano (log de eventos, historico):
+#            o loop principal so coloca itens em uma fila e uma thread os grava
+#            em lotes, sem que o loop espere pelo disco.
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+#
+# A subclasse implementa _write(itens), que grava um lote, e se precisar
+# _finish(), chamado pela thread depois de gravar o que sobrou na fila (fechar o
+# arquivo, por exemplo). A thread so comeca em start(): chame no fim do __init__
+# da subclasse, depois de preparar o que _write usa.
+# -----------------------------------------------------------------------------
+import collections
+import threading
+
+
+class QueuedWriter:
+    def __init__(self, name, batch_size=1024, flush_interval=0.25, maxlen=None):
+        """
+        :param name: Nome da thread de gravacao.
+        :param batch_size: Maximo de itens gravados de uma vez; a fila com esse
+            tamanho acorda a thread antes do intervalo.
+        :param flush_interval: Segundos entre duas gravacoes.
+        :param maxlen: Limite do deque (descarta os mais antigos); None = sem limite.
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        # deque.append/popleft sao atomicos no CPython: a fila nao precisa de lock
+        self.queue = collections.deque(maxlen=maxlen)
+        self.dropped = 0
+        self.written = 0
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def enqueue(self, item):
+        # Chamado pelo loop principal: so enfileira
+        self.queue.append(item)
+        if len(self.queue) >= self.batch_size:
+            self.wakeup.set()
+
+    def _write(self, items):
+        raise NotImplementedError
+
+    def _finish(self):
+        pass
+
+    def _write_batch(self):
+        items = []
+        while self.queue and len(items) < self.batch_size:
+            items.append(self.queue.popleft())
+        if not items:
+            return 0
+        self._write(items)
+        return len(items)
+
+    def _run(self):
+        while not self.stopped.is_set():
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            while self._write_batch():
+                pass
+        # Grava o que sobrou na fila antes de sair
+        while self._write_batch():
+            pass
+        self._finish()
+
+    def close(self, timeout=None):
+        """
+        :param timeout: Segundos de espera pela thread; None espera gravar tudo.
+        """
+        self.stopped.set()
+        self.wakeup.set()
+        self.thread.join(timeout=timeout)
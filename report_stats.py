@@ -0,0 +1,272 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: report_stats.py
+# Descrição: Estatisticas de taxa de relatorios (polling rate), jitter do
+#            intervalo entre relatorios e deteccao de relatorios duplicados ou
+#            perdidos, por joystick (instance_id).
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+#
+# Tudo e calculado de forma incremental e com memoria constante: os quantis
+# usam o estimador P² (Jain & Chlamtac, 1985) e o histograma dos intervalos tem
+# faixas fixas em escala logaritmica.
+#
+# Os timestamps sao os do momento em que o evento sai da fila do pygame: eventos
+# que saem na mesma leitura da fila tem o mesmo horario e contam como um unico
+# intervalo. Se o mesmo controle aparece duas vezes na mesma leitura, o relogio
+# nao separa dois relatorios seguidos (ex: fila esvaziada so uma vez por quadro);
+# nesse caso intervalo, jitter e perdas por buraco nao sao confiaveis e ficam
+# ocultos (None) ate a fila ser esvaziada mais vezes que o controle reporta.
+# -----------------------------------------------------------------------------
+import bisect
+import csv
+import json
+import math
+
+import pygame
+
+
+# Eventos que contam como um relatorio do controle
+REPORT_EVENT_TYPES = (pygame.JOYAXISMOTION, pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP, pygame.JOYHATMOTION)
+
+# Faixas do histograma de intervalos (em ms): de 0,1 ms a 1 s, 4 faixas por decada
+INTERVAL_HISTOGRAM_EDGES_MS = [round(10 ** (exponent / 4), 3) for exponent in range(-4, 13)]
+
+# Fracao maxima de relatorios juntados na mesma leitura da fila para o tempo ainda
+# ser considerado confiavel
+MERGED_REPORTS_TOLERANCE = 0.05
+
+
+# Estimador P² de um quantil: guarda apenas 5 marcadores, sem armazenar as amostras
+class P2Quantile:
+    def __init__(self, quantile):
+        self.quantile = quantile
+        self.count = 0
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * quantile, 1 + 4 * quantile, 3 + 2 * quantile, 5]
+        self.increments = [0, quantile / 2, quantile, (1 + quantile) / 2, 1]
+
+    def add(self, value):
+        self.count += 1
+        if self.count <= 5:
+            bisect.insort(self.heights, value)
+            return
+
+        heights = self.heights
+        positions = self.positions
+
+        # Encontra a celula onde o valor cai e ajusta os extremos
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = bisect.bisect_right(heights, value) - 1
+
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Ajusta os marcadores do meio com interpolacao parabolica (ou linear)
+        for i in range(1, 4):
+            delta = self.desired[i] - positions[i]
+            if (delta >= 1 and positions[i + 1] - positions[i] > 1) or (delta <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if delta > 0 else -1
+                candidate = self._parabolic(i, step)
+                if not heights[i - 1] < candidate < heights[i + 1]:
+                    candidate = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = candidate
+                positions[i] += step
+
+    def _parabolic(self, i, step):
+        heights = self.heights
+        positions = self.positions
+        return heights[i] + step / (positions[i + 1] - positions[i - 1]) * (
+            (positions[i] - positions[i - 1] + step) * (heights[i + 1] - heights[i]) / (positions[i + 1] - positions[i])
+            + (positions[i + 1] - positions[i] - step) * (heights[i] - heights[i - 1]) / (positions[i] - positions[i - 1])
+        )
+
+    def value(self):
+        if self.count == 0:
+            return math.nan
+        if self.count <= 5:
+            # Poucas amostras: quantil direto das amostras ordenadas
+            index = min(len(self.heights) - 1, int(round(self.quantile * (len(self.heights) - 1))))
+            return self.heights[index]
+        return self.heights[2]
+
+
+# Estatisticas de relatorios de um joystick
+class ReportStats:
+    def __init__(self, instance_id, guid="", name="", drop_factor=2.5, warmup_reports=20):
+        self.instance_id = instance_id
+        self.guid = guid
+        self.name = name
+        # Um intervalo maior que drop_factor * mediana indica relatorios perdidos
+        self.drop_factor = drop_factor
+        self.warmup_reports = warmup_reports
+
+        self.reports = 0
+        self.intervals = 0
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.last_interval = None
+        self.duplicated = 0
+        self.dropped = 0  # relatorios de pressionar que faltaram (nao depende do relogio)
+        self.gap_dropped = 0  # relatorios perdidos estimados pelos buracos no intervalo
+
+        # Controles vistos na leitura atual da fila; um controle repetido na mesma
+        # leitura e um relatorio que o relogio nao conseguiu separar do anterior
+        self.drain_timestamp = None
+        self.drain_keys = set()
+        self.merged = 0
+
+        self.interval_p50 = P2Quantile(0.5)
+        self.interval_p99 = P2Quantile(0.99)
+        self.jitter_p50 = P2Quantile(0.5)
+        self.jitter_p99 = P2Quantile(0.99)
+        self.histogram = [0] * (len(INTERVAL_HISTOGRAM_EDGES_MS) + 1)
+
+        # Ultimo valor visto por controle, para detectar relatorios repetidos
+        self.last_values = {}
+
+    def add_event(self, event, timestamp):
+        if event.type == pygame.JOYAXISMOTION:
+            key, value = ("axis", event.axis), round(event.value, 4)
+        elif event.type == pygame.JOYHATMOTION:
+            key, value = ("hat", event.hat), tuple(event.value)
+        else:
+            key, value = ("button", event.button), event.type == pygame.JOYBUTTONDOWN
+
+        previous = self.last_values.get(key)
+        if previous == value:
+            # Mesmo valor reportado de novo (ex: botao "pressionado" duas vezes)
+            self.duplicated += 1
+        elif previous is None and key[0] == "button" and not value:
+            # Botao solto sem ter sido pressionado: o relatorio de pressionar se perdeu
+            self.dropped += 1
+        self.last_values[key] = value
+
+        if timestamp != self.drain_timestamp:
+            self.drain_timestamp = timestamp
+            self.drain_keys.clear()
+        elif key in self.drain_keys:
+            self.merged += 1
+        self.drain_keys.add(key)
+
+        self.add_report(timestamp)
+
+    def add_report(self, timestamp):
+        self.reports += 1
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp
+            self.last_timestamp = timestamp
+            return
+        if timestamp == self.last_timestamp:
+            return  # mesma leitura da fila: nao ha intervalo para medir
+
+        interval_ms = (timestamp - self.last_timestamp) * 1000.0
+        self.last_timestamp = timestamp
+        self.intervals += 1
+
+        # Verifica o buraco antes de atualizar a mediana com o proprio buraco
+        if self.intervals > self.warmup_reports:
+            median = self.interval_p50.value()
+            if median > 0 and interval_ms > self.drop_factor * median:
+                self.gap_dropped += int(round(interval_ms / median)) - 1
+
+        self.interval_p50.add(interval_ms)
+        self.interval_p99.add(interval_ms)
+        self.histogram[bisect.bisect_right(INTERVAL_HISTOGRAM_EDGES_MS, interval_ms)] += 1
+
+        if self.last_interval is not None:
+            jitter_ms = abs(interval_ms - self.last_interval)
+            self.jitter_p50.add(jitter_ms)
+            self.jitter_p99.add(jitter_ms)
+        self.last_interval = interval_ms
+
+    def timing_resolved(self):
+        # False se o relogio dos eventos e mais grosso que o intervalo entre relatorios
+        return self.intervals > 0 and self.merged <= MERGED_REPORTS_TOLERANCE * self.reports
+
+    def total_dropped(self):
+        # Perdas por buraco so contam quando o relogio separa os relatorios
+        return self.dropped + (self.gap_dropped if self.timing_resolved() else 0)
+
+    def report_rate(self):
+        # Taxa efetiva de relatorios em Hz
+        if self.reports < 2 or self.last_timestamp == self.first_timestamp:
+            return 0.0
+        return (self.reports - 1) / (self.last_timestamp - self.first_timestamp)
+
+    def summary(self):
+        resolved = self.timing_resolved()
+
+        def timing(quantile):
+            return round(quantile.value(), 3) if resolved else None
+
+        return {
+            "instance_id": self.instance_id,
+            "guid": self.guid,
+            "name": self.name,
+            "reports": self.reports,
+            "report_rate_hz": round(self.report_rate(), 3),
+            "timing_resolved": resolved,
+            "merged_reports": self.merged,
+            "interval_p50_ms": timing(self.interval_p50),
+            "interval_p99_ms": timing(self.interval_p99),
+            "jitter_p50_ms": timing(self.jitter_p50),
+            "jitter_p99_ms": timing(self.jitter_p99),
+            "duplicated": self.duplicated,
+            "dropped": self.total_dropped(),
+            "interval_histogram_edges_ms": INTERVAL_HISTOGRAM_EDGES_MS,
+            "interval_histogram": list(self.histogram) if resolved else None,
+        }
+
+
+# Junta as estatisticas de todos os joysticks, indexadas por instance_id
+class ReportStatsCollector:
+    def __init__(self, drop_factor=2.5):
+        self.drop_factor = drop_factor
+        self.stats = {}
+
+    def get(self, instance_id):
+        return self.stats.get(instance_id)
+
+    def ingest_event(self, event, joysticks, timestamp):
+        if event.type not in REPORT_EVENT_TYPES:
+            return
+        stats = self.stats.get(event.instance_id)
+        if stats is None:
+            joystick = joysticks.get(event.instance_id)
+            if joystick is None:
+                return  # evento de um joystick que ja foi removido
+            stats = ReportStats(event.instance_id, joystick.get_guid(), joystick.get_name(), self.drop_factor)
+            self.stats[event.instance_id] = stats
+        stats.add_event(event, timestamp)
+
+    def remove(self, instance_id):
+        return self.stats.pop(instance_id, None)
+
+    def summaries(self):
+        return [stats.summary() for stats in self.stats.values()]
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.summaries(), file, indent=2)
+
+    def export_csv(self, path):
+        fields = [
+            "instance_id", "guid", "name", "reports", "report_rate_hz", "timing_resolved",
+            "merged_reports", "interval_p50_ms", "interval_p99_ms", "jitter_p50_ms", "jitter_p99_ms",
+            "duplicated", "dropped",
+        ]
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(self.summaries())
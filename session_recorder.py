@@ -0,0 +1,351 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: session_recorder.py
+# Descrição: Gravacao compacta (binaria, so de acrescimo) de tudo que os
+#            joysticks reportam e reproducao da gravacao como um joystick
+#            virtual, lendo o arquivo via mmap (sem carregar tudo na memoria).
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+#
+# Formato do arquivo:
+#   cabecalho: MAGIC (8 bytes) + versao (uint16)
+#   registros: tipo (uint8) + instance_id (uint16) + dt em microssegundos desde o
+#              registro anterior (uint32), seguido do conteudo de cada tipo:
+#     DEVICE_ADDED   -> eixos, botoes, direcionais (3 x uint16) + nome, guid e
+#                       nivel de energia (uint16 de tamanho + texto utf-8)
+#     DEVICE_REMOVED -> nada
+#     AXIS_ABSOLUTE  -> eixo (uint8) + valor quantizado (int16)
+#     AXIS_DELTA     -> eixo (uint8) + diferenca para o valor anterior (int16)
+#     BUTTON         -> botao (uint8) + estado (uint8)
+#     HAT            -> direcional (uint8) + x, y (2 x int8)
+#     TIME_GAP       -> nada (so avanca o tempo quando dt nao cabe em uint32)
+# -----------------------------------------------------------------------------
+import mmap
+import struct
+import time
+
+import pygame
+
+
+MAGIC = b"JOYREC\r\n"
+VERSION = 1
+
+HEADER = struct.Struct("<8sH")
+RECORD_HEADER = struct.Struct("<BHI")
+DEVICE_INFO = struct.Struct("<HHH")
+STRING_LENGTH = struct.Struct("<H")
+AXIS_RECORD = struct.Struct("<Bh")
+BUTTON_RECORD = struct.Struct("<BB")
+HAT_RECORD = struct.Struct("<Bbb")
+
+RECORD_DEVICE_ADDED = 1
+RECORD_DEVICE_REMOVED = 2
+RECORD_AXIS_ABSOLUTE = 3
+RECORD_AXIS_DELTA = 4
+RECORD_BUTTON = 5
+RECORD_HAT = 6
+RECORD_TIME_GAP = 7
+
+MAX_DT_US = 0xFFFFFFFF
+AXIS_SCALE = 32767
+
+
+def quantize_axis(value):
+    # Converte o eixo (-1.0 a 1.0) para int16
+    return max(-32768, min(32767, int(round(value * AXIS_SCALE))))
+
+
+# Ultimo estado gravado de cada joystick (para gravar apenas as mudancas)
+class RecordedState:
+    def __init__(self, num_axes, num_buttons, num_hats):
+        self.axes = [0] * num_axes
+        self.buttons = [0] * num_buttons
+        self.hats = [(0, 0)] * num_hats
+
+
+# Grava os eventos e as leituras de cada quadro em um arquivo binario compacto
+class SessionRecorder:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION))
+        self.start_time = time.perf_counter()
+        self.last_time_us = 0
+        self.states = {}  # instance_id -> RecordedState
+
+    def _write(self, record_type, instance_id, payload=b"", timestamp=None):
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        time_us = max(self.last_time_us, int((timestamp - self.start_time) * 1_000_000))
+        dt = time_us - self.last_time_us
+        while dt > MAX_DT_US:
+            self.file.write(RECORD_HEADER.pack(RECORD_TIME_GAP, 0, MAX_DT_US))
+            dt -= MAX_DT_US
+        self.last_time_us = time_us
+        self.file.write(RECORD_HEADER.pack(record_type, instance_id, dt) + payload)
+
+    def _write_string(self, text):
+        data = str(text).encode("utf-8")[:0xFFFF]
+        return STRING_LENGTH.pack(len(data)) + data
+
+    def record_device(self, joystick, timestamp=None):
+        instance_id = joystick.get_instance_id()
+        num_axes, num_buttons, num_hats = joystick.get_numaxes(), joystick.get_numbuttons(), joystick.get_numhats()
+        payload = (
+            DEVICE_INFO.pack(num_axes, num_buttons, num_hats)
+            + self._write_string(joystick.get_name())
+            + self._write_string(joystick.get_guid())
+            + self._write_string(joystick.get_power_level())
+        )
+        self._write(RECORD_DEVICE_ADDED, instance_id, payload, timestamp)
+        self.states[instance_id] = RecordedState(num_axes, num_buttons, num_hats)
+
+    def _record_axis(self, instance_id, state, axis, value, timestamp):
+        quantized = quantize_axis(value)
+        previous = state.axes[axis]
+        if quantized == previous:
+            return
+        delta = quantized - previous
+        if -32768 <= delta <= 32767:
+            self._write(RECORD_AXIS_DELTA, instance_id, AXIS_RECORD.pack(axis, delta), timestamp)
+        else:
+            self._write(RECORD_AXIS_ABSOLUTE, instance_id, AXIS_RECORD.pack(axis, quantized), timestamp)
+        state.axes[axis] = quantized
+
+    def _record_button(self, instance_id, state, button, pressed, timestamp):
+        pressed = 1 if pressed else 0
+        if state.buttons[button] != pressed:
+            self._write(RECORD_BUTTON, instance_id, BUTTON_RECORD.pack(button, pressed), timestamp)
+            state.buttons[button] = pressed
+
+    def _record_hat(self, instance_id, state, hat, value, timestamp):
+        value = (int(value[0]), int(value[1]))
+        if state.hats[hat] != value:
+            self._write(RECORD_HAT, instance_id, HAT_RECORD.pack(hat, value[0], value[1]), timestamp)
+            state.hats[hat] = value
+
+    def record_event(self, event, joysticks, timestamp=None):
+        # Grava um evento vindo de handle_event (chamar depois dele)
+        if event.type == pygame.JOYDEVICEREMOVED:
+            if self.states.pop(event.instance_id, None) is not None:
+                self._write(RECORD_DEVICE_REMOVED, event.instance_id, timestamp=timestamp)
+            return
+        if event.type not in (pygame.JOYAXISMOTION, pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP, pygame.JOYHATMOTION):
+            return
+
+        state = self.states.get(event.instance_id)
+        if state is None:
+            joystick = joysticks.get(event.instance_id)
+            if joystick is None:
+                return
+            self.record_device(joystick, timestamp)
+            state = self.states[event.instance_id]
+
+        if event.type == pygame.JOYAXISMOTION and event.axis < len(state.axes):
+            self._record_axis(event.instance_id, state, event.axis, event.value, timestamp)
+        elif event.type in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP) and event.button < len(state.buttons):
+            self._record_button(event.instance_id, state, event.button, event.type == pygame.JOYBUTTONDOWN, timestamp)
+        elif event.type == pygame.JOYHATMOTION and event.hat < len(state.hats):
+            self._record_hat(event.instance_id, state, event.hat, event.value, timestamp)
+
+    def record_state(self, joystick, timestamp=None):
+        # Grava o que as leituras get_axis/get_button/get_hat do quadro viram (so o que mudou)
+        instance_id = joystick.get_instance_id()
+        state = self.states.get(instance_id)
+        if state is None:
+            self.record_device(joystick, timestamp)
+            state = self.states[instance_id]
+        for i in range(len(state.axes)):
+            self._record_axis(instance_id, state, i, joystick.get_axis(i), timestamp)
+        for i in range(len(state.buttons)):
+            self._record_button(instance_id, state, i, joystick.get_button(i), timestamp)
+        for i in range(len(state.hats)):
+            self._record_hat(instance_id, state, i, joystick.get_hat(i), timestamp)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+# Joystick virtual alimentado pela gravacao, com a mesma interface usada por
+# display_joystick_info, draw_analog_stick e handle_triggers.
+class ReplayJoystick:
+    def __init__(self, instance_id, num_axes, num_buttons, num_hats, name, guid, power_level):
+        self.instance_id = instance_id
+        self.name = name
+        self.guid = guid
+        self.power_level = power_level
+        self.axes = [0] * num_axes  # valores quantizados (int16)
+        self.buttons = [0] * num_buttons
+        self.hats = [(0, 0)] * num_hats
+
+    def get_instance_id(self):
+        return self.instance_id
+
+    def get_name(self):
+        return self.name
+
+    def get_guid(self):
+        return self.guid
+
+    def get_power_level(self):
+        return self.power_level
+
+    def get_numaxes(self):
+        return len(self.axes)
+
+    def get_numbuttons(self):
+        return len(self.buttons)
+
+    def get_numhats(self):
+        return len(self.hats)
+
+    def get_axis(self, axis_number):
+        return self.axes[axis_number] / AXIS_SCALE
+
+    def get_button(self, button):
+        return self.buttons[button]
+
+    def get_hat(self, hat_number):
+        return self.hats[hat_number]
+
+    def rumble(self, low_frequency, high_frequency, duration):
+        return False  # um joystick gravado nao vibra
+
+    def stop_rumble(self):
+        pass
+
+
+# Reproduz uma gravacao lendo o arquivo direto do mmap.
+# - speed=1.0: tempo real; speed=4.0: 4x mais rapido; speed=None: passo a passo (step())
+class SessionReplay:
+    def __init__(self, path, speed=1.0):
+        self.path = path
+        self.speed = speed
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} não é uma gravação de joystick válida")
+
+        self.offset = HEADER.size
+        self.time_us = 0  # tempo da gravacao do ultimo registro aplicado
+        self.joysticks = {}  # instance_id -> ReplayJoystick (conectados agora)
+        self.devices = {}  # instance_id -> ReplayJoystick (todos ja conectados, para joystick())
+        self.start_time = None
+        self.finished = False
+
+    def _read_string(self, offset):
+        (length,) = STRING_LENGTH.unpack_from(self.data, offset)
+        offset += STRING_LENGTH.size
+        return self.data[offset:offset + length].decode("utf-8"), offset + length
+
+    def _peek_time_us(self):
+        if self.offset + RECORD_HEADER.size > len(self.data):
+            return None
+        _, _, dt = RECORD_HEADER.unpack_from(self.data, self.offset)
+        return self.time_us + dt
+
+    def step(self):
+        """
+        Aplica o proximo registro da gravacao.
+
+        :return: Lista de eventos do pygame equivalentes ao registro (pode ser vazia),
+            ou None quando a gravacao acabou. Cada evento leva `recorded_us`, o horario
+            do registro na gravacao.
+        """
+        if self.offset + RECORD_HEADER.size > len(self.data):
+            self.finished = True
+            return None
+
+        record_type, instance_id, dt = RECORD_HEADER.unpack_from(self.data, self.offset)
+        offset = self.offset + RECORD_HEADER.size
+        self.time_us += dt
+        events = []
+        joystick = self.joysticks.get(instance_id)
+
+        if record_type == RECORD_DEVICE_ADDED:
+            num_axes, num_buttons, num_hats = DEVICE_INFO.unpack_from(self.data, offset)
+            offset += DEVICE_INFO.size
+            name, offset = self._read_string(offset)
+            guid, offset = self._read_string(offset)
+            power_level, offset = self._read_string(offset)
+            joystick = ReplayJoystick(instance_id, num_axes, num_buttons, num_hats, name, guid, power_level)
+            self.joysticks[instance_id] = self.devices[instance_id] = joystick
+            # Na reproducao o device_index e o proprio instance_id (ver joystick())
+            events.append(pygame.event.Event(pygame.JOYDEVICEADDED, device_index=instance_id, instance_id=instance_id, guid=guid, recorded_us=self.time_us))
+        elif record_type == RECORD_DEVICE_REMOVED:
+            if self.joysticks.pop(instance_id, None) is not None:
+                events.append(pygame.event.Event(pygame.JOYDEVICEREMOVED, instance_id=instance_id, recorded_us=self.time_us))
+        elif record_type in (RECORD_AXIS_ABSOLUTE, RECORD_AXIS_DELTA):
+            axis, value = AXIS_RECORD.unpack_from(self.data, offset)
+            offset += AXIS_RECORD.size
+            if joystick is not None:
+                joystick.axes[axis] = value if record_type == RECORD_AXIS_ABSOLUTE else joystick.axes[axis] + value
+                events.append(pygame.event.Event(pygame.JOYAXISMOTION, instance_id=instance_id, joy=instance_id, axis=axis, value=joystick.get_axis(axis), recorded_us=self.time_us))
+        elif record_type == RECORD_BUTTON:
+            button, pressed = BUTTON_RECORD.unpack_from(self.data, offset)
+            offset += BUTTON_RECORD.size
+            if joystick is not None:
+                joystick.buttons[button] = pressed
+                event_type = pygame.JOYBUTTONDOWN if pressed else pygame.JOYBUTTONUP
+                events.append(pygame.event.Event(event_type, instance_id=instance_id, joy=instance_id, button=button, recorded_us=self.time_us))
+        elif record_type == RECORD_HAT:
+            hat, x, y = HAT_RECORD.unpack_from(self.data, offset)
+            offset += HAT_RECORD.size
+            if joystick is not None:
+                joystick.hats[hat] = (x, y)
+                events.append(pygame.event.Event(pygame.JOYHATMOTION, instance_id=instance_id, joy=instance_id, hat=hat, value=(x, y), recorded_us=self.time_us))
+        elif record_type != RECORD_TIME_GAP:
+            raise ValueError(f"Registro desconhecido ({record_type}) na posição {self.offset} de {self.path}")
+
+        self.offset = offset
+        return events
+
+    def joystick(self, device_index):
+        # Substitui pygame.joystick.Joystick no JOYDEVICEADDED da reproducao: devolve o
+        # joystick virtual, mesmo que ele ja tenha saido no mesmo lote de eventos
+        return self.devices[device_index]
+
+    def advance(self, now=None):
+        """
+        Aplica todos os registros cujo horario ja chegou (modo tempo real ou acelerado).
+
+        :param now: Horario atual (time.perf_counter); o primeiro advance() marca o inicio.
+        :return: Lista dos eventos do pygame gerados pelos registros aplicados.
+        """
+        if self.speed is None:
+            return []  # modo passo a passo: so avanca com step()
+        if now is None:
+            now = time.perf_counter()
+        if self.start_time is None:
+            self.start_time = now
+
+        target_us = (now - self.start_time) * self.speed * 1_000_000
+        events = []
+        while True:
+            next_time_us = self._peek_time_us()
+            if next_time_us is None:
+                self.finished = True
+                break
+            if next_time_us > target_us:
+                break
+            events.extend(self.step())
+        return events
+
+    def rewind(self):
+        self.offset = HEADER.size
+        self.time_us = 0
+        self.joysticks.clear()
+        self.devices.clear()
+        self.start_time = None
+        self.finished = False
+
+    def close(self):
+        self.data.close()
+        self.file.close()
@@ -0,0 +1,194 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: stick_analytics.py
+# Descrição: Analise de qualidade dos analogicos calculada de forma incremental
+#            sobre as amostras do joystick_sampler: media/variancia (Welford),
+#            drift na posicao de repouso, envelope min/max e histograma polar
+#            para circularidade e zona morta externa.
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+import math
+
+import numpy as np
+
+from controller_profiles import map_axis
+from stick_heatmap import StickHeatmap
+
+
+# Media e variancia de um eixo, atualizadas por lotes (Welford / Chan et al.)
+class RunningStats:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        batch_count = len(values)
+        if batch_count == 0:
+            return
+        batch_mean = float(values.mean())
+        batch_m2 = float(((values - batch_mean) ** 2).sum())
+
+        total = self.count + batch_count
+        delta = batch_mean - self.mean
+        self.mean += delta * batch_count / total
+        self.m2 += batch_m2 + delta * delta * self.count * batch_count / total
+        self.count = total
+
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def std(self):
+        return math.sqrt(self.variance())
+
+
+# Estatisticas de um analogico (par de eixos X/Y)
+class StickAnalytics:
+    def __init__(self, axis_x, axis_y, rest_radius=0.15, angle_bins=36, heatmap_size=None):
+        self.axis_x = axis_x
+        self.axis_y = axis_y
+        # Amostras com raio menor que rest_radius sao consideradas "em repouso"
+        self.rest_radius = rest_radius
+        self.angle_bins = angle_bins
+
+        self.x = RunningStats()
+        self.y = RunningStats()
+        self.rest_x = RunningStats()
+        self.rest_y = RunningStats()
+        self.min = np.full(2, np.inf)
+        self.max = np.full(2, -np.inf)
+
+        # Histograma polar: amostras e maior raio alcancado em cada faixa de angulo
+        self.bin_counts = np.zeros(angle_bins, dtype=np.int64)
+        self.bin_max_radius = np.zeros(angle_bins)
+
+        # Mapa de calor/rastro opcional, alimentado pelas mesmas amostras
+        self.heatmap = StickHeatmap(*heatmap_size) if heatmap_size is not None else None
+
+    def update(self, x, y):
+        if len(x) == 0:
+            return
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+
+        self.x.update(x)
+        self.y.update(y)
+        if self.heatmap is not None:
+            self.heatmap.accumulate(x, y)
+        np.minimum(self.min, (x.min(), y.min()), out=self.min)
+        np.maximum(self.max, (x.max(), y.max()), out=self.max)
+
+        radius = np.hypot(x, y)
+        at_rest = radius < self.rest_radius
+        self.rest_x.update(x[at_rest])
+        self.rest_y.update(y[at_rest])
+
+        # So as amostras fora do repouso dizem algo sobre o contorno do curso
+        moving = ~at_rest
+        angle = np.arctan2(y[moving], x[moving]) % (2 * math.pi)
+        bins = (angle * self.angle_bins / (2 * math.pi)).astype(np.int64) % self.angle_bins
+        self.bin_counts += np.bincount(bins, minlength=self.angle_bins)
+        np.maximum.at(self.bin_max_radius, bins, radius[moving])
+
+    def drift(self):
+        # Distancia do centro ate a posicao media de repouso
+        return math.hypot(self.rest_x.mean, self.rest_y.mean)
+
+    def rest_noise(self):
+        return math.hypot(self.rest_x.std(), self.rest_y.std())
+
+    def coverage(self):
+        # Fracao das faixas de angulo que ja foram visitadas
+        return float((self.bin_counts > 0).mean())
+
+    def circularity_error(self):
+        # Desvio medio do contorno alcancado em relacao a um circulo perfeito de raio 1
+        reached = self.bin_max_radius[self.bin_counts > 0]
+        if len(reached) == 0:
+            return math.nan
+        return float(np.abs(reached - 1.0).mean())
+
+    def outer_deadzone(self):
+        # Quanto falta, em media, para o analogico chegar ao curso total
+        reached = self.bin_max_radius[self.bin_counts > 0]
+        if len(reached) == 0:
+            return math.nan
+        return float(np.clip(1.0 - reached, 0.0, None).mean())
+
+    def summary(self):
+        return {
+            "axes": [self.axis_x, self.axis_y],
+            "samples": self.x.count,
+            "mean": [round(self.x.mean, 5), round(self.y.mean, 5)],
+            "std": [round(self.x.std(), 5), round(self.y.std(), 5)],
+            "min": [round(float(value), 5) for value in self.min] if self.x.count else None,
+            "max": [round(float(value), 5) for value in self.max] if self.x.count else None,
+            "rest_samples": self.rest_x.count,
+            "drift": round(self.drift(), 5),
+            "rest_noise": round(self.rest_noise(), 5),
+            "coverage": round(self.coverage(), 4),
+            "circularity_error": round(self.circularity_error(), 5),
+            "outer_deadzone": round(self.outer_deadzone(), 5),
+        }
+
+
+# Pares de eixos tratados como analogicos (mesmo padrao de display_joystick_info)
+def default_sticks(num_axes):
+    sticks = []
+    if num_axes > 1:
+        sticks.append((0, 1))  # Analógico esquerdo
+    if num_axes > 3:
+        sticks.append((2, 3))  # Analógico direito
+    return sticks
+
+
+# Le as amostras novas de cada joystick no amostrador e atualiza as estatisticas
+class StickAnalyticsEngine:
+    def __init__(self, rest_radius=0.15, angle_bins=36, heatmap_size=None, stick_axes=None):
+        self.rest_radius = rest_radius
+        self.angle_bins = angle_bins
+        # (largura, altura) do mapa de calor de cada analogico; None desliga
+        self.heatmap_size = heatmap_size
+        # Funcao joystick -> [(X, Y), ...], cada um (eixo, metade, invertido) como em
+        # ControllerProfile.axes; padrao: layout fixo (default_sticks), sem inversao
+        self.stick_axes = stick_axes or (lambda joystick: [
+            ((x, None, False), (y, None, False)) for x, y in default_sticks(joystick.get_numaxes())
+        ])
+        self.devices = {}  # instance_id -> {"buffer", "position", "lost", "sticks"}
+
+    def update(self, sampler):
+        # Esquece os joysticks que foram desconectados
+        for instance_id in list(self.devices):
+            if instance_id not in sampler.devices:
+                del self.devices[instance_id]
+
+        for instance_id, device in list(sampler.devices.items()):
+            state = self.devices.get(instance_id)
+            if state is None or state["buffer"] is not device.buffer:
+                num_axes = device.buffer.axes.shape[1]
+                axes_pairs = [(x, y) for x, y in self.stick_axes(device.joystick) if x[0] < num_axes and y[0] < num_axes]
+                state = {
+                    "buffer": device.buffer,
+                    "position": 0,
+                    "lost": 0,
+                    "sticks": [StickAnalytics(x[0], y[0], self.rest_radius, self.angle_bins, self.heatmap_size) for x, y in axes_pairs],
+                    "mappings": axes_pairs,
+                }
+                self.devices[instance_id] = state
+
+            _, axes, _, _, state["position"], lost = device.buffer.read_since(state["position"])
+            state["lost"] += lost
+            # Inversao e meio eixo do perfil aplicados as colunas brutas do amostrador
+            for stick, ((axis_x, half_x, inverted_x), (axis_y, half_y, inverted_y)) in zip(state["sticks"], state["mappings"]):
+                stick.update(map_axis(axes[:, axis_x], half_x, inverted_x), map_axis(axes[:, axis_y], half_y, inverted_y))
+
+    def sticks(self, instance_id):
+        state = self.devices.get(instance_id)
+        return state["sticks"] if state is not None else []
+
+    def summary(self, instance_id):
+        return [stick.summary() for stick in self.sticks(instance_id)]
+
+    def reset(self, instance_id):
+        self.devices.pop(instance_id, None)
@@ -0,0 +1,102 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: stick_heatmap.py
+# Descrição: Mapa de calor acumulado e rastro (que vai apagando) das posicoes
+#            de um analogico. As posicoes entram em um histograma 2D do NumPy e
+#            a imagem vai para a tela com um unico surfarray.blit_array.
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+import time
+
+import numpy as np
+import pygame
+
+
+# Modos de visualizacao do plano do analogico (tecla H alterna)
+VIEW_OFF = 0
+VIEW_TRAIL = 1
+VIEW_HEATMAP = 2
+VIEW_BOTH = 3
+VIEW_MODES = (VIEW_OFF, VIEW_TRAIL, VIEW_HEATMAP, VIEW_BOTH)
+
+
+def build_colormap(stops, size=256):
+    # Tabela de cores (size x 3) interpolando linearmente entre as cores de `stops`
+    positions = np.linspace(0, 1, len(stops))
+    samples = np.linspace(0, 1, size)
+    stops = np.asarray(stops, dtype=np.float64)
+    return np.stack([np.interp(samples, positions, stops[:, channel]) for channel in range(3)], axis=1).astype(np.uint8)
+
+
+# Preto fica transparente (colorkey), entao o fundo do painel aparece onde nao ha dados
+HEATMAP_COLORMAP = build_colormap([(0, 0, 0), (0, 0, 160), (200, 0, 0), (255, 200, 0), (255, 255, 255)])
+TRAIL_COLOR = np.array([0, 255, 255], dtype=np.float32)  # Ciano
+
+# Intervalo (s) a que trail_decay se refere: um quadro a 30 FPS
+TRAIL_REFERENCE_DT = 1.0 / 30
+
+
+class StickHeatmap:
+    def __init__(self, width, height, trail_decay=0.85):
+        self.width = width
+        self.height = height
+        # A cada TRAIL_REFERENCE_DT o rastro e multiplicado por trail_decay; o
+        # decaimento segue o tempo decorrido, entao o rastro dura o mesmo em qualquer ritmo
+        self.trail_decay = trail_decay
+        self.last_render = None
+        self.histogram = np.zeros((width, height), dtype=np.float32)  # indexado [x, y] como o surfarray
+        self.trail = np.zeros((width, height), dtype=np.float32)
+        self.rgb = np.zeros((width, height, 3), dtype=np.uint8)
+        self.surface = pygame.Surface((width, height))
+        self.surface.set_colorkey((0, 0, 0))
+
+    def accumulate(self, x, y):
+        # Converte os eixos (-1 a 1) para pixels, do mesmo jeito que draw_analog_stick
+        if len(x) == 0:
+            return
+        px = np.clip(((np.asarray(x) + 1) * (self.width - 1) / 2).round().astype(np.intp), 0, self.width - 1)
+        py = np.clip(((np.asarray(y) + 1) * (self.height - 1) / 2).round().astype(np.intp), 0, self.height - 1)
+
+        # Histograma 2D em uma chamada: conta os indices lineares e soma na matriz
+        flat = px * self.height + py
+        self.histogram += np.bincount(flat, minlength=self.width * self.height).reshape(self.width, self.height)
+        self.trail.ravel()[flat] = 1.0
+
+    def clear(self):
+        self.histogram.fill(0)
+        self.trail.fill(0)
+
+    def render(self, mode=VIEW_BOTH, invert_y=False, now=None):
+        """
+        Monta a imagem do quadro e aplica o decaimento do rastro.
+
+        :param mode: VIEW_TRAIL, VIEW_HEATMAP ou VIEW_BOTH.
+        :param invert_y: Espelha o eixo Y, igual a opcao "Inverter eixo Y".
+        :param now: Horario atual (time.perf_counter), usado no decaimento do rastro.
+        :return: pygame.Surface (width x height) com preto transparente.
+        """
+        if mode in (VIEW_HEATMAP, VIEW_BOTH):
+            # Escala logaritmica: as regioes pouco visitadas continuam visiveis
+            peak = float(self.histogram.max())
+            if peak > 0:
+                levels = np.log1p(self.histogram) * (255 / np.log1p(peak))
+                self.rgb[...] = HEATMAP_COLORMAP[levels.astype(np.uint8)]
+            else:
+                self.rgb.fill(0)
+        else:
+            self.rgb.fill(0)
+
+        if mode in (VIEW_TRAIL, VIEW_BOTH):
+            # O rastro e somado por cima do mapa de calor
+            trail = (self.trail[..., np.newaxis] * TRAIL_COLOR).astype(np.uint16)
+            np.minimum(self.rgb + trail, 255, out=trail)
+            self.rgb[...] = trail
+
+        now = time.perf_counter() if now is None else now
+        elapsed = 0.0 if self.last_render is None else now - self.last_render
+        self.last_render = now
+        self.trail *= self.trail_decay ** (elapsed / TRAIL_REFERENCE_DT)
+
+        pygame.surfarray.blit_array(self.surface, self.rgb[:, ::-1] if invert_y else self.rgb)
+        return self.surface
@@ -0,0 +1,467 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: telemetry.py
+# Descrição: Publicacao do estado dos joysticks (eixos, botoes, direcionais e
+#            nivel de energia) por UDP, para um painel supervisor acompanhar
+#            varias bancadas. Os quadros sao binarios, em lote (todos os
+#            joysticks em um datagrama) e so com o que mudou desde o anterior.
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+#
+# Protocolo:
+#   O supervisor envia SUBSCRIBE para a porta da bancada (e repete a cada poucos
+#   segundos; quem para de repetir e esquecido). A bancada responde com quadros:
+#     cabecalho: MAGIC (2 bytes) + versao (uint8) + flags (uint8) + estacao
+#                (uint16) + sequencia (uint32) + timestamp (float64)
+#     blocos, um por joystick: instance_id (uint16) + tipo (uint8)
+#       DEVICE_FULL / DEVICE_DELTA -> energia (uint8)
+#           + n eixos (uint8) + n x [eixo (uint8) + valor quantizado (int16)]
+#           + n botoes (uint8, 0 = sem mudanca) + mapa de bits (8 por byte)
+#           + n direcionais (uint8) + n x [direcional (uint8) + x, y (2 x int8)]
+#       DEVICE_REMOVED -> nada
+#   Um quadro com FLAG_KEYFRAME traz o estado completo de todos os joysticks e
+#   substitui o que o supervisor sabia da estacao. Ele e enviado periodicamente,
+#   quando alguem se inscreve, quando um envio falha (socket cheio) e quando o
+#   supervisor pede (KEYFRAME_REQUEST) ao detectar um buraco na sequencia.
+#
+# Uso (supervisor):
+#   python telemetry.py 127.0.0.1:47800 192.168.0.21:47800
+# -----------------------------------------------------------------------------
+import argparse
+import select
+import socket
+import struct
+import threading
+import time
+
+from session_recorder import AXIS_SCALE, quantize_axis
+
+
+MAGIC = b"JT"
+VERSION = 1
+DEFAULT_PORT = 47800
+
+FRAME_HEADER = struct.Struct("<2sBBHId")
+DEVICE_HEADER = struct.Struct("<HB")
+POWER_LEVEL = struct.Struct("<B")
+COUNT = struct.Struct("<B")
+AXIS_VALUE = struct.Struct("<Bh")
+HAT_VALUE = struct.Struct("<Bbb")
+
+FLAG_KEYFRAME = 0x01
+
+DEVICE_FULL = 1
+DEVICE_DELTA = 2
+DEVICE_REMOVED = 3
+
+# Mensagens do supervisor para a bancada
+SUBSCRIBE = b"JTSUB"
+UNSUBSCRIBE = b"JTUNS"
+KEYFRAME_REQUEST = b"JTKEY"
+
+# Nao ultrapassa o MTU tipico (evita fragmentacao IP)
+MAX_DATAGRAM = 1200
+
+POWER_LEVELS = ["unknown", "empty", "low", "medium", "full", "wired", "max"]
+
+
+def pack_buttons(buttons):
+    # Botoes em mapa de bits (8 botoes por byte)
+    data = bytearray((len(buttons) + 7) // 8)
+    for i, pressed in enumerate(buttons):
+        if pressed:
+            data[i >> 3] |= 1 << (i & 7)
+    return bytes(data)
+
+
+def unpack_buttons(data, count):
+    return [(data[i >> 3] >> (i & 7)) & 1 for i in range(count)]
+
+
+# Estado de um joystick como ele foi enviado (ou recebido)
+class WireState:
+    def __init__(self, axes=(), buttons=(), hats=(), power_level=0):
+        self.axes = list(axes)  # valores quantizados (int16)
+        self.buttons = tuple(buttons)  # 0 ou 1
+        self.hats = list(hats)  # (x, y)
+        self.power_level = power_level
+
+
+def encode_device(instance_id, state, previous):
+    """
+    Codifica um joystick. Sem `previous`, envia o estado completo.
+
+    :return: Bytes do bloco, ou None se nada mudou.
+    """
+    if previous is None:
+        axes = list(enumerate(state.axes))
+        buttons = state.buttons
+        hats = list(enumerate(state.hats))
+        kind = DEVICE_FULL
+    else:
+        axes = [(i, value) for i, value in enumerate(state.axes)
+                if i >= len(previous.axes) or previous.axes[i] != value]
+        buttons = state.buttons if state.buttons != previous.buttons else ()
+        hats = [(i, value) for i, value in enumerate(state.hats)
+                if i >= len(previous.hats) or previous.hats[i] != value]
+        if not axes and not buttons and not hats and state.power_level == previous.power_level:
+            return None
+        kind = DEVICE_DELTA
+
+    parts = [DEVICE_HEADER.pack(instance_id, kind), POWER_LEVEL.pack(state.power_level), COUNT.pack(len(axes))]
+    parts.extend(AXIS_VALUE.pack(i, value) for i, value in axes)
+    parts.append(COUNT.pack(len(buttons)))
+    parts.append(pack_buttons(buttons))
+    parts.append(COUNT.pack(len(hats)))
+    parts.extend(HAT_VALUE.pack(i, x, y) for i, (x, y) in hats)
+    return b"".join(parts)
+
+
+# Le os buffers do amostrador e envia os quadros em uma thread propria
+class TelemetryPublisher(threading.Thread):
+    def __init__(self, sampler, port=DEFAULT_PORT, host="0.0.0.0", rate_hz=30, station_id=0,
+                 keyframe_interval=2.0, subscriber_timeout=10.0):
+        """
+        :param sampler: JoystickSampler de onde vem o estado (a tela nao participa do envio).
+        :param port: Porta UDP onde os supervisores se inscrevem.
+        :param rate_hz: Quadros por segundo enviados.
+        :param station_id: Numero da bancada (identifica a origem no supervisor).
+        :param keyframe_interval: Intervalo entre quadros com o estado completo.
+        :param subscriber_timeout: Segundos sem SUBSCRIBE ate esquecer o supervisor.
+        """
+        super().__init__(name="telemetry-publisher", daemon=True)
+        self.sampler = sampler
+        self.rate_hz = rate_hz
+        self.station_id = station_id
+        self.keyframe_interval = keyframe_interval
+        self.subscriber_timeout = subscriber_timeout
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.socket.setblocking(False)
+        self.address = self.socket.getsockname()
+
+        self.subscribers = {}  # endereco -> horario do ultimo SUBSCRIBE
+        self.sent_states = {}  # instance_id -> WireState enviado por ultimo
+        self.power_levels = {}  # instance_id -> indice em POWER_LEVELS
+        self.sequence = 0
+        self.last_keyframe = 0.0
+        self.keyframe_pending = True
+        self.stopped = threading.Event()
+
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.send_failures = 0  # envios recusados (buffer do socket cheio)
+
+    def set_power_level(self, instance_id, power_level):
+        # Chamado pelo loop principal (get_power_level e lento em alguns drivers)
+        self.power_levels[instance_id] = POWER_LEVELS.index(power_level) if power_level in POWER_LEVELS else 0
+
+    def _read_control(self, now):
+        # Mensagens dos supervisores: inscricao, cancelamento e pedido de quadro completo
+        while True:
+            try:
+                message, address = self.socket.recvfrom(64)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return  # ex: ICMP "porta inalcancavel" de um supervisor que fechou
+            if message == SUBSCRIBE:
+                if address not in self.subscribers:
+                    self.keyframe_pending = True
+                self.subscribers[address] = now
+            elif message == UNSUBSCRIBE:
+                self.subscribers.pop(address, None)
+            elif message == KEYFRAME_REQUEST and address in self.subscribers:
+                self.keyframe_pending = True
+
+    def _current_states(self):
+        states = {}
+        for instance_id, device in list(self.sampler.devices.items()):
+            sample = device.buffer.latest()
+            if sample is None:
+                continue
+            _, axes, buttons, hats = sample
+            states[instance_id] = WireState(
+                (quantize_axis(float(value)) for value in axes),
+                (int(value) for value in buttons),
+                ((int(x), int(y)) for x, y in hats),
+                self.power_levels.get(instance_id, 0),
+            )
+        return states
+
+    def build_frames(self, now, keyframe=False):
+        # Monta os datagramas deste quadro (varios, se nao couber em MAX_DATAGRAM)
+        states = self._current_states()
+        blocks = []
+        for instance_id, state in states.items():
+            previous = None if keyframe else self.sent_states.get(instance_id)
+            block = encode_device(instance_id, state, previous)
+            if block is not None:
+                blocks.append(block)
+        if not keyframe:
+            blocks.extend(DEVICE_HEADER.pack(instance_id, DEVICE_REMOVED)
+                          for instance_id in self.sent_states if instance_id not in states)
+        self.sent_states = states
+        if not blocks and not keyframe:
+            return []
+
+        flags = FLAG_KEYFRAME if keyframe else 0
+        frames = []
+        current = []
+        size = FRAME_HEADER.size
+        for block in blocks + [None]:
+            if block is None or (current and size + len(block) > MAX_DATAGRAM):
+                frames.append(FRAME_HEADER.pack(MAGIC, VERSION, flags, self.station_id, self.sequence, now) + b"".join(current))
+                self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+                # So o primeiro datagrama de um quadro completo zera o estado no supervisor
+                flags &= ~FLAG_KEYFRAME
+                current = []
+                size = FRAME_HEADER.size
+            if block is not None:
+                current.append(block)
+                size += len(block)
+        return frames
+
+    def publish(self, now=None):
+        now = time.perf_counter() if now is None else now
+        self._read_control(now)
+        for address, last_seen in list(self.subscribers.items()):
+            if now - last_seen > self.subscriber_timeout:
+                del self.subscribers[address]
+        if not self.subscribers:
+            self.keyframe_pending = True  # o proximo a se inscrever recebe tudo
+            return 0
+
+        keyframe = self.keyframe_pending or now - self.last_keyframe >= self.keyframe_interval
+        frames = self.build_frames(now, keyframe)
+        if keyframe:
+            self.keyframe_pending = False
+            self.last_keyframe = now
+
+        for frame in frames:
+            for address in list(self.subscribers):
+                try:
+                    self.socket.sendto(frame, address)
+                    self.bytes_sent += len(frame)
+                except (BlockingIOError, InterruptedError):
+                    # Buffer cheio: o delta se perdeu, entao o proximo quadro e completo
+                    self.send_failures += 1
+                    self.keyframe_pending = True
+                except OSError:
+                    self.subscribers.pop(address, None)
+            self.frames_sent += 1
+        return len(frames)
+
+    def run(self):
+        period = 1.0 / self.rate_hz
+        next_time = time.perf_counter()
+        while not self.stopped.is_set():
+            self.publish()
+            next_time += period
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                # Acorda antes se chegar uma mensagem de controle
+                select.select([self.socket], [], [], delay)
+            else:
+                next_time = time.perf_counter()
+
+    def stop(self):
+        self.stopped.set()
+        if self.is_alive():
+            self.join(timeout=1.0)
+        self.socket.close()
+
+
+# Estado de um joystick remoto, ja decodificado
+class RemoteJoystickState:
+    def __init__(self):
+        self.axes = []  # -1.0 a 1.0
+        self.buttons = []
+        self.hats = []
+        self.power_level = "unknown"
+        self.updated_at = None
+
+    def apply(self, kind, power_level, axes, buttons, hats, timestamp):
+        if kind == DEVICE_FULL:
+            self.axes = [0.0] * len(axes)
+            self.hats = [(0, 0)] * len(hats)
+        for i, value in axes:
+            if i >= len(self.axes):
+                self.axes.extend([0.0] * (i + 1 - len(self.axes)))
+            self.axes[i] = value / AXIS_SCALE
+        if buttons is not None:
+            self.buttons = buttons
+        for i, value in hats:
+            if i >= len(self.hats):
+                self.hats.extend([(0, 0)] * (i + 1 - len(self.hats)))
+            self.hats[i] = value
+        self.power_level = POWER_LEVELS[power_level] if power_level < len(POWER_LEVELS) else "unknown"
+        self.updated_at = timestamp
+
+
+class TelemetryDecoder:
+    def __init__(self):
+        # Origem = (endereco de quem enviou, estacao): duas bancadas com o mesmo
+        # station_id nao se misturam
+        self.stations = {}  # origem -> {instance_id: RemoteJoystickState}
+        self.next_sequence = {}  # origem -> sequencia esperada
+        self.synced = set()  # origens que ja receberam um quadro completo
+        self.gaps = 0
+        self.invalid = 0
+
+    def decode(self, datagram, address=None):
+        """
+        Aplica um datagrama ao estado conhecido.
+
+        :param address: Endereco (host, porta) de quem enviou o datagrama.
+        :return: ((endereco, estacao), precisa_de_quadro_completo), ou None se o
+            datagrama for invalido.
+        """
+        if len(datagram) < FRAME_HEADER.size:
+            self.invalid += 1
+            return None
+        magic, version, flags, station, sequence, timestamp = FRAME_HEADER.unpack_from(datagram)
+        if magic != MAGIC or version != VERSION:
+            self.invalid += 1
+            return None
+
+        source = (address, station)
+        expected = self.next_sequence.get(source)
+        self.next_sequence[source] = (sequence + 1) & 0xFFFFFFFF
+        if flags & FLAG_KEYFRAME:
+            self.stations[source] = {}
+            self.synced.add(source)
+        elif expected is not None and sequence != expected:
+            # Perdeu um quadro: o estado fica incorreto ate o proximo quadro completo
+            self.gaps += 1
+            self.synced.discard(source)
+        devices = self.stations.setdefault(source, {})
+
+        offset = FRAME_HEADER.size
+        try:
+            while offset < len(datagram):
+                instance_id, kind = DEVICE_HEADER.unpack_from(datagram, offset)
+                offset += DEVICE_HEADER.size
+                if kind == DEVICE_REMOVED:
+                    devices.pop(instance_id, None)
+                    continue
+                (power_level,) = POWER_LEVEL.unpack_from(datagram, offset)
+                offset += POWER_LEVEL.size
+                (count,) = COUNT.unpack_from(datagram, offset)
+                offset += COUNT.size
+                axes = []
+                for _ in range(count):
+                    axes.append(AXIS_VALUE.unpack_from(datagram, offset))
+                    offset += AXIS_VALUE.size
+                (count,) = COUNT.unpack_from(datagram, offset)
+                offset += COUNT.size
+                length = (count + 7) // 8
+                if offset + length > len(datagram):
+                    raise struct.error("mapa de botoes incompleto")
+                buttons = unpack_buttons(datagram[offset:offset + length], count) if count else None
+                offset += length
+                (count,) = COUNT.unpack_from(datagram, offset)
+                offset += COUNT.size
+                hats = []
+                for _ in range(count):
+                    i, x, y = HAT_VALUE.unpack_from(datagram, offset)
+                    hats.append((i, (x, y)))
+                    offset += HAT_VALUE.size
+                devices.setdefault(instance_id, RemoteJoystickState()).apply(kind, power_level, axes, buttons, hats, timestamp)
+        except struct.error:
+            self.invalid += 1
+            self.synced.discard(source)
+        return source, source not in self.synced
+
+
+# Lado do supervisor: inscreve-se em uma ou mais bancadas e decodifica os quadros
+class TelemetrySubscriber:
+    def __init__(self, publishers, bind=("0.0.0.0", 0), renew_interval=3.0):
+        """
+        :param publishers: Lista de (host, porta) das bancadas.
+        :param renew_interval: Intervalo entre os SUBSCRIBE repetidos.
+        """
+        self.publishers = list(publishers)
+        self.renew_interval = renew_interval
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(bind)
+        self.decoder = TelemetryDecoder()
+        self.last_subscribe = None
+        self.last_keyframe_request = {}
+
+    def subscribe(self):
+        for address in self.publishers:
+            self.socket.sendto(SUBSCRIBE, address)
+        self.last_subscribe = time.perf_counter()
+
+    def poll(self, timeout=0.1):
+        # Recebe e aplica todos os datagramas disponiveis; retorna quantos chegaram
+        now = time.perf_counter()
+        if self.last_subscribe is None or now - self.last_subscribe >= self.renew_interval:
+            self.subscribe()
+        received = 0
+        while True:
+            readable, _, _ = select.select([self.socket], [], [], timeout if received == 0 else 0)
+            if not readable:
+                return received
+            try:
+                datagram, address = self.socket.recvfrom(65535)
+            except ConnectionResetError:
+                continue  # bancada fora do ar (ICMP)
+            received += 1
+            result = self.decoder.decode(datagram, address)
+            if result is not None and result[1]:
+                # Pede um quadro completo, no maximo um pedido por segundo por bancada
+                if now - self.last_keyframe_request.get(address, 0.0) >= 1.0:
+                    self.socket.sendto(KEYFRAME_REQUEST, address)
+                    self.last_keyframe_request[address] = now
+
+    @property
+    def stations(self):
+        return self.decoder.stations
+
+    def close(self):
+        for address in self.publishers:
+            try:
+                self.socket.sendto(UNSUBSCRIBE, address)
+            except OSError:
+                pass
+        self.socket.close()
+
+
+def parse_address(text):
+    host, _, port = text.rpartition(":")
+    return (host or "127.0.0.1", int(port) if port else DEFAULT_PORT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Supervisor: mostra o estado dos joysticks das bancadas.")
+    parser.add_argument("publishers", nargs="+", help="bancadas no formato host:porta")
+    parser.add_argument("--interval", type=float, default=1.0, help="intervalo entre as impressoes (s)")
+    args = parser.parse_args()
+
+    subscriber = TelemetrySubscriber([parse_address(text) for text in args.publishers])
+    last_print = 0.0
+    try:
+        while True:
+            subscriber.poll()
+            if time.perf_counter() - last_print < args.interval:
+                continue
+            last_print = time.perf_counter()
+            for (address, station), devices in sorted(subscriber.stations.items()):
+                for instance_id, state in sorted(devices.items()):
+                    axes = " ".join(f"{value:+.2f}" for value in state.axes)
+                    pressed = [i for i, value in enumerate(state.buttons) if value]
+                    print(f"estação {station} ({address[0]}:{address[1]}) joystick {instance_id}: eixos [{axes}] botões {pressed} "
+                          f"direcionais {state.hats} energia {state.power_level}")
+            print(f"-- buracos na sequência: {subscriber.decoder.gaps}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        subscriber.close()
+
+
+if __name__ == "__main__":
+    main()
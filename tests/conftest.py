@@ -0,0 +1,12 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: conftest.py
+# Descrição: Configuracao dos testes: os modulos do projeto ficam na pasta de
+#            cima (python -m pytest tests).
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,85 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: test_controller_profiles.py
+# Descrição: Ida e volta do cache compilado de perfis: compile_profiles ->
+#            ProfileDatabase.lookup, cache truncado, GUID com CRC do nome e
+#            pasta de cache sem permissao de escrita.
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+import os
+
+from controller_profiles import HEADER, ProfileDatabase, compile_profiles, sources_signature
+
+
+# GUID do gamecontrollerdb (bytes 2-3, o CRC do nome, zerados)
+WHEEL_GUID = "03000000412300003780000000000000"
+# O mesmo controle como o SDL 2.26+ reporta, com o CRC do nome nos bytes 2-3
+WHEEL_GUID_WITH_CRC = "0300a1b2412300003780000000000000"
+PS2_GUID = "03000000100800000100000000000000"
+
+
+def write_sources(tmp_path, extra=0):
+    path = tmp_path / "perfis.txt"
+    lines = [
+        "# comentario",
+        f"{WHEEL_GUID},Volante Arduino,leftx:a0,righttrigger:+a1,lefttrigger:-a1,a:b0,",
+        f"{PS2_GUID},PS2 paralelo,leftx:a0,lefty:a1,rightx:a3,righty:a2~,a:b2,dpup:h0.1,",
+        "linha sem guid valido,Nada,a:b0,",
+    ]
+    # Muitos perfis para forcar colisoes na sondagem linear
+    lines += [f"05000000{i:08x}0000000000000000,Controle {i},a:b0,leftx:a{i % 4}," for i in range(extra)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return [str(path)]
+
+
+def test_compiled_cache_round_trip(tmp_path):
+    sources = write_sources(tmp_path, extra=200)
+    cache_path = str(tmp_path / "cache" / "perfis.bin")
+    assert compile_profiles(sources, cache_path) == 202
+
+    database = ProfileDatabase(sources, cache_path)
+    wheel = database.lookup(WHEEL_GUID)
+    assert wheel.name == "Volante Arduino"
+    assert wheel.axes["righttrigger"] == (1, "+", False)
+    ps2 = database.lookup(PS2_GUID)
+    assert ps2.stick("right") == (3, 2)
+    assert ps2.axes["righty"] == (2, None, True)
+    assert ps2.hats["dpup"] == (0, 1)
+    for i in (0, 57, 199):
+        assert database.lookup(f"05000000{i:08x}0000000000000000").name == f"Controle {i}"
+    assert database.lookup("05000000ffffffff0000000000000000") is None
+    assert database.lookup("nao e um guid") is None
+    database.close()
+
+
+def test_guid_with_name_crc_falls_back_to_zeroed_crc(tmp_path):
+    sources = write_sources(tmp_path)
+    database = ProfileDatabase(sources, str(tmp_path / "perfis.bin"))
+    assert database.lookup(WHEEL_GUID_WITH_CRC).name == "Volante Arduino"
+    database.close()
+
+
+def test_truncated_cache_is_recompiled(tmp_path):
+    sources = write_sources(tmp_path, extra=50)
+    cache_path = str(tmp_path / "perfis.bin")
+    compile_profiles(sources, cache_path, sources_signature(sources))
+    full_size = os.path.getsize(cache_path)
+
+    for size in (0, HEADER.size - 3, HEADER.size + 5):
+        with open(cache_path, "r+b") as file:
+            file.truncate(size)
+        database = ProfileDatabase(sources, cache_path)
+        assert database.lookup(PS2_GUID).name == "PS2 paralelo"
+        database.close()
+        assert os.path.getsize(cache_path) == full_size
+
+
+def test_unwritable_cache_dir_builds_table_in_memory(tmp_path):
+    sources = write_sources(tmp_path)
+    # A "pasta" do cache e um arquivo: makedirs falha com OSError
+    cache_path = os.path.join(sources[0], "cache", "perfis.bin")
+    database = ProfileDatabase(sources, cache_path)
+    assert isinstance(database.data, bytes)
+    assert database.lookup(WHEEL_GUID).name == "Volante Arduino"
+    database.close()
@@ -0,0 +1,70 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: test_report_stats.py
+# Descrição: Precisao do estimador P² contra numpy.percentile e as medidas de
+#            intervalo/perdas do ReportStats.
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+import numpy as np
+import pygame
+import pytest
+
+from report_stats import P2Quantile, ReportStats
+
+
+@pytest.mark.parametrize("quantile", [0.5, 0.9, 0.99])
+@pytest.mark.parametrize("distribution", ["normal", "exponential", "uniform"])
+def test_p2_quantile_matches_numpy(quantile, distribution):
+    rng = np.random.default_rng(0)
+    samples = {
+        "normal": lambda: rng.normal(4.0, 0.5, 20000),
+        "exponential": lambda: rng.exponential(4.0, 20000),
+        "uniform": lambda: rng.uniform(0.0, 8.0, 20000),
+    }[distribution]()
+    estimator = P2Quantile(quantile)
+    for value in samples:
+        estimator.add(float(value))
+
+    # O P² guarda so 5 marcadores: na cauda (p99) o erro e maior
+    tolerance = 0.05 if quantile > 0.95 else 0.02
+    assert estimator.value() == pytest.approx(np.percentile(samples, quantile * 100), rel=tolerance)
+
+
+def test_p2_quantile_with_few_samples_is_exact():
+    estimator = P2Quantile(0.5)
+    for value in (5.0, 1.0, 3.0):
+        estimator.add(value)
+    assert estimator.value() == 3.0
+
+
+def axis_event(axis, value):
+    return pygame.event.Event(pygame.JOYAXISMOTION, instance_id=0, axis=axis, value=value)
+
+
+def test_intervals_and_gap_drops_with_fine_timestamps():
+    stats = ReportStats(0)
+    time = 0.0
+    for i in range(200):
+        if i == 100:
+            time += 0.012  # tres relatorios de 4 ms perdidos
+        time += 0.004
+        stats.add_event(axis_event(0, (i % 50) / 50), time)
+
+    assert stats.timing_resolved()
+    summary = stats.summary()
+    assert summary["interval_p50_ms"] == pytest.approx(4.0, abs=0.01)
+    assert summary["dropped"] == 3
+
+
+def test_coarse_timestamps_hide_timing():
+    # 250 Hz lido so uma vez por quadro (30 Hz): varios relatorios do mesmo eixo por leitura
+    stats = ReportStats(0)
+    for i in range(300):
+        frame_time = int(i * 0.004 * 30 + 1) / 30
+        stats.add_event(axis_event(0, (i % 50) / 50), frame_time)
+
+    assert not stats.timing_resolved()
+    summary = stats.summary()
+    assert summary["interval_p50_ms"] is None and summary["jitter_p99_ms"] is None
+    assert summary["dropped"] == 0
@@ -0,0 +1,95 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: test_session_recorder.py
+# Descrição: Ida e volta da gravacao .jrec: SessionRecorder -> SessionReplay,
+#            incluindo os eventos de controle conectado/desconectado.
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+import pygame
+import pytest
+
+from fake_joystick import SyntheticJoystick
+from session_recorder import AXIS_SCALE, SessionRecorder, SessionReplay
+
+
+def record_session(path):
+    # Conecta, mexe eixo/botao/direcional e desconecta, com horarios conhecidos
+    joystick = SyntheticJoystick(3, num_axes=2, num_buttons=2, num_hats=1, name="Bancada")
+    joysticks = {3: joystick}
+    recorder = SessionRecorder(str(path))
+    start = recorder.start_time
+    recorder.record_device(joystick, start + 0.001)
+    recorder.record_event(pygame.event.Event(pygame.JOYAXISMOTION, instance_id=3, axis=1, value=0.5), joysticks, start + 0.002)
+    recorder.record_event(pygame.event.Event(pygame.JOYAXISMOTION, instance_id=3, axis=1, value=-0.25), joysticks, start + 0.003)
+    recorder.record_event(pygame.event.Event(pygame.JOYBUTTONDOWN, instance_id=3, button=1), joysticks, start + 0.004)
+    recorder.record_event(pygame.event.Event(pygame.JOYHATMOTION, instance_id=3, hat=0, value=(1, -1)), joysticks, start + 0.005)
+    recorder.record_event(pygame.event.Event(pygame.JOYDEVICEREMOVED, instance_id=3), joysticks, start + 0.006)
+    recorder.close()
+    return joystick
+
+
+def replay_all(replay):
+    events = []
+    while True:
+        step_events = replay.step()
+        if step_events is None:
+            return events
+        events.extend(step_events)
+
+
+def test_replay_reproduces_recorded_events(tmp_path):
+    record_session(tmp_path / "sessao.jrec")
+    replay = SessionReplay(str(tmp_path / "sessao.jrec"), speed=None)
+    events = replay_all(replay)
+    replay.close()
+
+    assert [pygame.event.event_name(event.type) for event in events] == [
+        "JoyDeviceAdded", "JoyAxisMotion", "JoyAxisMotion", "JoyButtonDown", "JoyHatMotion", "JoyDeviceRemoved",
+    ]
+    assert [event.recorded_us for event in events] == pytest.approx([1000, 2000, 3000, 4000, 5000, 6000], abs=1)
+    added, first_axis, second_axis, button, hat, removed = events
+    assert added.device_index == added.instance_id == 3
+    assert first_axis.value == pytest.approx(0.5, abs=1 / AXIS_SCALE)
+    assert second_axis.value == pytest.approx(-0.25, abs=1 / AXIS_SCALE)  # gravado como delta
+    assert button.button == 1
+    assert hat.value == (1, -1)
+    assert removed.instance_id == 3
+    assert replay.finished
+
+
+def test_replay_joysticks_follow_device_events(tmp_path):
+    original = record_session(tmp_path / "sessao.jrec")
+    replay = SessionReplay(str(tmp_path / "sessao.jrec"), speed=None)
+
+    assert replay.step()[0].type == pygame.JOYDEVICEADDED
+    joystick = replay.joystick(3)
+    assert replay.joysticks == {3: joystick}
+    assert joystick.get_name() == "Bancada"
+    assert joystick.get_guid() == original.get_guid()
+    assert (joystick.get_numaxes(), joystick.get_numbuttons(), joystick.get_numhats()) == (2, 2, 1)
+
+    replay_all(replay)
+    assert joystick.get_axis(1) == pytest.approx(-0.25, abs=1 / AXIS_SCALE)
+    assert joystick.get_button(1) == 1
+    assert joystick.get_hat(0) == (1, -1)
+    # Desconectado sai de joysticks, mas continua disponivel para o JOYDEVICEADDED ja entregue
+    assert replay.joysticks == {}
+    assert replay.joystick(3) is joystick
+
+    replay.rewind()
+    assert replay.joysticks == {} and not replay.finished
+    assert replay.step()[0].type == pygame.JOYDEVICEADDED
+    replay.close()
+
+
+def test_advance_respects_speed(tmp_path):
+    record_session(tmp_path / "sessao.jrec")
+    replay = SessionReplay(str(tmp_path / "sessao.jrec"), speed=1.0)
+    assert replay.advance(now=10.0) == []  # marca o inicio; nada com tempo 0
+    assert [event.type for event in replay.advance(now=10.0025)] == [
+        pygame.JOYDEVICEADDED, pygame.JOYAXISMOTION,
+    ]
+    assert len(replay.advance(now=11.0)) == 4
+    assert replay.finished
+    replay.close()
@@ -0,0 +1,98 @@
+# -----------------------------------------------------------------------------
+# Nome do arquivo: test_telemetry.py
+# Descrição: Ida e volta do protocolo de telemetria: encode_device ->
+#            TelemetryDecoder.decode (quadro completo, delta e buraco na
+#            sequencia).
+#
+# Autor: Leonardo Hilgemberg Lopes.
+# Empresa: AthenasArch.
+# -----------------------------------------------------------------------------
+import pytest
+
+from session_recorder import AXIS_SCALE
+from telemetry import (
+    FLAG_KEYFRAME, FRAME_HEADER, MAGIC, VERSION, TelemetryDecoder, WireState, encode_device,
+)
+
+
+BENCH_A = ("10.0.0.1", 47800)
+BENCH_B = ("10.0.0.2", 47800)
+
+
+def frame(sequence, *blocks, flags=0, station=0, timestamp=1.0):
+    return FRAME_HEADER.pack(MAGIC, VERSION, flags, station, sequence, timestamp) + b"".join(blocks)
+
+
+def test_keyframe_round_trip():
+    state = WireState([100, -32767, 0], [1, 0, 1, 1, 0, 0, 0, 0, 1], [(0, 1), (-1, 0)], power_level=4)
+    decoder = TelemetryDecoder()
+
+    source, needs_keyframe = decoder.decode(frame(0, encode_device(7, state, None), flags=FLAG_KEYFRAME), BENCH_A)
+
+    assert source == (BENCH_A, 0)
+    assert not needs_keyframe
+    remote = decoder.stations[source][7]
+    assert remote.axes == pytest.approx([100 / AXIS_SCALE, -1.0, 0.0])
+    assert remote.buttons == [1, 0, 1, 1, 0, 0, 0, 0, 1]
+    assert remote.hats == [(0, 1), (-1, 0)]
+    assert remote.power_level == "full"
+
+
+def test_delta_only_carries_changes():
+    first = WireState([100, 200], [0, 1], [(0, 0)])
+    second = WireState([100, 300], [0, 1], [(1, 0)])
+    decoder = TelemetryDecoder()
+    decoder.decode(frame(0, encode_device(1, first, None), flags=FLAG_KEYFRAME), BENCH_A)
+
+    block = encode_device(1, second, first)
+    full = encode_device(1, second, None)
+    assert len(block) < len(full)
+    assert encode_device(1, second, second) is None  # nada mudou: nada a enviar
+
+    source, needs_keyframe = decoder.decode(frame(1, block), BENCH_A)
+    assert not needs_keyframe
+    remote = decoder.stations[source][1]
+    assert remote.axes == pytest.approx([100 / AXIS_SCALE, 300 / AXIS_SCALE])
+    assert remote.buttons == [0, 1]  # botoes sem mudanca continuam os do quadro completo
+    assert remote.hats == [(1, 0)]
+    assert decoder.gaps == 0
+
+
+def test_sequence_gap_asks_for_keyframe_until_one_arrives():
+    state = WireState([0], [0], [])
+    decoder = TelemetryDecoder()
+    decoder.decode(frame(0, encode_device(1, state, None), flags=FLAG_KEYFRAME), BENCH_A)
+
+    # O quadro 1 se perdeu
+    _, needs_keyframe = decoder.decode(frame(2, encode_device(1, WireState([5], [1], []), state)), BENCH_A)
+    assert needs_keyframe
+    assert decoder.gaps == 1
+
+    # Deltas seguintes nao resolvem; so um quadro completo
+    _, needs_keyframe = decoder.decode(frame(3), BENCH_A)
+    assert needs_keyframe
+    _, needs_keyframe = decoder.decode(frame(4, encode_device(1, state, None), flags=FLAG_KEYFRAME), BENCH_A)
+    assert not needs_keyframe
+    assert decoder.gaps == 1
+
+
+def test_benches_with_the_same_station_id_stay_apart():
+    decoder = TelemetryDecoder()
+    decoder.decode(frame(0, encode_device(0, WireState([16384], [], []), None), flags=FLAG_KEYFRAME), BENCH_A)
+    decoder.decode(frame(0, encode_device(0, WireState([-16384], [], []), None), flags=FLAG_KEYFRAME), BENCH_B)
+    decoder.decode(frame(1), BENCH_A)
+
+    assert decoder.stations[(BENCH_A, 0)][0].axes == pytest.approx([16384 / AXIS_SCALE])
+    assert decoder.stations[(BENCH_B, 0)][0].axes == pytest.approx([-16384 / AXIS_SCALE])
+    assert decoder.gaps == 0
+
+
+def test_invalid_datagrams_are_counted():
+    decoder = TelemetryDecoder()
+    assert decoder.decode(b"JT", BENCH_A) is None
+    assert decoder.decode(b"XX" + frame(0)[2:], BENCH_A) is None
+    # Bloco cortado no meio: conta como invalido e pede quadro completo
+    block = encode_device(1, WireState([1, 2, 3], [1], []), None)
+    _, needs_keyframe = decoder.decode(frame(0, block[:-3], flags=FLAG_KEYFRAME), BENCH_A)
+    assert needs_keyframe
+    assert decoder.invalid == 3